@@ -0,0 +1,10 @@
+# Suite de benchmarks del proyecto: generadores sintéticos (synthetic) y ejecución por etapas (run)
+# python -m benchmarks.run --genome-sizes 1M 10M --peak-rows 1e3 1e5 -o bench.json
+
+import os
+import sys
+
+# Los módulos del proyecto viven en src/ y se importan por nombre (peaks, genome, ...)
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# Benchmark del parser de picos: ruta clasica (dict de tuplas) contra PeakTable columnar
+# python benchmarks/bench_parse_peaks.py -p data/union_peaks_file.tsv --repeat 200
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC_DIR)
+
+MODES = ('dict', 'columnar')
+
+
+def build_input(peak_file, repeat, dest):
+    """
+    Genera un TSV repitiendo `repeat` veces las filas de datos de `peak_file`.
+
+    Devuelve el número de filas de datos escritas.
+    """
+    with open(peak_file) as f:
+        header = f.readline()
+        body = f.read()
+    if not body.endswith('\n'):
+        body += '\n'
+    with open(dest, 'w') as out:
+        out.write(header)
+        for _ in range(repeat):
+            out.write(body)
+    return body.count('\n') * repeat
+
+
+def run_child(mode, peak_file):
+    """
+    Ejecuta un único parser en este proceso e imprime 'segundos maxrss_kb'.
+
+    Se ejecuta en un subproceso para que el pico de RSS de cada modo sea independiente.
+    """
+    from peaks import parse_peaks, parse_peaks_table
+
+    parser = parse_peaks_table if mode == 'columnar' else parse_peaks
+    t0 = time.perf_counter()
+    peaks = parser(peak_file)
+    elapsed = time.perf_counter() - t0
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{elapsed} {maxrss} {len(peaks)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de parse_peaks contra parse_peaks_table')
+    parser.add_argument('-p', '--peaks', required=True, help='Archivo TSV de picos base')
+    parser.add_argument('--repeat', type=int, default=100, help='Veces que se replican las filas del archivo')
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.peaks)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        peak_file = os.path.join(tmp, 'peaks.tsv')
+        n_rows = build_input(args.peaks, args.repeat, peak_file)
+        print(f"Filas de entrada: {n_rows}")
+        print(f"{'modo':<10}{'segundos':>10}{'filas/s':>14}{'RSS max (MB)':>14}")
+        for mode in MODES:
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '-p', peak_file, '--child', mode],
+                check=True, capture_output=True, text=True,
+            ).stdout.split()
+            elapsed, maxrss_kb = float(out[0]), int(out[1])
+            print(f"{mode:<10}{elapsed:>10.3f}{n_rows / elapsed:>14.0f}{maxrss_kb / 1024:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# Presupuesto de arranque de la CLI: tiempo de importación medido con python -X importtime
+# python benchmarks/check_startup.py --budget-ms 25
+# Termina con código 1 si se supera el presupuesto o se importa un módulo pesado.
+# La misma verificación corre como prueba en tests/test_startup.py.
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'main.py')
+
+# Módulos que no deben importarse antes de validar los argumentos
+FORBIDDEN = ('numpy', 'Bio')
+
+# Lo que main.py importa siempre: su costo depende del intérprete y la máquina, no de este proyecto
+BASELINE = ['-c', 'import argparse, os, sys']
+
+# Tiempo de importación permitido por caso, además del de BASELINE, en milisegundos
+DEFAULT_BUDGET_MS = 25.0
+
+
+def import_times(args):
+    """
+    Ejecuta el intérprete con -X importtime y los argumentos dados.
+
+    Los argumentos pueden hacer fallar la validación (código de salida 1):
+    solo interesa el costo de importación hasta ese punto.
+
+    Returns:
+        tuple: ({módulo: microsegundos propios}, código de salida, resto de stderr).
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime'] + args,
+        capture_output=True, text=True,
+    )
+    times = {}
+    messages = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            messages.append(line)
+            continue
+        if 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(self_us)
+    return times, result.returncode, '\n'.join(messages)
+
+
+def startup_cases(tmp):
+    """
+    Casos a medir, como argumentos de main.py.
+
+    validation_error usa archivos existentes (vacíos) para pasar las
+    verificaciones de archivos y fallar en la última validación de opciones,
+    de modo que se mide todo lo que main.py importa antes de leer los datos.
+    """
+    peaks = os.path.join(tmp, 'picos.tsv')
+    genome = os.path.join(tmp, 'genoma.fa')
+    for path in (peaks, genome):
+        open(path, 'w').close()
+    return {
+        'help': ['--help'],
+        'validation_error': ['-p', peaks, '-g', genome, '-o', os.path.join(tmp, 'salida'), '--markov-order', '-1'],
+    }
+
+
+def measure_case(argv, repeat=5):
+    """
+    Mide el costo de importación de main.py con los argumentos dados.
+
+    Solo cuenta los módulos que no importa BASELINE y toma la más rápida de
+    las repeticiones para filtrar ruido.
+
+    Returns:
+        tuple: (milisegundos, {módulo: microsegundos}, módulos prohibidos importados,
+                código de salida, resto de stderr).
+    """
+    baseline = set()
+    for _ in range(repeat):
+        baseline.update(import_times(BASELINE)[0])
+
+    runs = []
+    for _ in range(repeat):
+        times, returncode, messages = import_times([MAIN] + argv)
+        extra = {name: self_us for name, self_us in times.items() if name not in baseline}
+        runs.append((extra, returncode, messages))
+    best, returncode, messages = min(runs, key=lambda run: sum(run[0].values()))
+    heavy = sorted({name.split('.')[0] for extra, _, _ in runs for name in extra} & set(FORBIDDEN))
+    return sum(best.values()) / 1000, best, heavy, returncode, messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Verifica el presupuesto de importación al arrancar main.py')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help='Tiempo de importación permitido por caso, además del de argparse/os/sys, en milisegundos')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Ejecuciones por caso (se toma la más rápida para filtrar ruido)')
+    parser.add_argument('--top', type=int, default=5, help='Módulos más costosos a mostrar por caso')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        failed = False
+        for case, argv in startup_cases(tmp).items():
+            total_ms, best, heavy, _, _ = measure_case(argv, args.repeat)
+            ok = total_ms <= args.budget_ms and not heavy
+            failed |= not ok
+
+            print(f"{case}: {total_ms:.1f} ms de importacion (presupuesto {args.budget_ms:.0f} ms)"
+                  f"{'' if ok else '  <-- FALLA'}")
+            for name, self_us in sorted(best.items(), key=lambda item: -item[1])[:args.top]:
+                print(f"    {name:<30}{self_us / 1000:>8.2f} ms")
+            if heavy:
+                print(f"    Modulos pesados importados: {', '.join(heavy)}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
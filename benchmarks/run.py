@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+# Benchmarks reproducibles por etapa y de extremo a extremo sobre datos sintéticos
+# python -m benchmarks.run --genome-sizes 1M 10M --peak-rows 1e3 1e5 -o bench.json
+# python -m benchmarks.run --genome-sizes 1M --peak-rows 1e4 --baseline bench.json
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from benchmarks import SRC_DIR
+from benchmarks.synthetic import contig_lengths, parse_size, write_genome, write_peaks
+
+# Variantes medidas en cada etapa
+STAGES = {
+    'parse': ('dict', 'columnar'),
+    'genome_load': ('builtin', 'biopython', 'mmap', 'cache'),
+    'extract': ('batch', 'dedup'),
+    'write': ('plain', 'gzip'),
+    'end_to_end': ('text', 'columnar', 'cached'),
+}
+
+
+def _stage_parse(variant, case):
+    from peaks import parse_peaks, parse_peaks_table
+
+    parser = parse_peaks_table if variant == 'columnar' else parse_peaks
+    t0 = time.perf_counter()
+    parser(case['peaks'])
+    return time.perf_counter() - t0, case['n_peaks'], 'filas/s'
+
+
+def _stage_genome_load(variant, case):
+    from genome import load_genome, load_indexed_genome
+    from genome_cache import load_genome_cache
+
+    t0 = time.perf_counter()
+    if variant in ('builtin', 'biopython'):
+        length = len(load_genome(case['genome'], variant).seq)
+    elif variant == 'mmap':
+        length = len(load_indexed_genome(case['genome']).seq)
+    else:
+        length = len(load_genome_cache(case['cache']).seq)
+    return time.perf_counter() - t0, length, 'pb/s'
+
+
+def _load_inputs(case):
+    """Carga fuera del tiempo medido el genoma (como cadena) y los picos agrupados."""
+    from genome_cache import load_genome_cache
+    from peaks import parse_peaks_table, peak_batch
+
+    genome_text = str(load_genome_cache(case['cache']).seq)
+    with contextlib.redirect_stderr(io.StringIO()):
+        batch = peak_batch(parse_peaks_table(case['peaks']))
+    return genome_text, batch
+
+
+def _stage_extract(variant, case):
+    from extractor import extract_batch
+
+    genome_text, (_, _, starts, ends, _) = _load_inputs(case)
+    t0 = time.perf_counter()
+    extract_batch(genome_text, starts, ends, dedup=(variant == 'dedup'))
+    return time.perf_counter() - t0, len(starts), 'picos/s'
+
+
+def _stage_write(variant, case):
+    from extractor import extract_batch
+    from io_utils import write_tf_fastas
+
+    genome_text, (tf_names, offsets, starts, ends, peak_ids) = _load_inputs(case)
+    in_bounds, sequences = extract_batch(genome_text, starts, ends)
+    bounds = offsets.tolist()
+    starts = starts.tolist()
+    ends = ends.tolist()
+    compression = 'gzip' if variant == 'gzip' else None
+    n_bytes = sum(len(seq) for seq in sequences)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        t0 = time.perf_counter()
+        for tf_name, lo, hi in zip(tf_names, bounds, bounds[1:]):
+            records = list(zip(peak_ids[lo:hi], starts[lo:hi], ends[lo:hi], sequences[lo:hi]))
+            write_tf_fastas(tf_name, records, output_dir, compression=compression)
+        elapsed = time.perf_counter() - t0
+    return elapsed, n_bytes, 'bases/s'
+
+
+def _stage_end_to_end(variant, case):
+    import main as cli
+    from peaks_cache import default_cache_path, load_peak_table
+
+    # Cada repetición parte del mismo estado: se borra la cache de picos que
+    # haya dejado la anterior y solo la variante 'cached' la crea, fuera del
+    # tiempo medido. Las tres variantes leen el genoma de la misma cache a 2
+    # bits, así que solo difiere la lectura de la tabla de picos
+    peaks_cache = default_cache_path(case['peaks'])
+    if os.path.exists(peaks_cache):
+        os.remove(peaks_cache)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        argv = ['main.py', '-p', case['peaks'], '-g', case['genome'], '-o', output_dir]
+        if variant == 'text':
+            argv.append('--no-peaks-cache')
+        elif variant == 'columnar':
+            argv.append('--columnar')
+        else:
+            with contextlib.redirect_stderr(io.StringIO()):
+                load_peak_table(case['peaks'], quiet=True)
+        sys.argv = argv
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            cli.main()
+        elapsed = time.perf_counter() - t0
+    return elapsed, case['n_peaks'], 'picos/s'
+
+
+_STAGE_FUNCTIONS = {
+    'parse': _stage_parse,
+    'genome_load': _stage_genome_load,
+    'extract': _stage_extract,
+    'write': _stage_write,
+    'end_to_end': _stage_end_to_end,
+}
+
+
+def _run_in_child(stage, variant, case):
+    """
+    Ejecuta una etapa dentro de un proceso nuevo (spawn).
+
+    Así el pico de RSS (VmHWM) corresponde solo a esa etapa y ninguna
+    medición se beneficia de cachés de Python de la anterior.
+    """
+    if SRC_DIR not in sys.path:
+        sys.path.insert(0, SRC_DIR)
+    from metrics import peak_rss_kb
+
+    elapsed, units, unit_name = _STAGE_FUNCTIONS[stage](variant, case)
+    return elapsed, units, unit_name, peak_rss_kb()
+
+
+def prepare_case(workdir, genome_size, n_contigs, n_peaks, seed):
+    """
+    Genera (o reutiliza si ya existen en workdir) el genoma, su índice .fai,
+    su cache binaria y la tabla de picos de un caso.
+    """
+    from genome import IndexedGenome
+    from genome_cache import build_genome_cache, default_cache_path, is_cache_fresh
+
+    genome_path = os.path.join(workdir, f"genome_{genome_size}_{n_contigs}_{seed}.fa")
+    peaks_path = os.path.join(workdir, f"peaks_{n_peaks}_{genome_size}_{seed}.tsv")
+    if not os.path.exists(genome_path):
+        write_genome(genome_path, genome_size, n_contigs=n_contigs, seed=seed)
+    if not os.path.exists(peaks_path):
+        # Los picos se ubican en el primer contig, que es el que usa la extracción
+        write_peaks(peaks_path, n_peaks, contig_lengths(genome_size, n_contigs)[0], seed=seed)
+    IndexedGenome(genome_path).close()  # Deja construido el índice .fai
+    cache_path = default_cache_path(genome_path)
+    if not is_cache_fresh(cache_path, genome_path):
+        build_genome_cache(genome_path, cache_path)
+    return {
+        'genome': genome_path,
+        'cache': cache_path,
+        'peaks': peaks_path,
+        'genome_size': genome_size,
+        'n_contigs': n_contigs,
+        'n_peaks': n_peaks,
+    }
+
+
+def run_benchmarks(cases, stages, repeat=3):
+    """
+    Mide cada etapa y variante en cada caso; con repeat > 1 se queda con el menor tiempo.
+
+    Returns:
+        list: Un diccionario por medición.
+    """
+    ctx = multiprocessing.get_context('spawn')
+    results = []
+    for case in cases:
+        for stage in stages:
+            for variant in STAGES[stage]:
+                best = None
+                for _ in range(repeat):
+                    with ctx.Pool(1) as pool:
+                        measurement = pool.apply(_run_in_child, (stage, variant, case))
+                    if best is None or measurement[0] < best[0]:
+                        best = measurement
+                elapsed, units, unit_name, maxrss_kb = best
+                result = {
+                    'stage': stage,
+                    'variant': variant,
+                    'genome_size': case['genome_size'],
+                    'n_contigs': case['n_contigs'],
+                    'n_peaks': case['n_peaks'],
+                    'wall_s': round(elapsed, 6),
+                    'throughput': round(units / elapsed, 1) if elapsed > 0 else None,
+                    'throughput_unit': unit_name,
+                    'peak_rss_mb': round(maxrss_kb / 1024, 1),
+                }
+                results.append(result)
+                print(
+                    f"{stage:<12}{variant:<16}{case['genome_size']:>12}{case['n_peaks']:>10}"
+                    f"{elapsed:>10.3f}{result['throughput'] or 0:>14.0f} {unit_name:<8}{result['peak_rss_mb']:>9.1f}",
+                    file=sys.stderr,
+                )
+    return results
+
+
+def result_key(result):
+    """Identifica una medición para compararla con la línea base."""
+    return (result['stage'], result['variant'], result['genome_size'], result['n_contigs'], result['n_peaks'])
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """
+    Compara tiempos contra una línea base guardada.
+
+    Returns:
+        list: Mediciones cuyo tiempo supera al de la línea base en más de
+              `tolerance` (fracción), con el cambio relativo en 'change'.
+    """
+    previous = {result_key(result): result for result in baseline['results']}
+    regressions = []
+    for result in results:
+        old = previous.get(result_key(result))
+        if old is None or not old['wall_s']:
+            continue
+        change = result['wall_s'] / old['wall_s'] - 1
+        result['baseline_wall_s'] = old['wall_s']
+        result['change'] = round(change, 4)
+        if change > tolerance:
+            regressions.append(result)
+    return regressions
+
+
+def parse_args():
+    """
+    Argumentos de la suite de benchmarks:
+    - --genome-sizes: Tamaños de genoma sintético (p. ej. 1M 100M 1G)
+    - --contigs: Número de contigs de cada genoma
+    - --peak-rows: Filas de la tabla de picos sintética (p. ej. 1e3 1e7)
+    - --stages: Etapas a medir
+    - --output (-o): Reporte JSON
+    - --baseline / --tolerance: Comparación contra un reporte previo
+    """
+    parser = argparse.ArgumentParser(
+        description='Benchmarks por etapa y de extremo a extremo con genomas y picos sintéticos',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('--genome-sizes', nargs='+', default=['1M'], help='Tamaños de genoma (admite k, M, G)')
+    parser.add_argument('--contigs', nargs='+', type=int, default=[1], help='Número de contigs por genoma')
+    parser.add_argument('--peak-rows', nargs='+', default=['1e4'], help='Filas de la tabla de picos')
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES), help='Etapas a medir')
+    parser.add_argument('--repeat', type=int, default=3, help='Repeticiones por medición (se reporta la mejor)')
+    parser.add_argument('--seed', type=int, default=0, help='Semilla de los generadores sintéticos')
+    parser.add_argument('--workdir', default=None, help='Directorio donde generar/reutilizar los datos sintéticos')
+    parser.add_argument('-o', '--output', default=None, help='Archivo JSON de resultados (por defecto, salida estándar)')
+    parser.add_argument('--baseline', default=None, help='Reporte JSON previo contra el cual comparar')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Aumento de tiempo tolerado frente a la línea base (fracción)')
+    return parser.parse_args()
+
+
+def main():
+    """Genera los casos, corre las etapas, escribe el reporte y compara con la línea base."""
+    args = parse_args()
+    genome_sizes = [parse_size(size) for size in args.genome_sizes]
+    peak_rows = [parse_size(rows) for rows in args.peak_rows]
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    with contextlib.ExitStack() as stack:
+        workdir = args.workdir or stack.enter_context(tempfile.TemporaryDirectory())
+        os.makedirs(workdir, exist_ok=True)
+        cases = [
+            prepare_case(workdir, genome_size, n_contigs, n_peaks, args.seed)
+            for genome_size in genome_sizes
+            for n_contigs in args.contigs
+            for n_peaks in peak_rows
+        ]
+        print(f"{'etapa':<12}{'variante':<16}{'genoma_pb':>12}{'picos':>10}{'segundos':>10}{'throughput':>14} {'':<8}{'RSS_MB':>9}", file=sys.stderr)
+        results = run_benchmarks(cases, args.stages, args.repeat)
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': args.seed,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+    regressions = []
+    if baseline is not None:
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        report['meta']['baseline'] = os.path.abspath(args.baseline)
+        report['meta']['tolerance'] = args.tolerance
+        report['regressions'] = [result_key(result) for result in regressions]
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as out:
+            out.write(payload + '\n')
+    else:
+        print(payload)
+
+    for result in regressions:
+        print(
+            f"REGRESION: {result['stage']}/{result['variant']} genoma={result['genome_size']} picos={result['n_peaks']}: "
+            f"{result['baseline_wall_s']:.3f} s -> {result['wall_s']:.3f} s ({result['change']:+.1%})",
+            file=sys.stderr,
+        )
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+import numpy as np
+
+# Encabezado con las mismas columnas que data/union_peaks_file.tsv
+PEAK_HEADER = [
+    '', 'Dataset_Ids', 'TF_name', 'Peak_start', 'Peak_end', 'Peak_center', 'Peak_number',
+    'Max_Fold_Enrichment', 'Max_Norm_Fold_Enrichment', 'Proximal_genes', 'Center_position_type',
+]
+
+_BASES = np.frombuffer(b'ACGT', dtype=np.uint8)
+
+
+def parse_size(text):
+    """Convierte tamaños como '1M', '10k', '1G' o '1e6' en enteros."""
+    text = str(text).strip()
+    suffixes = {'k': 10 ** 3, 'm': 10 ** 6, 'g': 10 ** 9}
+    if text and text[-1].lower() in suffixes:
+        return int(float(text[:-1]) * suffixes[text[-1].lower()])
+    return int(float(text))
+
+
+def contig_lengths(genome_length, n_contigs):
+    """
+    Reparte la longitud total en contigs: el primero es el cromosoma y el
+    resto son plásmidos de igual tamaño que suman un 10% del total.
+    """
+    if n_contigs <= 1:
+        return [genome_length]
+    plasmid = max(1, genome_length // 10 // (n_contigs - 1))
+    return [genome_length - plasmid * (n_contigs - 1)] + [plasmid] * (n_contigs - 1)
+
+
+def write_genome(path, genome_length, n_contigs=1, line_width=80, seed=0, block_lines=100000):
+    """
+    Escribe un genoma FASTA aleatorio (ACGT uniforme) de `genome_length` pb.
+
+    Se genera por bloques de líneas para poder crear genomas de 1 Gb sin
+    tenerlos completos en memoria.
+
+    Returns:
+        list: Longitudes de los contigs escritos, en orden.
+    """
+    rng = np.random.default_rng(seed)
+    lengths = contig_lengths(genome_length, n_contigs)
+    with open(path, 'wb') as out:
+        for index, length in enumerate(lengths):
+            name = 'chr' if index == 0 else f"plasmid{index}"
+            out.write(f">{name} synthetic contig {index + 1}\n".encode())
+            remaining = length
+            while remaining:
+                n_bases = min(remaining, block_lines * line_width)
+                seq = _BASES[rng.integers(0, 4, n_bases)]
+                n_full = n_bases // line_width
+                if n_full:
+                    lines = np.empty((n_full, line_width + 1), dtype=np.uint8)
+                    lines[:, :line_width] = seq[:n_full * line_width].reshape(n_full, line_width)
+                    lines[:, line_width] = ord('\n')
+                    out.write(lines.tobytes())
+                tail = seq[n_full * line_width:]
+                if len(tail):
+                    out.write(tail.tobytes() + b'\n')
+                remaining -= n_bases
+    return lengths
+
+
+def tf_weights(n_tfs, decay=0.05):
+    """
+    Pesos de TF con distribución sesgada como la tabla real: el número de
+    picos cae de forma aproximadamente exponencial con el rango del TF
+    (nac tiene ~500 de 7823, el TF número 30 ~100 y la mayoría solo unos
+    pocos).
+    """
+    weights = np.exp(-decay * np.arange(n_tfs))
+    return weights / weights.sum()
+
+
+def write_peaks(path, n_rows, genome_length, n_tfs=140, seed=0, min_width=150, max_width=600, block_rows=200000):
+    """
+    Escribe una tabla de picos sintética con las columnas de union_peaks_file.tsv.
+
+    Los TFs siguen la distribución de tf_weights, los picos se ubican al azar
+    dentro de [1, genome_length] y las coordenadas se escriben como float
+    ('1234.0'), igual que en el archivo real.
+
+    Returns:
+        dict: {tf_name: número de picos}.
+    """
+    rng = np.random.default_rng(seed)
+    tf_names = [f"tf{i:04d}" for i in range(n_tfs)]
+    weights = tf_weights(n_tfs)
+    counts = {}
+    row_id = 0
+    with open(path, 'w') as out:
+        out.write('\t'.join(PEAK_HEADER) + '\n')
+        while row_id < n_rows:
+            n = min(block_rows, n_rows - row_id)
+            tf_codes = rng.choice(n_tfs, size=n, p=weights)
+            widths = rng.integers(min_width, max_width + 1, n)
+            starts = rng.integers(1, max(2, genome_length - max_width), n)
+            ends = np.minimum(starts + widths - 1, genome_length)
+            centers = (starts + ends) // 2
+            enrichment = np.round(rng.uniform(2, 100, n), 2)
+            lines = []
+            for i, code, start, end, center, fold in zip(
+                    range(row_id, row_id + n), tf_codes.tolist(), starts.tolist(),
+                    ends.tolist(), centers.tolist(), enrichment.tolist()):
+                tf_name = tf_names[code]
+                counts[tf_name] = counts.get(tf_name, 0) + 1
+                lines.append(
+                    f"{i}\t{tf_name} native 1\t{tf_name}\t{start}.0\t{end}.0\t{center}.0\t{counts[tf_name]}"
+                    f"\t{fold}\t1.0\tgeneA,geneB\tintergenic\n"
+                )
+            out.writelines(lines)
+            row_id += n
+    return counts
@@ -0,0 +1,171 @@
+import contextlib
+import json
+import os
+import sys
+import time
+
+# Reporte consolidado del modo por lotes, en el directorio de salida
+BATCH_REPORT = 'batch_report.json'
+BATCH_SUMMARY = 'batch_summary.tsv'
+# Salida de cada genoma, en su subdirectorio
+RUN_LOG = 'run.log'
+
+# Extensiones que se quitan de la ruta para nombrar un genoma
+FASTA_EXTENSIONS = ('.fasta', '.fa', '.fna', '.fas')
+
+# Opciones y picos compartidos con los procesos de trabajo (heredados al hacer fork)
+_BATCH_ARGS = None
+_BATCH_PEAKS = None
+
+
+def genome_name(path):
+    """Nombre de un genoma a partir de su ruta: el archivo sin la extensión de FASTA."""
+    name = os.path.basename(path)
+    for extension in FASTA_EXTENSIONS:
+        if name.endswith(extension):
+            return name[:-len(extension)]
+    return name
+
+
+def read_genome_list(list_path):
+    """
+    Lee una lista de genomas.
+
+    Formato: un genoma por línea, la ruta sola o 'nombre<TAB>ruta'. Las rutas
+    relativas se toman respecto del directorio de la lista; se ignoran las
+    líneas vacías y las que empiezan con '#'.
+
+    Returns:
+        list: Tuplas (nombre, ruta absoluta).
+    """
+    base_dir = os.path.dirname(os.path.abspath(list_path))
+    genomes = []
+    with open(list_path) as f:
+        for line in f:
+            if not line.strip() or line.startswith('#'):
+                continue
+            fields = line.rstrip('\r\n').split('\t')
+            path = os.path.join(base_dir, fields[-1].strip())
+            name = fields[0].strip() if len(fields) > 1 else genome_name(path)
+            genomes.append((name, os.path.abspath(path)))
+    return genomes
+
+
+def _extract_genome(name, genome_file, output_dir):
+    """
+    Trabajo de un genoma: extrae los picos compartidos en '{output_dir}/{nombre}'.
+
+    La salida normal y los avisos van a run.log en ese subdirectorio, para que
+    no se mezclen los de genomas procesados en paralelo. El genoma se libera
+    al terminar, antes de pasar al siguiente trabajo del mismo proceso.
+
+    Returns:
+        dict: Nombre, ruta, estado ('ok' o el error), segundos y reporte de RunMetrics.
+    """
+    from main import extract_for_genome
+    from metrics import RunMetrics
+
+    genome_dir = os.path.join(output_dir, name)
+    os.makedirs(genome_dir, exist_ok=True)
+    log_path = os.path.join(genome_dir, RUN_LOG)
+    metrics = RunMetrics()
+    t0 = time.perf_counter()
+    status = 'ok'
+    with open(log_path, 'w') as log, contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            extract_for_genome(_BATCH_ARGS, _BATCH_PEAKS, genome_file, genome_dir, metrics)
+        except SystemExit as e:  # Errores que main.py reporta con sys.exit (p. ej. FASTA inválido)
+            status = f"error (codigo {e.code})"
+        except Exception as e:
+            print(f"ERROR: {type(e).__name__}: {str(e)}", file=sys.stderr)
+            status = f"error ({type(e).__name__}: {str(e)})"
+    return {
+        'genome': name,
+        'path': genome_file,
+        'outdir': genome_dir,
+        'log': log_path,
+        'status': status,
+        'wall_s': time.perf_counter() - t0,
+        'metrics': metrics.report(),
+    }
+
+
+def write_batch_report(results, output_dir, peak_file, counters):
+    """
+    Escribe el reporte consolidado (JSON completo y resumen TSV por genoma).
+
+    Returns:
+        str: Ruta del reporte JSON.
+    """
+    from io_utils import atomic_write
+
+    report = {
+        'peaks': peak_file,
+        'rows_read': counters.get('rows_read', 0),
+        'rows_rejected': counters.get('rows_rejected', {}),
+        'genomes': results,
+    }
+    report_path = os.path.join(output_dir, BATCH_REPORT)
+    atomic_write(report_path, (json.dumps(report, indent=2) + '\n').encode('utf-8'))
+
+    rows = ["Genome\tStatus\tGenome_length\tFiles_written\tSequences\tPeaks_out_of_bounds\tWall_s\tOutdir"]
+    for result in results:
+        result_counters = result['metrics']['counters']
+        rows.append('\t'.join(str(value) for value in (
+            result['genome'], result['status'], result_counters.get('genome_length', 0),
+            result_counters.get('files_written', 0), result_counters.get('sequences_written', 0),
+            result_counters.get('peaks_out_of_bounds', 0), f"{result['wall_s']:.2f}", result['outdir'],
+        )))
+    atomic_write(os.path.join(output_dir, BATCH_SUMMARY), ('\n'.join(rows) + '\n').encode('utf-8'))
+    return report_path
+
+
+def run_batch(args, peaks_dict, genome_list, output_dir, counters=None):
+    """
+    Extrae los mismos picos contra varios genomas.
+
+    Los picos se leen una sola vez (en main.py) y los procesos de trabajo los
+    heredan al hacer fork junto con las opciones, sin serializarlos. Cada
+    genoma es un trabajo: se carga dentro del proceso, se extrae con
+    extract_for_genome en '{output_dir}/{nombre}' y se libera antes del
+    siguiente, de modo que a lo sumo hay --genome-jobs genomas en memoria.
+    Los trabajos más grandes (por tamaño del FASTA) empiezan primero.
+
+    Args:
+        args (argparse.Namespace): Opciones de main.py.
+        peaks_dict (dict | PeakTable): Picos ya leídos.
+        genome_list (list): Tuplas (nombre, ruta) de los genomas.
+        output_dir (str): Directorio de salida del lote.
+        counters (dict): Contadores de la lectura de picos, que se copian al reporte.
+
+    Returns:
+        list: Resultado de cada genoma (ver _extract_genome), en el orden de genome_list.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    global _BATCH_ARGS, _BATCH_PEAKS
+    jobs = min(args.genome_jobs or os.cpu_count() or 1, len(genome_list))
+    order = sorted(range(len(genome_list)), key=lambda i: -os.path.getsize(genome_list[i][1]))
+
+    _BATCH_ARGS, _BATCH_PEAKS = args, peaks_dict
+    results = [None] * len(genome_list)
+    try:
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context('fork')) as pool:
+            futures = {pool.submit(_extract_genome, *genome_list[i], output_dir): i for i in order}
+            for future, i in futures.items():
+                results[i] = future.result()
+    finally:
+        _BATCH_ARGS = _BATCH_PEAKS = None
+
+    for result in results:
+        result_counters = result['metrics']['counters']
+        print(f"{result['genome']}: {result['status']} - {result_counters.get('sequences_written', 0)} secuencias en "
+              f"{result_counters.get('files_written', 0)} archivos ({result['wall_s']:.2f} s, detalle en {result['log']})")
+    report_path = write_batch_report(results, output_dir, os.path.abspath(args.peaks), counters or {})
+    print(f"Reporte del lote: {report_path}")
+    failed = [result['genome'] for result in results if result['status'] != 'ok']
+    if failed:
+        print(f"ERROR: Fallaron {len(failed)} genomas: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+    return results
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# Cliente del servidor de extracción (server.py)
+# Igual que main.py, pero sin cargar el genoma ni los picos en cada llamada:
+# python src/client.py -p data/union_peaks_file.tsv -g data/E_coli_K12_MG1655_U00096.3.fasta -o results/
+# FASTA de un TF o de una lista de regiones en la salida estándar:
+# python src/client.py --tf AraC
+# python src/client.py --regions regiones.tsv
+
+import argparse
+import contextlib
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+
+# Socket Unix por defecto del servidor, en un directorio propio del usuario ($XDG_RUNTIME_DIR o uno con permisos 0700)
+SOCKET_DIR = os.environ.get('XDG_RUNTIME_DIR') or os.path.join(tempfile.gettempdir(), f"peak_analysis-{os.getuid()}")
+DEFAULT_SOCKET = os.path.join(SOCKET_DIR, 'peak_analysis.sock')
+# Tamaño máximo de una línea de petición (p. ej. 'regions' con muchas regiones)
+MAX_REQUEST_BYTES = 1 << 26
+
+
+def connect(socket_path=DEFAULT_SOCKET, host=None, port=None):
+    """Abre la conexión con el servidor: TCP si se indica puerto, si no el socket Unix."""
+    if port is not None:
+        return socket.create_connection((host or '127.0.0.1', port))
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(socket_path)
+    return sock
+
+
+def send_request(sock_file, request):
+    """
+    Envía una petición y lee la respuesta.
+
+    Protocolo: una línea JSON por petición (de hasta MAX_REQUEST_BYTES); la
+    respuesta es una línea JSON con 'ok' y 'bytes' (tamaño del contenido)
+    seguida de ese número de bytes de contenido (FASTA u otro texto).
+
+    Args:
+        sock_file: Archivo binario de lectura/escritura sobre el socket.
+        request (dict): Petición, con la operación en 'op'.
+
+    Returns:
+        tuple: (encabezado, contenido en bytes).
+
+    Raises:
+        ConnectionError: Si el servidor cerró la conexión sin responder.
+    """
+    try:
+        sock_file.write(json.dumps(request).encode('utf-8') + b'\n')
+        sock_file.flush()
+    except OSError:
+        pass  # El servidor puede cerrar tras responder con un error (petición demasiado grande): se lee abajo
+    try:
+        line = sock_file.readline()
+    except OSError as e:
+        raise ConnectionError(f"Se perdio la conexion con el servidor: {str(e)}")
+    if not line:
+        raise ConnectionError("El servidor cerro la conexion")
+    header = json.loads(line)
+    payload = sock_file.read(header.get('bytes', 0)) if header.get('bytes') else b''
+    return header, payload
+
+
+def parse_args():
+    """
+    Argumentos del cliente:
+    - --peaks (-p), --genome (-g), --outdir (-o): Como en main.py; escribe un FASTA por TF
+    - --tf: Escribe en la salida estándar el FASTA de uno o más TFs
+    - --regions: Escribe en la salida estándar las secuencias de un TSV de regiones
+    - --reload: Vuelve a leer en el servidor el archivo de picos (-p o el cargado)
+    - --status, --shutdown: Estado del servidor / detenerlo
+    - --socket, --host, --port: Dirección del servidor
+    """
+    parser = argparse.ArgumentParser(
+        description='Cliente del servidor residente de extracción de sitios de unión',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('-p', '--peaks', default=None, help='Archivo TSV con información de picos de ChIP-Seq')
+    parser.add_argument('-g', '--genome', default=None, help='Archivo FASTA del genoma (debe ser el cargado en el servidor)')
+    parser.add_argument('-o', '--outdir', default=None, help='Directorio donde se guardarán los archivos FASTA por TF')
+    parser.add_argument('--tf', nargs='+', default=None, help='TFs cuyo FASTA se escribe en la salida estándar')
+    parser.add_argument('--regions', default=None, help='TSV de regiones (inicio, fin, etiqueta opcional) a extraer')
+    parser.add_argument('--reload', action='store_true', help='Vuelve a leer el archivo de picos en el servidor')
+    parser.add_argument('--status', action='store_true', help='Muestra el genoma y los picos cargados en el servidor')
+    parser.add_argument('--shutdown', action='store_true', help='Detiene el servidor')
+    parser.add_argument('--line-width', type=int, default=0, help='Corta las secuencias en líneas de N columnas')
+    parser.add_argument('--compress', choices=('gzip', 'bgzip'), default=None, help='Comprime los FASTA de -o')
+    parser.add_argument('--compress-level', type=int, default=6, choices=range(1, 10), metavar='{1-9}',
+                        help='Nivel de compresión para --compress')
+    parser.add_argument('--incremental', action='store_true', help='Solo regenera los TFs con cambios (ver main.py)')
+    parser.add_argument('--dedup', action='store_true', help='Extrae una sola vez cada intervalo repetido')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET, help='Socket Unix del servidor')
+    parser.add_argument('--host', default='127.0.0.1', help='Host del servidor si se usa --port')
+    parser.add_argument('--port', type=int, default=None, help='Puerto TCP del servidor (en lugar del socket Unix)')
+    return parser.parse_args()
+
+
+def build_requests(args):
+    """Traduce los argumentos a la lista de peticiones a enviar."""
+    requests = []
+    if args.shutdown:
+        return [{'op': 'shutdown'}]
+    if args.reload:
+        requests.append({'op': 'reload', 'peaks': os.path.abspath(args.peaks) if args.peaks else None})
+    if args.status:
+        requests.append({'op': 'status'})
+    if args.tf:
+        requests.extend({'op': 'fasta', 'tf': tf_name, 'line_width': args.line_width} for tf_name in args.tf)
+    if args.regions:
+        from query_regions import read_regions
+        regions = read_regions(args.regions)
+        requests.append({'op': 'regions', 'regions': regions, 'line_width': args.line_width})
+    if args.outdir:
+        requests.append({
+            'op': 'extract',
+            'peaks': os.path.abspath(args.peaks),
+            'genome': os.path.abspath(args.genome),
+            'outdir': os.path.abspath(args.outdir),
+            'write_options': {
+                'line_width': args.line_width,
+                'compression': args.compress,
+                'level': args.compress_level,
+            },
+            'incremental': args.incremental,
+            'dedup': args.dedup,
+        })
+    return requests
+
+
+def main():
+    """Envía las peticiones al servidor y escribe sus respuestas."""
+    args = parse_args()
+
+    if args.outdir and not (args.peaks and args.genome):
+        print("ERROR: -o requiere tambien -p y -g", file=sys.stderr)
+        sys.exit(1)
+    for path in (args.peaks, args.genome, args.regions):
+        if path and not os.path.exists(path):
+            print(f"ERROR: Archivo no encontrado: {os.path.abspath(path)}", file=sys.stderr)
+            sys.exit(1)
+
+    requests = build_requests(args)
+    if not requests:
+        print("ERROR: Nada que pedir (use -p/-g/-o, --tf, --regions, --reload, --status o --shutdown)", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        sock = connect(args.socket, args.host, args.port)
+    except OSError as e:
+        where = f"{args.host}:{args.port}" if args.port is not None else args.socket
+        print(f"ERROR: No se pudo conectar con el servidor en {where}: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+    failed = False
+    sock_file = sock.makefile('rwb')
+    try:
+        for request in requests:
+            t0 = time.perf_counter()
+            try:
+                header, payload = send_request(sock_file, request)
+            except ConnectionError as e:
+                print(f"ERROR: [{request['op']}] {str(e)}", file=sys.stderr)
+                failed = True
+                break
+            elapsed_ms = (time.perf_counter() - t0) * 1000
+            if not header['ok']:
+                print(f"ERROR: {header['error']}", file=sys.stderr)
+                failed = True
+                continue
+            if payload:
+                sys.stdout.buffer.write(payload)
+            if header.get('message'):
+                print(header['message'], file=sys.stderr)
+            print(f"[{request['op']}] {elapsed_ms:.2f} ms", file=sys.stderr)
+    finally:
+        # Si el servidor cerró la conexión queda en el búfer una petición que no se
+        # pudo enviar; al cerrar se intentaría de nuevo y fallaría con EPIPE
+        with contextlib.suppress(OSError):
+            sock_file.close()
+        sock.close()
+    sys.stdout.flush()
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,63 +1,585 @@
+import heapq
+import mmap
+import multiprocessing
 import os
 import sys
-from io_utils import write_tf_fastas
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import compress
 
-def extract_sequences(genome_seq, peaks_dict, output_dir):
+import numpy as np
+
+from genome import ContigView, reverse_complement_batch
+from io_utils import FastaHandlePool, write_tf_fastas
+from manifest import is_clean, load_manifest, make_entry, peaks_fingerprint, remove_manifest, save_manifest
+from peaks import peak_batch, peak_strands
+from seq_stats import BACKGROUND_DIR, sequence_stats, write_stats_report
+
+# Reporte de picos descartados por coordenadas fuera del genoma
+REJECTED_REPORT = 'rejected_peaks.tsv'
+
+# Genoma compartido con los procesos de trabajo (mmap anónimo heredado al hacer fork)
+_SHARED_GENOME = None
+
+
+def extract_batch(genome_text, starts, ends, dedup=False, stats=None, minus=None):
+    """
+    Valida y extrae en bloque las subsecuencias de un lote de picos.
+
+    Args:
+        genome_text (str | ContigView | mmap): Genoma como una sola cadena, como
+                                  vista de un backend indexado (las regiones se
+                                  leen en bloque con slices()) o como buffer de
+                                  bytes (se decodifica cada rebanada).
+        starts (np.ndarray): Coordenadas iniciales (1-based).
+        ends (np.ndarray): Coordenadas finales (1-based, inclusivas).
+        dedup (bool): Si es True, cada intervalo (start, end) distinto se extrae
+                      una sola vez y la misma cadena se reutiliza en todos los
+                      picos (de cualquier TF) que lo comparten.
+        stats (dict): Si se indica, acumula en 'requested' las secuencias pedidas
+                      y en 'unique' las rebanadas realmente extraídas.
+        minus (np.ndarray): Máscara de picos en la hebra '-': sus secuencias se
+                            devuelven como complementaria inversa, calculada en
+                            bloque (reverse_complement_batch). Con dedup, la
+                            hebra forma parte de la clave del intervalo.
+
+    Returns:
+        tuple: (in_bounds, sequences), donde in_bounds es la máscara booleana de
+               picos dentro del genoma y sequences la lista de secuencias de esos
+               picos, en el mismo orden.
+    """
+    # Validación de límites en una sola pasada vectorizada (coordenadas 1-based)
+    in_bounds = (starts >= 1) & (ends <= len(genome_text))
+    kept_starts = starts[in_bounds]
+    kept_ends = ends[in_bounds]
+    kept_minus = minus[in_bounds] if minus is not None else None
+    n_requested = len(kept_starts)
+
+    if dedup:
+        # Clave única por intervalo (inicio en los 32 bits altos, fin en los bajos)
+        keys = (kept_starts.astype(np.uint64) << np.uint64(32)) | kept_ends.astype(np.uint64)
+        if kept_minus is not None:
+            # La hebra en el bit más bajo: el mismo intervalo en '+' y '-' son dos secuencias distintas
+            keys = (keys << np.uint64(1)) | kept_minus.astype(np.uint64)
+        keys, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        kept_starts = kept_starts[first]
+        kept_ends = kept_ends[first]
+        if kept_minus is not None:
+            kept_minus = kept_minus[first]
+
+    # Conversión a 0-based y extracción directa del genoma
+    if isinstance(genome_text, ContigView):
+        sequences = genome_text.slices(kept_starts - 1, kept_ends)
+    elif isinstance(genome_text, str):
+        sequences = [genome_text[start:end] for start, end in zip((kept_starts - 1).tolist(), kept_ends.tolist())]
+    else:
+        sequences = [str(genome_text[start:end], 'ascii') for start, end in zip((kept_starts - 1).tolist(), kept_ends.tolist())]
+
+    if kept_minus is not None and kept_minus.any():
+        rows = np.flatnonzero(kept_minus).tolist()
+        for row, seq in zip(rows, reverse_complement_batch([sequences[row] for row in rows])):
+            sequences[row] = seq
+
+    if stats is not None:
+        stats['requested'] = stats.get('requested', 0) + n_requested
+        stats['unique'] = stats.get('unique', 0) + len(sequences)
+
+    if dedup:
+        sequences = [sequences[i] for i in inverse.ravel().tolist()]
+    return in_bounds, sequences
+
+
+def format_dedup_stats(stats):
+    """Texto con las secuencias pedidas, las únicas extraídas y la proporción de duplicados."""
+    requested, unique = stats.get('requested', 0), stats.get('unique', 0)
+    ratio = requested / unique if unique else 1.0
+    saved = 1 - unique / requested if requested else 0.0
+    return f"{requested} secuencias, {unique} intervalos unicos (factor {ratio:.2f}x, {saved:.1%} de extracciones evitadas)"
+
+
+def write_rejected_report(rejected, output_dir):
+    """
+    Escribe en un solo archivo TSV los picos descartados por estar fuera del genoma.
+
+    Args:
+        rejected (list): Tuplas (tf_name, peak_id, start, end).
+        output_dir (str): Directorio de salida.
+
+    Returns:
+        str: Ruta del reporte escrito.
+    """
+    report_path = os.path.join(output_dir, REJECTED_REPORT)
+    with open(report_path, 'w') as report:
+        report.write("TF_name\tPeak_id\tPeak_start\tPeak_end\tReason\n")
+        for tf_name, peak_id, start, end in rejected:
+            report.write(f"{tf_name}\t{peak_id}\t{start}\t{end}\tout_of_bounds\n")
+    return report_path
+
+
+def record_extraction_metrics(metrics, stats, output_paths, n_rejected, dedup=False):
+    """
+    Pasa a RunMetrics los contadores y tiempos de una extracción.
+
+    Args:
+        metrics (RunMetrics): Mediciones de la ejecución.
+        stats (dict): Contadores de extract_batch y tiempos 'extract_s'/'write_s'
+                      (y 'stats_s' si se calcularon estadísticas).
+        output_paths (dict): {tf_name: ruta} de los FASTA escritos en esta ejecución.
+        n_rejected (int): Picos fuera de los límites del genoma.
+        dedup (bool): Si se registran también los intervalos únicos.
+    """
+    metrics.add_time('extract', stats.get('extract_s', 0.0))
+    metrics.add_time('write', stats.get('write_s', 0.0))
+    if 'stats_s' in stats:
+        metrics.add_time('stats', stats['stats_s'])
+    metrics.count('sequences_written', stats.get('requested', 0))
+    metrics.count('peaks_out_of_bounds', n_rejected)
+    if dedup:
+        metrics.count('unique_intervals', stats.get('unique', 0))
+    bytes_written = metrics.counters.setdefault('bytes_written', {})
+    for tf_name, output_path in output_paths.items():
+        bytes_written[tf_name] = os.path.getsize(output_path)
+    metrics.count('files_written', len(output_paths))
+
+
+def sliceable_genome(genome_seq):
+    """
+    Genoma en la forma que usa extract_batch, sin copiarlo si no hace falta.
+
+    Las vistas de los backends indexados (mmap con .fai o cache de 2 bits)
+    se devuelven tal cual: cada región se lee bajo demanda. Solo un
+    registro que ya está en memoria (str o Bio.Seq.Seq) se convierte en
+    una sola cadena.
+    """
+    if isinstance(genome_seq, (str, ContigView)):
+        return genome_seq
+    return str(genome_seq)
+
+
+def balance_groups(tasks, n_workers):
+    """
+    Reparte los TFs en grupos de trabajo equilibrados por total de bases a extraer.
+
+    Usa la heurística LPT: los TFs se ordenan de mayor a menor número de bases
+    y cada uno se asigna al grupo con menos carga acumulada, de modo que TFs
+    pesados (p. ej. nac o ulaR) no queden todos en el mismo trabajador.
+
+    Args:
+        tasks (list): Tuplas (tf_name, peak_ids, starts, ends, minus) de cada TF.
+        n_workers (int): Número de grupos.
+
+    Returns:
+        list: Listas de índices de tasks, una por grupo (se omiten grupos vacíos).
+    """
+    weights = [int((ends - starts + 1).sum()) for _, _, starts, ends, _ in tasks]
+
+    heap = [(0, group) for group in range(n_workers)]
+    groups = [[] for _ in range(n_workers)]
+    for task_index in sorted(range(len(tasks)), key=lambda i: (-weights[i], i)):
+        load, group = heapq.heappop(heap)
+        groups[group].append(task_index)
+        heapq.heappush(heap, (load + weights[task_index], group))
+    return [sorted(group) for group in groups if group]
+
+
+def _process_group(genome_text, group, output_dir, write_options, dedup=False, stats_options=None, checksums=False):
+    """
+    Extrae y escribe los FASTA de un grupo de TFs.
+
+    Args:
+        genome_text (str | mmap): Genoma completo.
+        group (list): Tuplas (tf_name, peak_ids, starts, ends, minus) de cada TF;
+                      minus es la máscara de hebra '-' o None (ver extract_batch).
+        output_dir (str): Directorio de salida.
+        write_options (dict): Opciones de write_tf_fastas (line_width, compression, level).
+        dedup (bool): Extrae una sola vez cada intervalo repetido (ver extract_batch).
+        stats_options (dict): Si se indica, calcula con sequence_stats (y estas
+                              opciones) las estadísticas de las secuencias de
+                              cada TF mientras están en memoria.
+        checksums (bool): Calcula el SHA-256 de cada FASTA al escribirlo (para el manifiesto).
+
+    Returns:
+        tuple: (resultados, stats). resultados es la lista de tuplas
+               (tf_name, secuencias_escritas, rechazados, ruta_salida) por TF,
+               donde rechazados es la lista de (tf_name, peak_id, start, end)
+               fuera del genoma y ruta_salida es None si no se escribió archivo;
+               stats son los contadores de extract_batch más los segundos
+               dedicados a extraer ('extract_s') y a escribir ('write_s'); con
+               stats_options incluye además 'sequence_stats' ({tf_name: estadísticas})
+               y 'stats_s', y con checksums 'checksums' ({tf_name: SHA-256}).
+    """
+    t0 = time.perf_counter()
+    write_s = 0.0
+    stats_s = 0.0
+    tf_stats = {}
+    tf_checksums = {} if checksums else None
+    starts = np.concatenate([tf[2] for tf in group])
+    ends = np.concatenate([tf[3] for tf in group])
+    minus = None if group[0][4] is None else np.concatenate([tf[4] for tf in group])
+    stats = {}
+    in_bounds, sequences = extract_batch(genome_text, starts, ends, dedup=dedup, stats=stats, minus=minus)
+
+    # Número de picos válidos antes de cada fila: ubica las secuencias de cada TF
+    kept_before = np.concatenate(([0], np.cumsum(in_bounds))).tolist()
+    in_bounds = in_bounds.tolist()
+
+    results = []
+    lo = 0
+    for tf_name, peak_ids, tf_starts, tf_ends, tf_minus in group:
+        hi = lo + len(peak_ids)
+        mask = in_bounds[lo:hi]
+        tf_starts = tf_starts.tolist()
+        tf_ends = tf_ends.tolist()
+
+        # Tuplas (peak_id, start, end, sequence) de los picos válidos del TF
+        sequences_to_write = list(zip(
+            compress(peak_ids, mask),
+            compress(tf_starts, mask),
+            compress(tf_ends, mask),
+            sequences[kept_before[lo]:kept_before[hi]],
+        ))
+        rejected = [
+            (tf_name, peak_id, start, end)
+            for peak_id, start, end, keep in zip(peak_ids, tf_starts, tf_ends, mask) if not keep
+        ]
+
+        if stats_options is not None and sequences_to_write:
+            t_stats = time.perf_counter()
+            tf_stats[tf_name] = sequence_stats([record[3] for record in sequences_to_write], **stats_options)
+            stats_s += time.perf_counter() - t_stats
+
+        # Escritura de archivo FASTA para el TF actual
+        output_path = None
+        if sequences_to_write:
+            t_write = time.perf_counter()
+            strands = None if tf_minus is None else ['-' if m else '+' for m in compress(tf_minus.tolist(), mask)]
+            output_path = write_tf_fastas(tf_name, sequences_to_write, output_dir, strands=strands,
+                                          checksums=tf_checksums, **write_options)
+            write_s += time.perf_counter() - t_write
+        results.append((tf_name, len(sequences_to_write), rejected, output_path))
+        lo = hi
+    stats['write_s'] = write_s
+    stats['extract_s'] = time.perf_counter() - t0 - write_s - stats_s
+    if stats_options is not None:
+        stats['stats_s'] = stats_s
+        stats['sequence_stats'] = tf_stats
+    if checksums:
+        stats['checksums'] = tf_checksums
+    return results, stats
+
+
+def _process_shared_group(group, output_dir, write_options, dedup, stats_options, checksums):
+    """Tarea de un proceso de trabajo: procesa su grupo contra el genoma compartido."""
+    return _process_group(_SHARED_GENOME, group, output_dir, write_options, dedup, stats_options, checksums)
+
+
+def extract_sequences(genome_seq, peaks_dict, output_dir, workers=1, write_options=None, incremental=False,
+                      dedup=False, quiet=False, metrics=None, stats_options=None, genome_hash=None, out=None,
+                      err=None):
     """
     Extrae secuencias del genoma y guarda archivos FASTA por cada TF usando io_utils.
-    
+
     Args:
-        genome_seq (Seq): Secuencia completa del genoma (Bio.Seq.Seq).
-        peaks_dict (dict): {tf_name: [(start, end, peak_id), ...], ...}
+        genome_seq (Seq): Secuencia completa del genoma (Bio.Seq.Seq o una vista
+                          de genome/genome_cache con len() y str()).
+        peaks_dict (dict | PeakTable): {tf_name: [(start, end, peak_id), ...], ...}.
+                                       Si es una PeakTable con hebras, las secuencias
+                                       de la hebra '-' se escriben como complementaria
+                                       inversa y el encabezado indica la hebra.
         output_dir (str): Directorio donde se guardan los FASTA.
-    
+        workers (int): Número de procesos para extraer y escribir en paralelo.
+        write_options (dict): Opciones de escritura para write_tf_fastas
+                              (line_width, compression, level).
+        incremental (bool): Si es True, omite los TFs cuyos picos, genoma y opciones
+                            no cambiaron desde la última ejecución (según el manifiesto)
+                            y guarda el manifiesto actualizado.
+        dedup (bool): Extrae una sola vez cada intervalo compartido entre picos
+                      y TFs, y reporta la proporción de duplicados.
+        quiet (bool): No imprime el resumen por TF.
+        metrics (RunMetrics): Si se indica, registra los tiempos de extracción y
+                              escritura (sumados entre procesos), las secuencias
+                              escritas, los picos fuera de límites y los bytes
+                              escritos por TF.
+        stats_options (dict): Si se indica, calcula sobre las secuencias ya en
+                              memoria las estadísticas de cada TF (longitudes,
+                              GC%, N y modelo de fondo; ver seq_stats) y las
+                              escribe en sequence_stats.tsv y background/{TF}.bg,
+                              sin volver a leer los FASTA. Opciones de
+                              sequence_stats: markov_order, bin_width.
+        genome_hash (str): Huella del genoma (ver manifest.genome_fingerprint);
+                           obligatoria con incremental=True.
+        out, err (file): Flujos del resumen y de los avisos (por defecto
+                         sys.stdout y sys.stderr).
+
     Proceso:
-        1. Calcula la longitud total del genoma para validación de coordenadas
-        2. Itera sobre cada TF y sus picos asociados
-        3. Para cada pico:
-           a. Convierte coordenadas 1-based a 0-based
-           b. Valida que las coordenadas estén dentro de los límites del genoma
-           c. Extrae la secuencia correspondiente
+        1. Convierte los picos de todos los TFs en arreglos de coordenadas
+           (el genoma se lee por regiones si viene de un backend indexado;
+           ver sliceable_genome)
+        2. Valida en una sola pasada vectorizada que las coordenadas estén
+           dentro de los límites del genoma
+        3. Extrae todas las subsecuencias válidas de la cadena del genoma
+           (coordenadas 1-based convertidas a 0-based)
         4. Escribe un archivo FASTA por TF usando la función write_tf_fastas
-    
+           (en bloque y con renombrado atómico)
+        5. Reporta los picos fuera de límites en un único archivo
+           (rejected_peaks.tsv) y un único aviso en stderr
+
+    Con workers > 1 los TFs se reparten en grupos equilibrados por bases
+    (balance_groups) y cada grupo se procesa en un proceso distinto. Un
+    genoma en memoria se copia una sola vez a un mmap anónimo compartido
+    que los procesos heredan al hacer fork, en lugar de serializarlo por
+    tarea; las vistas de los backends indexados se heredan sin copiarlas.
+    El resumen se imprime siempre en el orden original de los TFs, por lo
+    que la salida no depende del número de procesos.
+
+    Con incremental=True solo se reescriben los TFs cuyas entradas
+    cambiaron o cuyo archivo ya no coincide con el hash registrado, y al
+    terminar se guarda en el directorio de salida un manifiesto
+    (manifest.json) con, por TF, el hash de su lista de picos, el del
+    genoma y el del archivo escrito (calculado en memoria al escribirlo).
+    Sin incremental no se calcula ningún hash y se elimina el manifiesto
+    de una ejecución anterior, que ya no describiría la salida.
+
     Notas:
         - Las coordenadas en el archivo de entrada son 1-based (formato estándar en genómica)
         - Las coordenadas para extracción son convertidas a 0-based (requerido por Python)
         - Los archivos de salida siguen el formato: {TF_name}.fa
     """
-    # Longitud del genoma para validación
-    genome_length = len(genome_seq)
-    
+    global _SHARED_GENOME
+    write_options = write_options or {}
+    out = out or sys.stdout
+    err = err or sys.stderr
+
+    genome_text = sliceable_genome(genome_seq)
+    genome_length = len(genome_text)
+
+    print(f"\nGenoma cargado (longitud: {genome_length} pb)", file=out)
+    print(f"Procesando {len(peaks_dict)} factores de transcripcion...", file=out)
+
+    tf_names, offsets, starts, ends, peak_ids = peak_batch(peaks_dict)
+    minus = peak_strands(peaks_dict)
+    bounds = offsets.tolist()
+    tasks = [
+        (tf_name, peak_ids[lo:hi], starts[lo:hi], ends[lo:hi], None if minus is None else minus[lo:hi])
+        for tf_name, lo, hi in zip(tf_names, bounds, bounds[1:])
+    ]
+
+    # TFs sin cambios: se reutiliza lo registrado en el manifiesto
+    results = {}
+    if incremental:
+        if genome_hash is None:
+            raise ValueError("El modo incremental requiere la huella del genoma (genome_hash)")
+        peaks_hashes = {task[0]: peaks_fingerprint(*task[1:]) for task in tasks}
+        manifest = load_manifest(output_dir)
+        for tf_name, *_ in tasks:
+            if is_clean(manifest, tf_name, peaks_hashes[tf_name], genome_hash, write_options, output_dir):
+                entry = manifest['tfs'][tf_name]
+                results[tf_name] = (entry['sequences'], [tuple(peak) for peak in entry['rejected']], None)
+        tasks = [task for task in tasks if task[0] not in results]
+        print(f"Modo incremental: {len(tasks)} TFs por regenerar, {len(results)} sin cambios", file=out)
+    unchanged = set(results)
+
+    stats = {}
+    tf_stats = {}
+    checksums = {}
+    if workers > 1 and len(tasks) > 1:
+        groups = balance_groups(tasks, workers)
+        if isinstance(genome_text, str):
+            _SHARED_GENOME = mmap.mmap(-1, max(genome_length, 1))
+            _SHARED_GENOME.write(genome_text.encode('ascii'))
+            del genome_text
+        else:
+            _SHARED_GENOME = genome_text  # La vista apunta a un archivo mapeado, que los procesos ya comparten
+        try:
+            with ProcessPoolExecutor(max_workers=len(groups), mp_context=multiprocessing.get_context('fork')) as pool:
+                futures = [
+                    pool.submit(_process_shared_group, [tasks[i] for i in group], output_dir, write_options, dedup,
+                                stats_options, incremental)
+                    for group in groups
+                ]
+                for future in futures:
+                    group_results, group_stats = future.result()
+                    tf_stats.update(group_stats.pop('sequence_stats', {}))
+                    checksums.update(group_stats.pop('checksums', {}))
+                    for tf_name, written, rejected, output_path in group_results:
+                        results[tf_name] = (written, rejected, output_path)
+                    for key, value in group_stats.items():
+                        stats[key] = stats.get(key, 0) + value
+        finally:
+            if isinstance(_SHARED_GENOME, mmap.mmap):
+                _SHARED_GENOME.close()
+            _SHARED_GENOME = None
+    elif tasks:
+        group_results, stats = _process_group(genome_text, tasks, output_dir, write_options, dedup, stats_options,
+                                              incremental)
+        tf_stats = stats.pop('sequence_stats', {})
+        checksums = stats.pop('checksums', {})
+        for tf_name, written, rejected, output_path in group_results:
+            results[tf_name] = (written, rejected, output_path)
+
+    if incremental:
+        # Actualizar el manifiesto con los TFs reescritos y descartar los que ya no existen
+        manifest['genome'] = genome_hash
+        manifest['write_options'] = write_options
+        manifest['tfs'] = {tf_name: manifest['tfs'][tf_name] for tf_name in unchanged}
+        for tf_name, (written, tf_rejected, output_path) in results.items():
+            if tf_name in unchanged or (written and output_path is None):
+                continue  # Sin cambios, o error de escritura: queda pendiente para la próxima ejecución
+            manifest['tfs'][tf_name] = make_entry(
+                peaks_hashes[tf_name], output_path, checksums.get(tf_name), written, tf_rejected
+            )
+        save_manifest(output_dir, manifest)
+    else:
+        remove_manifest(output_dir)
+
+    # Resumen por TF en el orden original
+    rejected = []
+    for tf_name in tf_names:
+        written, tf_rejected, _ = results[tf_name]
+        rejected.extend(tf_rejected)
+        if quiet:
+            continue
+        if tf_name in unchanged:
+            print(f"{tf_name}: sin cambios ({written} secuencias)", file=out)
+        elif written:
+            print(f"{tf_name}: {written} secuencias extraidas", file=out)
+        else:
+            print(f"{tf_name}: Sin picos válidos - archivo no generado", file=err)
+
+    if dedup:
+        print(f"Deduplicacion: {format_dedup_stats(stats)}", file=out)
+
+    if stats_options is not None:
+        stats_path = write_stats_report({tf_name: tf_stats[tf_name] for tf_name in tf_names if tf_name in tf_stats}, output_dir)
+        print(f"Estadisticas de secuencias: {stats_path} (modelos de fondo en {os.path.join(output_dir, BACKGROUND_DIR)})", file=out)
+
+    report_path = os.path.join(output_dir, REJECTED_REPORT)
+    if rejected:
+        write_rejected_report(rejected, output_dir)
+        print(f"Advertencia: {len(rejected)} picos con coordenadas fuera de los limites (1-{genome_length}) se omitieron. Detalle en {report_path}", file=err)
+    elif os.path.exists(report_path):
+        os.remove(report_path)  # Reporte de una ejecución anterior
+
+    if metrics is not None:
+        output_paths = {
+            tf_name: output_path for tf_name, (_, _, output_path) in results.items() if output_path
+        }
+        record_extraction_metrics(metrics, stats, output_paths, len(rejected), dedup)
+        metrics.count('tfs_unchanged', len(unchanged))
+
+    print("\n[COMPLETADO] Extraccion finalizada", file=out)
+
+
+def extract_sequences_stream(genome_seq, peak_chunks, output_dir, write_options=None, max_open_files=256,
+                             dedup=False, quiet=False, metrics=None):
+    """
+    Extrae secuencias bloque a bloque, sin cargar antes toda la tabla de picos.
+
+    Cada bloque de picos (ver peaks.iter_peak_chunks) se valida y extrae con
+    extract_batch y sus secuencias se agregan al FASTA de cada TF a través de
+    un FastaHandlePool, que limita los archivos abiertos a la vez. La memoria
+    queda acotada por el genoma y el tamaño de bloque, no por el archivo de
+    picos. Los picos fuera del genoma se escriben en rejected_peaks.tsv a
+    medida que aparecen.
+
+    Args:
+        genome_seq (Seq): Secuencia completa del genoma.
+        peak_chunks (iterable): Bloques (tf_names, starts, ends, peak_ids).
+        output_dir (str): Directorio donde se guardan los FASTA.
+        write_options (dict): Opciones de escritura (line_width, compression, level).
+        max_open_files (int): Máximo de archivos de salida abiertos simultáneamente.
+        dedup (bool): Extrae una sola vez cada intervalo repetido dentro de cada bloque.
+        quiet (bool): No imprime el resumen por TF.
+        metrics (RunMetrics): Si se indica, registra además del tiempo de extracción
+                              y escritura el de lectura de bloques ('parse').
+
+    Returns:
+        int: Número de TFs con al menos un pico válido en el archivo.
+    """
+    write_options = write_options or {}
+    genome_text = sliceable_genome(genome_seq)
+    genome_length = len(genome_text)
+
     print(f"\nGenoma cargado (longitud: {genome_length} pb)")
-    print(f"Procesando {len(peaks_dict)} factores de transcripcion...")
-    
-    # Procesamiento por TF
-    for tf_name, peaks in peaks_dict.items():
-        sequences_to_write = [] # Almacena tuplas (peak_id, start, end, sequence)
-
-        peaks_processed = 0    # Contador de picos
-
-        for start, end, peak_id in peaks:
-            # Conversión a coordenadas 0-based para Python
-            start_idx = start - 1
-            end_idx = end
-            
-            # Validación de coordenadas
-            if start_idx < 0 or end_idx > genome_length:
-                import sys
-                print(f"Advertencia: Pico {peak_id} con coordenadas ({start}-{end}) fuera de los limites. Se omite.", file=sys.stderr)
-                continue
-            
-            # Extracción de secuencia
-            seq = str(genome_seq[start_idx:end_idx]) 
-            sequences_to_write.append((peak_id, start, end, seq))
-            peaks_processed += 1
+    print("Procesando picos por bloques...")
 
-        # Escritura de archivo FASTA para el TF actual
-        if sequences_to_write:
-            write_tf_fastas(tf_name, sequences_to_write, output_dir)
-            print(f"{tf_name}: {peaks_processed} secuencias extraidas")
+    pool = FastaHandlePool(output_dir, max_open=max_open_files, **write_options)
+    written = {}  # tf_name -> secuencias escritas, en orden de primera aparición
+    n_rows = n_rejected = 0
+    stats = {'extract_s': 0.0, 'write_s': 0.0}
+    parse_s = 0.0
+    report_path = os.path.join(output_dir, REJECTED_REPORT)
+    report_tmp = f"{report_path}.stream.tmp"
+
+    try:
+        with open(report_tmp, 'w') as report:
+            report.write("TF_name\tPeak_id\tPeak_start\tPeak_end\tReason\n")
+            chunks = iter(peak_chunks)
+            while True:
+                t0 = time.perf_counter()
+                chunk = next(chunks, None)
+                t1 = time.perf_counter()
+                parse_s += t1 - t0
+                if chunk is None:
+                    break
+                tf_names, starts, ends, peak_ids = chunk
+                in_bounds, sequences = extract_batch(genome_text, starts, ends, dedup=dedup, stats=stats)
+                in_bounds = in_bounds.tolist()
+                starts = starts.tolist()
+                ends = ends.tolist()
+
+                # Agrupar las secuencias del bloque por TF conservando el orden de archivo
+                by_tf = {}
+                kept = iter(sequences)
+                for tf_name, peak_id, start, end, keep in zip(tf_names, peak_ids, starts, ends, in_bounds):
+                    written.setdefault(tf_name, 0)
+                    if keep:
+                        by_tf.setdefault(tf_name, []).append((peak_id, start, end, next(kept)))
+                    else:
+                        report.write(f"{tf_name}\t{peak_id}\t{start}\t{end}\tout_of_bounds\n")
+                        n_rejected += 1
+
+                t2 = time.perf_counter()
+                for tf_name, tf_sequences in by_tf.items():
+                    pool.append(tf_name, tf_sequences)
+                    written[tf_name] += len(tf_sequences)
+                n_rows += len(tf_names)
+                t3 = time.perf_counter()
+                stats['extract_s'] += t2 - t1
+                stats['write_s'] += t3 - t2
+        t0 = time.perf_counter()
+        output_paths = pool.finalize()
+        stats['write_s'] += time.perf_counter() - t0
+    except BaseException:
+        pool.abort()
+        if os.path.exists(report_tmp):
+            os.remove(report_tmp)
+        raise
+
+    # Resumen por TF en orden de primera aparición
+    for tf_name, count in written.items():
+        if quiet:
+            break
+        if count:
+            print(f"{tf_name}: {count} secuencias extraidas")
         else:
             print(f"{tf_name}: Sin picos válidos - archivo no generado", file=sys.stderr)
-        
-    print("\n[COMPLETADO] Extraccion finalizada")
\ No newline at end of file
+
+    if dedup:
+        print(f"Deduplicacion: {format_dedup_stats(stats)}")
+
+    if n_rejected:
+        os.replace(report_tmp, report_path)
+        print(f"Advertencia: {n_rejected} picos con coordenadas fuera de los limites (1-{genome_length}) se omitieron. Detalle en {report_path}", file=sys.stderr)
+    else:
+        os.remove(report_tmp)
+        if os.path.exists(report_path):
+            os.remove(report_path)  # Reporte de una ejecución anterior
+
+    if metrics is not None:
+        metrics.add_time('parse', parse_s)
+        record_extraction_metrics(metrics, stats, output_paths, n_rejected, dedup)
+
+    print(f"Picos procesados: {n_rows}")
+    print("\n[COMPLETADO] Extraccion finalizada")
+    return len(written)
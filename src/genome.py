@@ -1,16 +1,109 @@
-from Bio import SeqIO
+import mmap
 import sys
 import os
 
-def load_genome(genome_file_path):
+# Complemento de cada base, incluidos los códigos IUPAC (R<->Y, K<->M, B<->V, D<->H; S, W y N no cambian)
+COMPLEMENT = str.maketrans('ACGTRYSWKMBDHVNacgtryswkmbdhvn', 'TGCAYRSWMKVHDBNtgcayrswmkvhdbn')
+COMPLEMENT_BYTES = bytes.maketrans(b'ACGTRYSWKMBDHVNacgtryswkmbdhvn', b'TGCAYRSWMKVHDBNtgcayrswmkvhdbn')
+
+
+def reverse_complement(seq):
+    """Complementaria inversa de una secuencia (str) de ADN, con códigos IUPAC y minúsculas."""
+    return seq.translate(COMPLEMENT)[::-1]
+
+
+def reverse_complement_batch(sequences):
+    """
+    Complementarias inversas de una lista de secuencias, en bloque.
+
+    Une las secuencias con '\\n', complementa todo el buffer con una sola
+    llamada a bytes.translate y lo invierte: al invertir el bloque completo
+    cada secuencia queda invertida y la lista en orden inverso, que se
+    corrige al separar.
+    """
+    if not sequences:
+        return []
+    joined = '\n'.join(sequences).encode('ascii').translate(COMPLEMENT_BYTES)[::-1]
+    return joined.decode('ascii').split('\n')[::-1]
+
+
+class FastaRecord:
+    """
+    Registro FASTA mínimo: lo que el resto del programa usa de un SeqRecord.
+
+    Atributos:
+        id (str): Primer palabra del encabezado.
+        description (str): Encabezado completo sin '>'.
+        seq (str): Secuencia.
+    """
+
+    def __init__(self, id, description, seq):
+        self.id = id
+        self.description = description
+        self.seq = seq
+
+    def __len__(self):
+        return len(self.seq)
+
+
+def read_first_fasta_record(genome_file_path):
+    """
+    Lector FASTA mínimo sin dependencias: devuelve el primer registro del archivo.
+
+    Une las líneas de secuencia quitando saltos de línea, retornos de carro y
+    espacios, igual que Bio.SeqIO. Las líneas antes del primer '>' deben estar
+    vacías. Lee línea a línea y se detiene en el segundo encabezado, sin
+    cargar en memoria el resto del archivo.
+
+    Returns:
+        FastaRecord: El primer registro, o None si el archivo no tiene registros.
+
+    Raises:
+        ValueError: Si hay texto antes del primer encabezado.
+    """
+    with open(genome_file_path) as f:
+        # Hasta el primer encabezado solo se admiten líneas vacías
+        leading_text = False
+        for line in f:
+            if line.startswith('>'):
+                break
+            if line.strip():
+                if '>' in line:
+                    raise ValueError("Hay texto antes del primer encabezado FASTA")
+                leading_text = True
+        else:
+            if leading_text:
+                raise ValueError("El archivo no tiene encabezados FASTA ('>')")
+            return None
+        if leading_text:
+            raise ValueError("Hay texto antes del primer encabezado FASTA")
+
+        # Secuencia: líneas hasta el siguiente encabezado, sin leer el resto del archivo
+        description = line[1:].rstrip('\n').rstrip('\r')
+        parts = []
+        for line in f:
+            if line.startswith('>'):
+                break
+            line = line.rstrip('\n')
+            if ' ' in line or '\r' in line:
+                line = line.replace('\r', '').replace(' ', '')
+            parts.append(line)
+
+    seq = ''.join(parts)
+    return FastaRecord(description.split(None, 1)[0] if description.strip() else '', description, seq)
+
+
+def load_genome(genome_file_path, backend='builtin'):
     """
     Carga la secuencia del genoma desde un archivo FASTA.
     
     Args:
         genome_file_path (str): Ruta al archivo FASTA del genoma.
+        backend (str): 'builtin' (lector mínimo de este módulo) o 'biopython'
+                       (Bio.SeqIO, que solo se importa en ese caso).
         
     Returns:
-        SeqRecord: el registro de la secuencia cargada.
+        FastaRecord | SeqRecord: el registro de la secuencia cargada.
     
     Sale con mensaje de error si:
         - El archivo no existe
@@ -23,6 +116,15 @@ def load_genome(genome_file_path):
         sys.exit(1)
 
     try:
+        if backend == 'builtin':
+            genome_record = read_first_fasta_record(genome_file_path)
+            if genome_record is None:
+                raise StopIteration
+            return genome_record
+
+        # Biopython es opcional: solo se importa si se pide este backend
+        from Bio import SeqIO
+
         # Intentar analizar el archivo FASTA
         with open(genome_file_path) as f:
             genome_record = next(SeqIO.parse(f, 'fasta'))
@@ -34,6 +136,236 @@ def load_genome(genome_file_path):
     except StopIteration:  # Se lanza si el FASTA está vacío
         print(f"ERROR: El archivo de genoma está vacío: {genome_file_path}", file=sys.stderr)
         sys.exit(1)
+    except ImportError:
+        print("ERROR: El backend 'biopython' requiere Biopython (pip install biopython)", file=sys.stderr)
+        sys.exit(1)
     except Exception as e:  # Captura otros errores de análisis
         print(f"ERROR: Fallo al analizar el archivo de genoma: {str(e)}", file=sys.stderr)
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
+
+class ContigView:
+    """
+    Vista de solo lectura de un contig de un IndexedGenome.
+
+    Imita lo que extract_sequences usa de Bio.Seq.Seq: len(view) y
+    rebanadas view[start:end] (0-based, fin exclusivo), que se leen bajo
+    demanda desde el genoma subyacente y se devuelven como str; slices()
+    lee muchas regiones en una sola llamada. Funciona con cualquier genoma
+    que implemente length(name), fetch(name, start, end) y
+    fetch_batch(name, starts, ends).
+    """
+
+    def __init__(self, genome, name):
+        self._genome = genome
+        self.name = name
+
+    def __len__(self):
+        return self._genome.length(self.name)
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            raise TypeError("ContigView solo admite rebanadas [inicio:fin]")
+        start, stop, step = key.indices(len(self))
+        if step != 1:
+            raise ValueError("ContigView no admite rebanadas con paso")
+        return self._genome.fetch(self.name, start, stop)
+
+    def slices(self, starts, ends):
+        """Rebanadas [start, end) (0-based) de varias regiones, como lista de str (ver fetch_batch)."""
+        return self._genome.fetch_batch(self.name, starts, ends)
+
+    def __bytes__(self):
+        return self._genome.fetch_bytes(self.name, 0, len(self))
+
+    def __str__(self):
+        return self._genome.fetch(self.name, 0, len(self))
+
+
+class IndexedGenome:
+    """
+    Genoma de referencia servido por mmap a partir de un índice estilo .fai.
+
+    El índice (nombre, longitud, offset, bases por línea, bytes por línea)
+    se construye una sola vez recorriendo el FASTA y se guarda junto a él
+    como '<genoma>.fai' (formato compatible con samtools faidx). En
+    ejecuciones siguientes solo se lee el índice, por lo que el arranque
+    no depende del tamaño del genoma. Admite referencias con varios
+    contigs (cromosoma, plásmidos, varias cepas).
+
+    Atributos:
+        path (str): Ruta al archivo FASTA.
+        records (dict): {nombre: (longitud, offset, bases_por_linea, bytes_por_linea)}
+        names (list): Nombres de los registros en orden de aparición.
+    """
+
+    def __init__(self, fasta_path, index_path=None):
+        self.path = fasta_path
+        self.index_path = index_path or f"{fasta_path}.fai"
+        self.records = self._load_or_build_index()
+        self.names = list(self.records)
+        self._file = open(fasta_path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _load_or_build_index(self):
+        """Lee el índice si está al día respecto al FASTA; si no, lo reconstruye."""
+        if (os.path.exists(self.index_path)
+                and os.path.getmtime(self.index_path) >= os.path.getmtime(self.path)):
+            return read_fai(self.index_path)
+
+        records = build_fai(self.path)
+        try:
+            write_fai(records, self.index_path)
+        except OSError as e:
+            # Directorio de solo lectura: se usa el índice en memoria
+            print(f"Advertencia: No se pudo guardar el indice {self.index_path}: {str(e)}", file=sys.stderr)
+        return records
+
+    @property
+    def seq(self):
+        """Vista del primer registro, equivalente a SeqRecord.seq de load_genome."""
+        return self[self.names[0]]
+
+    def __getitem__(self, name):
+        if name not in self.records:
+            raise KeyError(f"Contig no encontrado en el genoma: {name}")
+        return ContigView(self, name)
+
+    def __len__(self):
+        return len(self.names)
+
+    def length(self, name):
+        """Longitud en pb del registro `name`."""
+        return self.records[name][0]
+
+    def fetch_bytes(self, name, start, end):
+        """
+        Devuelve los bytes de [start, end) (0-based) del contig `name`.
+
+        Convierte las posiciones de secuencia a offsets de archivo con el
+        índice y elimina los saltos de línea del bloque leído.
+        """
+        length, offset, line_bases, line_width = self.records[name]
+        start = max(0, start)
+        end = min(end, length)
+        if start >= end:
+            return b''
+        first = offset + (start // line_bases) * line_width + start % line_bases
+        last = offset + ((end - 1) // line_bases) * line_width + (end - 1) % line_bases + 1
+        chunk = self._mmap[first:last]
+        if line_width != line_bases:
+            chunk = chunk.replace(b'\n', b'').replace(b'\r', b'')
+        return chunk
+
+    def fetch(self, name, start, end):
+        """Igual que fetch_bytes, pero devuelve str."""
+        return self.fetch_bytes(name, start, end).decode('ascii')
+
+    def fetch_batch(self, name, starts, ends):
+        """Igual que fetch para varias regiones [start, end); devuelve la lista de str."""
+        return [self.fetch_bytes(name, start, end).decode('ascii') for start, end in zip(starts, ends)]
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+
+def build_fai(fasta_path):
+    """
+    Recorre el FASTA una vez y calcula el índice de cada registro.
+
+    Returns:
+        dict: {nombre: (longitud, offset, bases_por_linea, bytes_por_linea)}
+
+    Raises:
+        ValueError: Si un registro tiene líneas de longitud irregular
+                    (solo la última línea de cada registro puede ser más corta)
+                    o una línea vacía seguida de más secuencia.
+    """
+    records = {}
+    name = None
+    offset = length = line_bases = line_width = 0
+    short_line_seen = False
+    position = 0
+
+    with open(fasta_path, 'rb') as f:
+        for line in f:
+            line_len = len(line)
+            if line.startswith(b'>'):
+                if name is not None:
+                    records[name] = (length, offset, line_bases, line_width)
+                name = line[1:].split(None, 1)[0].decode() if line[1:].strip() else ''
+                if name in records:
+                    raise ValueError(f"Nombre de registro duplicado: {name}")
+                offset = position + line_len
+                length = line_bases = line_width = 0
+                short_line_seen = False
+            elif name is not None:
+                bases = len(line.rstrip(b'\r\n'))
+                if not bases:
+                    # Una línea vacía cuenta como línea corta: otra línea de secuencia
+                    # después de ella desplazaría los offsets del índice
+                    short_line_seen = True
+                else:
+                    if short_line_seen:
+                        raise ValueError(f"Longitud de linea irregular en el registro {name}")
+                    if line_bases == 0:
+                        line_bases, line_width = bases, line_len
+                    elif bases > line_bases:
+                        raise ValueError(f"Longitud de linea irregular en el registro {name}")
+                    elif bases < line_bases:
+                        short_line_seen = True
+                    length += bases
+            position += line_len
+
+    if name is not None:
+        records[name] = (length, offset, line_bases, line_width)
+    return records
+
+
+def write_fai(records, index_path):
+    """Guarda el índice en formato .fai (separado por tabuladores)."""
+    with open(index_path, 'w') as f:
+        for name, (length, offset, line_bases, line_width) in records.items():
+            f.write(f"{name}\t{length}\t{offset}\t{line_bases}\t{line_width}\n")
+
+
+def read_fai(index_path):
+    """Lee un índice .fai y devuelve {nombre: (longitud, offset, bases_por_linea, bytes_por_linea)}."""
+    records = {}
+    with open(index_path) as f:
+        for line in f:
+            name, length, offset, line_bases, line_width = line.rstrip('\n').split('\t')[:5]
+            records[name] = (int(length), int(offset), int(line_bases), int(line_width))
+    return records
+
+
+def load_indexed_genome(genome_file_path):
+    """
+    Abre el genoma como IndexedGenome (mmap + índice .fai).
+
+    A diferencia de load_genome no carga la secuencia en objetos de Python:
+    solo lee (o construye la primera vez) el índice y mapea el archivo.
+
+    Args:
+        genome_file_path (str): Ruta al archivo FASTA del genoma.
+
+    Returns:
+        IndexedGenome: genoma indexado; `.seq` es la vista del primer registro.
+
+    Sale con mensaje de error si el archivo no existe, está vacío o no
+    puede indexarse.
+    """
+    if not os.path.exists(genome_file_path):
+        print(f"ERROR: Archivo de genoma no encontrado: {genome_file_path}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        genome = IndexedGenome(genome_file_path)
+    except ValueError as e:  # Índice irregular o archivo vacío (mmap de longitud 0)
+        print(f"ERROR: Fallo al indexar el archivo de genoma: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+    if not genome.names or len(genome.seq) == 0:
+        print(f"ERROR: El archivo de genoma está vacío: {genome_file_path}", file=sys.stderr)
+        sys.exit(1)
+    return genome
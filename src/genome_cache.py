@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+# Cache binaria del genoma empaquetada a 2 bits por base
+# python src/genome_cache.py -g data/E_coli_K12_MG1655_U00096.3.fasta
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+
+import numpy as np
+
+from genome import ContigView, IndexedGenome
+from io_utils import atomic_write
+
+# Formato del archivo:
+#   MAGIC (8 bytes) | longitud del encabezado JSON (uint32 little-endian) | encabezado JSON | datos empaquetados
+# Cada registro guarda 4 bases por byte (A=0, C=1, G=2, T=3, la primera base en los bits altos),
+# una tabla de excepciones con las corridas de N/IUPAC y otra con las corridas en minúsculas.
+MAGIC = b'PA2BIT\x01\x00'
+CACHE_SUFFIX = '.pa2bit'
+
+# Tabla byte -> código de 2 bits (cualquier carácter que no sea ACGT se codifica como 0)
+_ENCODE = np.zeros(256, dtype=np.uint8)
+for _code, _base in enumerate(b'ACGT'):
+    _ENCODE[_base] = _code
+    _ENCODE[_base + 32] = _code  # minúsculas
+_DECODE = np.frombuffer(b'ACGT', dtype=np.uint8)
+_SHIFTS = np.array([6, 4, 2, 0], dtype=np.uint8)
+# Las 4 bases (ASCII) de cada byte empaquetado
+_UNPACK = _DECODE[(np.arange(256, dtype=np.uint8)[:, None] >> _SHIFTS) & 3]
+_IS_ACGT = np.zeros(256, dtype=bool)
+_IS_ACGT[list(b'ACGTacgt')] = True
+
+
+def default_cache_path(fasta_path):
+    """Ruta por defecto de la cache: junto al FASTA, con sufijo .pa2bit."""
+    return f"{fasta_path}{CACHE_SUFFIX}"
+
+
+def file_sha256(path, block_size=1 << 20):
+    """Calcula el SHA-256 de un archivo leyéndolo por bloques."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_fingerprint(path):
+    """Tamaño, mtime y SHA-256 de un archivo fuente, para guardar en el encabezado de una cache."""
+    stat = os.stat(path)
+    return {
+        'source_size': stat.st_size,
+        'source_mtime_ns': stat.st_mtime_ns,
+        'source_sha256': file_sha256(path),
+    }
+
+
+def matches_source(header, path, cache_path=None):
+    """
+    Indica si el encabezado de una cache corresponde al archivo fuente actual.
+
+    Si tamaño y mtime coinciden se considera al día sin releer el archivo;
+    si solo cambia el mtime se compara el SHA-256 del contenido. Si el
+    contenido coincide y se indica cache_path, se guarda el mtime nuevo en
+    el encabezado de la cache para no volver a calcular el hash la próxima vez.
+    """
+    stat = os.stat(path)
+    if header['source_size'] != stat.st_size:
+        return False
+    if header['source_mtime_ns'] == stat.st_mtime_ns:
+        return True
+    if header['source_sha256'] != file_sha256(path):
+        return False
+    if cache_path is not None:
+        update_source_mtime(cache_path, header, stat.st_mtime_ns)
+    return True
+
+
+def update_source_mtime(cache_path, header, mtime_ns):
+    """
+    Reescribe en el lugar el mtime del archivo fuente guardado en una cache.
+
+    Sirve para los formatos que comparten MAGIC (8 bytes) | longitud del
+    encabezado (uint32) | encabezado JSON (genoma, picos, índice de k-meros).
+    El encabezado nuevo se completa con espacios hasta la longitud original
+    para no mover los datos; si no cabe, o la cache no se puede escribir, se
+    deja como está.
+    """
+    new_header = json.dumps(dict(header, source_mtime_ns=mtime_ns)).encode('utf-8')
+    try:
+        with open(cache_path, 'r+b') as f:
+            f.seek(len(MAGIC))
+            (header_len,) = struct.unpack('<I', f.read(4))
+            if len(new_header) <= header_len:
+                f.write(new_header.ljust(header_len))
+    except OSError:
+        pass
+
+
+def _runs(mask):
+    """Devuelve (inicios, longitudes) de las corridas de valores True de un arreglo booleano."""
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return starts, ends - starts
+
+
+def _encode_record(seq_bytes):
+    """
+    Empaqueta la secuencia de un registro.
+
+    Returns:
+        tuple: (bytes empaquetados, excepciones [[inicio, longitud, caracter]], minúsculas [[inicio, longitud]])
+    """
+    seq = np.frombuffer(seq_bytes, dtype=np.uint8)
+
+    # Corridas de caracteres distintos de ACGT, separadas por carácter (N, R, Y, ...)
+    upper = np.where((seq >= 97) & (seq <= 122), seq - 32, seq).astype(np.uint8)
+    exceptions = []
+    other = ~_IS_ACGT[seq]
+    if other.any():
+        for char in np.unique(upper[other]).tolist():
+            starts, lengths = _runs(other & (upper == char))
+            exceptions.extend([s, n, chr(char)] for s, n in zip(starts.tolist(), lengths.tolist()))
+        exceptions.sort()
+
+    starts, lengths = _runs((seq >= 97) & (seq <= 122))
+    lower = [[s, n] for s, n in zip(starts.tolist(), lengths.tolist())]
+
+    codes = _ENCODE[seq]
+    padded = np.zeros(-(-len(codes) // 4) * 4, dtype=np.uint8)
+    padded[:len(codes)] = codes
+    quads = padded.reshape(-1, 4)
+    packed = (quads[:, 0] << 6) | (quads[:, 1] << 4) | (quads[:, 2] << 2) | quads[:, 3]
+    return packed.astype(np.uint8).tobytes(), exceptions, lower
+
+
+def build_genome_cache(fasta_path, cache_path=None):
+    """
+    Convierte el FASTA del genoma en la cache binaria empaquetada a 2 bits.
+
+    Incluye todos los registros del FASTA, las tablas de excepciones y el
+    tamaño, mtime y SHA-256 del archivo fuente para detectar si la cache
+    quedó obsoleta. Se escribe con io_utils.atomic_write (archivo temporal
+    único y renombrado al final), así que dos procesos pueden construirla a la vez.
+
+    Args:
+        fasta_path (str): Ruta al FASTA del genoma.
+        cache_path (str): Ruta de salida (por defecto '<fasta>.pa2bit').
+
+    Returns:
+        str: Ruta de la cache escrita.
+    """
+    cache_path = cache_path or default_cache_path(fasta_path)
+    fingerprint = source_fingerprint(fasta_path)
+    source = IndexedGenome(fasta_path)
+
+    records = []
+    payloads = []
+    data_offset = 0
+    try:
+        for name in source.names:
+            packed, exceptions, lower = _encode_record(source.fetch_bytes(name, 0, source.length(name)))
+            records.append({
+                'name': name,
+                'length': source.length(name),
+                'offset': data_offset,
+                'exceptions': exceptions,
+                'lower': lower,
+            })
+            payloads.append(packed)
+            data_offset += len(packed)
+    finally:
+        source.close()
+
+    header = json.dumps(dict(fingerprint, records=records)).encode()
+
+    atomic_write(cache_path, MAGIC + struct.pack('<I', len(header)) + header + b''.join(payloads))
+    return cache_path
+
+
+def read_cache_header(cache_path):
+    """Lee el encabezado JSON de la cache; devuelve (encabezado, offset de los datos)."""
+    with open(cache_path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"No es una cache de genoma valida: {cache_path}")
+        (header_len,) = struct.unpack('<I', f.read(4))
+        header = json.loads(f.read(header_len))
+    return header, len(MAGIC) + 4 + header_len
+
+
+def is_cache_fresh(cache_path, fasta_path):
+    """Indica si la cache existe y corresponde al FASTA actual (ver matches_source)."""
+    if not os.path.exists(cache_path):
+        return False
+    try:
+        header, _ = read_cache_header(cache_path)
+    except (OSError, ValueError):
+        return False
+    return matches_source(header, fasta_path, cache_path)
+
+
+class CachedGenome:
+    """
+    Genoma servido desde la cache empaquetada a 2 bits mediante mmap.
+
+    Ofrece la misma interfaz que IndexedGenome (names, seq, [nombre],
+    length, fetch, fetch_bytes, fetch_batch). Las rebanadas se decodifican de forma
+    vectorizada: se desempaquetan los bytes con desplazamientos de bits en
+    NumPy, se traducen con una tabla y se aplican las corridas de N/IUPAC
+    y minúsculas que se solapan con la rebanada.
+    """
+
+    # Bases decodificadas por bloque en fetch_batch
+    BATCH_BASES = 1 << 22
+
+    def __init__(self, cache_path):
+        self.path = cache_path
+        header, data_offset = read_cache_header(cache_path)
+        self.sha256 = header['source_sha256']
+        self._file = open(cache_path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._packed = np.frombuffer(self._mmap, dtype=np.uint8, offset=data_offset)
+
+        self.records = {}
+        for record in header['records']:
+            exceptions = record['exceptions']
+            lower = record['lower']
+            self.records[record['name']] = {
+                'length': record['length'],
+                'offset': record['offset'],
+                'exc_starts': np.array([e[0] for e in exceptions], dtype=np.int64),
+                'exc_ends': np.array([e[0] + e[1] for e in exceptions], dtype=np.int64),
+                'exc_chars': [ord(e[2]) for e in exceptions],
+                'low_starts': np.array([r[0] for r in lower], dtype=np.int64),
+                'low_ends': np.array([r[0] + r[1] for r in lower], dtype=np.int64),
+            }
+        self.names = list(self.records)
+
+    @property
+    def seq(self):
+        """Vista del primer registro."""
+        return self[self.names[0]]
+
+    def __getitem__(self, name):
+        if name not in self.records:
+            raise KeyError(f"Contig no encontrado en el genoma: {name}")
+        return ContigView(self, name)
+
+    def __len__(self):
+        return len(self.names)
+
+    def length(self, name):
+        """Longitud en pb del registro `name`."""
+        return self.records[name]['length']
+
+    def fetch_bytes(self, name, start, end):
+        """Decodifica [start, end) (0-based) del registro `name` como bytes."""
+        record = self.records[name]
+        start = max(0, start)
+        end = min(end, record['length'])
+        if start >= end:
+            return b''
+
+        first = record['offset'] + start // 4
+        last = record['offset'] + (end + 3) // 4
+        codes = (self._packed[first:last, None] >> _SHIFTS) & 3
+        skip = start % 4
+        seq = _DECODE[codes.ravel()[skip:skip + end - start]]
+
+        # Corridas N/IUPAC que se solapan con [start, end)
+        lo = np.searchsorted(record['exc_ends'], start, side='right')
+        hi = np.searchsorted(record['exc_starts'], end, side='left')
+        for i in range(lo, hi):
+            a = max(record['exc_starts'][i], start) - start
+            b = min(record['exc_ends'][i], end) - start
+            seq[a:b] = record['exc_chars'][i]
+
+        # Corridas en minúsculas
+        lo = np.searchsorted(record['low_ends'], start, side='right')
+        hi = np.searchsorted(record['low_starts'], end, side='left')
+        for i in range(lo, hi):
+            a = max(record['low_starts'][i], start) - start
+            b = min(record['low_ends'][i], end) - start
+            seq[a:b] += 32
+
+        return seq.tobytes()
+
+    def fetch_batch(self, name, starts, ends):
+        """
+        Decodifica en bloque varias rebanadas [start, end) (0-based) del registro `name`.
+
+        Se reúnen los bytes empaquetados que cubren todas las rebanadas y se
+        desempaquetan juntos con la tabla _UNPACK (4 bases por byte); luego
+        se aplican solo las corridas de N/IUPAC y minúsculas que se solapan
+        con alguna rebanada. Se procesan bloques de hasta BATCH_BASES bases
+        para acotar la memoria de los arreglos temporales.
+
+        Returns:
+            list: Secuencias (str), en el orden de las regiones.
+        """
+        record = self.records[name]
+        starts = np.clip(np.asarray(starts, dtype=np.int64), 0, record['length'])
+        ends = np.maximum(np.clip(np.asarray(ends, dtype=np.int64), 0, record['length']), starts)
+        bounds = np.concatenate(([0], np.cumsum(ends - starts)))
+
+        sequences = []
+        lo = 0
+        while lo < len(starts):
+            hi = int(np.searchsorted(bounds, bounds[lo] + self.BATCH_BASES, side='right')) - 1
+            hi = min(max(hi, lo + 1), len(starts))
+            block_starts, block_ends = starts[lo:hi], ends[lo:hi]
+
+            # Bytes empaquetados de cada rebanada, uno tras otro
+            first = block_starts // 4
+            n_bytes = (block_ends + 3) // 4 - first
+            byte_bounds = np.concatenate(([0], np.cumsum(n_bytes)))
+            index = np.arange(byte_bounds[-1], dtype=np.int64) + np.repeat(record['offset'] + first - byte_bounds[:-1], n_bytes)
+            letters = _UNPACK[self._packed[index]].ravel()
+
+            cuts = byte_bounds[:-1] * 4 + block_starts % 4
+            self._apply_runs(record, letters, block_starts, block_ends, cuts)
+            text = letters.tobytes().decode('ascii')
+            sequences.extend(
+                text[cut:cut + length] for cut, length in zip(cuts.tolist(), (block_ends - block_starts).tolist())
+            )
+            lo = hi
+        return sequences
+
+    @staticmethod
+    def _apply_runs(record, letters, starts, ends, cuts):
+        """Aplica sobre `letters` las corridas N/IUPAC y minúsculas que se solapan con cada rebanada."""
+        for run_starts, run_ends, chars in ((record['exc_starts'], record['exc_ends'], record['exc_chars']),
+                                            (record['low_starts'], record['low_ends'], None)):
+            if not len(run_starts):
+                continue
+            first_run = np.searchsorted(run_ends, starts, side='right')
+            last_run = np.searchsorted(run_starts, ends, side='left')
+            for i in np.flatnonzero(last_run > first_run).tolist():
+                start, end, cut = int(starts[i]), int(ends[i]), int(cuts[i])
+                for run in range(first_run[i], last_run[i]):
+                    a = max(int(run_starts[run]), start) - start + cut
+                    b = min(int(run_ends[run]), end) - start + cut
+                    if chars is None:
+                        letters[a:b] += 32
+                    else:
+                        letters[a:b] = chars[run]
+
+    def fetch(self, name, start, end):
+        """Igual que fetch_bytes, pero devuelve str."""
+        return self.fetch_bytes(name, start, end).decode('ascii')
+
+    def close(self):
+        self._packed = None
+        self._mmap.close()
+        self._file.close()
+
+
+def load_genome_cache(cache_path):
+    """
+    Abre la cache binaria del genoma.
+
+    Sale con mensaje de error si la cache no existe o está dañada.
+    """
+    try:
+        return CachedGenome(cache_path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"ERROR: No se pudo leer la cache del genoma {cache_path}: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+
+def parse_args():
+    """
+    Argumentos del comando de cache:
+    - --genome (-g): Archivo FASTA del genoma de referencia
+    - --cache (-c): Ruta de la cache (por defecto '<genoma>.pa2bit')
+    """
+    parser = argparse.ArgumentParser(
+        description='Genera la cache binaria (2 bits por base) del genoma de referencia',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        '-g', '--genome', required=True,
+        help='Archivo FASTA con la secuencia del genoma de referencia'
+    )
+    parser.add_argument(
+        '-c', '--cache', default=None,
+        help='Ruta del archivo de cache (por defecto junto al FASTA con sufijo .pa2bit)'
+    )
+    return parser.parse_args()
+
+
+def main():
+    """Construye la cache del genoma indicado y reporta su tamaño."""
+    args = parse_args()
+    genome_file = os.path.abspath(args.genome)
+    if not os.path.exists(genome_file):
+        print(f"ERROR: Archivo del genoma no encontrado: {genome_file}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        cache_path = build_genome_cache(genome_file, args.cache and os.path.abspath(args.cache))
+    except (OSError, ValueError) as e:
+        print(f"ERROR: No se pudo generar la cache del genoma: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+    fasta_size = os.path.getsize(genome_file)
+    cache_size = os.path.getsize(cache_path)
+    print(f"Cache generada: {cache_path}")
+    print(f"Tamaño: {cache_size} bytes ({fasta_size / cache_size:.1f}x menor que el FASTA)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+import numpy as np
+
+from peaks import peak_batch
+
+
+class IntervalIndex:
+    """
+    Índice de intervalos sobre los picos de todos los TFs.
+
+    Los picos se guardan en arreglos ordenados por coordenada inicial junto
+    con el máximo acumulado de las coordenadas finales. Para una consulta
+    [start, end] basta con dos búsquedas binarias: los candidatos empiezan
+    en el primer pico cuyo máximo final acumulado alcanza `start` y terminan
+    en el último pico que empieza antes de `end`; luego se filtran en bloque
+    los que realmente se solapan.
+
+    Todas las coordenadas son 1-based e inclusivas, como en el archivo de picos.
+
+    Atributos:
+        tf_names (list): Nombres de TF (índice = código).
+        starts, ends (np.ndarray): Coordenadas de los picos, ordenadas por inicio.
+        tf_codes (np.ndarray): Código de TF de cada pico.
+        peak_ids (list): ID de cada pico, en el mismo orden.
+    """
+
+    def __init__(self, peaks_dict):
+        """
+        Args:
+            peaks_dict (dict | PeakTable): Salida de parse_peaks o parse_peaks_table.
+        """
+        tf_names, offsets, starts, ends, peak_ids = peak_batch(peaks_dict)
+        tf_codes = np.repeat(np.arange(len(tf_names), dtype=np.int32), np.diff(offsets))
+
+        order = np.argsort(starts, kind='stable')
+        self.tf_names = tf_names
+        self.starts = starts[order]
+        self.ends = ends[order]
+        self.tf_codes = tf_codes[order]
+        self.peak_ids = [peak_ids[i] for i in order.tolist()]
+        self._max_end = np.maximum.accumulate(self.ends) if len(self.ends) else self.ends
+
+    def __len__(self):
+        return len(self.starts)
+
+    def query(self, start, end):
+        """
+        Devuelve las posiciones (en el índice) de los picos que se solapan con [start, end].
+
+        Returns:
+            np.ndarray: Índices de los picos, ordenados por coordenada inicial.
+        """
+        lo = np.searchsorted(self._max_end, start, side='left')
+        hi = np.searchsorted(self.starts, end, side='right')
+        if lo >= hi:
+            return np.empty(0, dtype=np.int64)
+        return lo + np.flatnonzero(self.ends[lo:hi] >= start)
+
+    def query_peaks(self, start, end):
+        """Devuelve los picos solapados como tuplas (tf_name, start, end, peak_id)."""
+        return [
+            (self.tf_names[self.tf_codes[i]], int(self.starts[i]), int(self.ends[i]), self.peak_ids[i])
+            for i in self.query(start, end).tolist()
+        ]
+
+    def tfs_of(self, rows):
+        """Nombres (en orden alfabético y sin repetir) de los TFs de las posiciones `rows`."""
+        codes = np.unique(self.tf_codes[rows])
+        return sorted(self.tf_names[code] for code in codes.tolist())
+
+    def query_tfs(self, start, end):
+        """Devuelve los nombres de los TFs con algún pico en [start, end], en orden alfabético."""
+        return self.tfs_of(self.query(start, end))
+
+
+def merge_intervals(starts, ends, gap=0):
+    """
+    Fusiona intervalos que se solapan o están separados por a lo sumo `gap` pb.
+
+    Con gap=0 se fusionan los solapados y los contiguos (fin + 1 == inicio).
+
+    Args:
+        starts, ends (np.ndarray): Coordenadas 1-based inclusivas.
+        gap (int): Distancia máxima entre intervalos para fusionarlos.
+
+    Returns:
+        tuple: (order, group, merged_starts, merged_ends). `order` ordena los
+               intervalos de entrada por inicio y group[k] es el intervalo
+               fusionado al que pertenece el k-ésimo intervalo de ese orden.
+    """
+    order = np.argsort(starts, kind='stable')
+    starts = starts[order]
+    ends = ends[order]
+    if len(starts) == 0:
+        return order, np.empty(0, dtype=np.int64), starts, ends
+
+    # Un nuevo grupo empieza cuando el pico queda más allá del máximo final acumulado + gap
+    reach = np.maximum.accumulate(ends)
+    new_group = np.concatenate(([True], starts[1:] > reach[:-1] + gap + 1))
+    group = np.cumsum(new_group) - 1
+    first = np.flatnonzero(new_group)
+    return order, group, starts[first], np.maximum.reduceat(ends, first)
+
+
+def merge_peaks(peaks, gap=0):
+    """
+    Fusiona los picos solapados o cercanos de un TF.
+
+    Args:
+        peaks (list): Tuplas (start, end, peak_id).
+        gap (int): Distancia máxima en pb entre picos para fusionarlos.
+
+    Returns:
+        list: Tuplas (start, end, peak_id) ordenadas por inicio; el ID de un
+              pico fusionado une los IDs originales con ';'.
+    """
+    starts = np.fromiter((peak[0] for peak in peaks), dtype=np.int64, count=len(peaks))
+    ends = np.fromiter((peak[1] for peak in peaks), dtype=np.int64, count=len(peaks))
+    order, group, merged_starts, merged_ends = merge_intervals(starts, ends, gap)
+
+    ids = [[] for _ in range(len(merged_starts))]
+    for index, group_index in zip(order.tolist(), group.tolist()):
+        ids[group_index].append(peaks[index][2])
+    return [
+        (start, end, ';'.join(group_ids))
+        for start, end, group_ids in zip(merged_starts.tolist(), merged_ends.tolist(), ids)
+    ]
+
+
+def merge_peaks_dict(peaks_dict, gap=0):
+    """
+    Aplica merge_peaks a cada TF.
+
+    Args:
+        peaks_dict (dict | PeakTable): Salida de parse_peaks o parse_peaks_table.
+        gap (int): Distancia máxima en pb entre picos para fusionarlos.
+
+    Returns:
+        dict: {tf_name: [(start, end, peak_id), ...]} con los picos fusionados.
+    """
+    return {tf_name: merge_peaks(peaks, gap) for tf_name, peaks in peaks_dict.items()}
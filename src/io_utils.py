@@ -1,6 +1,117 @@
+import gzip
+import hashlib
 import os
+import struct
+import sys
+import zlib
+from collections import OrderedDict
 
-def write_tf_fastas(tf_name, sequences, output_dir):
+# Extensión de los FASTA de salida según la compresión
+EXTENSIONS = {None: '.fa', 'gzip': '.fa.gz', 'bgzip': '.fa.gz'}
+
+# Tamaño máximo de datos sin comprimir por bloque BGZF (igual que htslib)
+BGZF_BLOCK_SIZE = 0xff00
+# Bloque vacío que marca el final de un archivo BGZF
+BGZF_EOF = bytes.fromhex('1f8b08040000000000ff0600424302001b0003000000000000000000')
+
+
+def safe_filename(tf_name):
+    """Crea un nombre de archivo seguro a partir de tf_name, removiendo caracteres no permitidos."""
+    return "".join(c for c in tf_name if c.isalnum() or c in ('_', '-')).rstrip()
+
+
+def fasta_path(tf_name, output_dir, compression=None):
+    """Ruta del FASTA de salida de un TF: '{output_dir}/{TF}.fa' o '.fa.gz' si se comprime."""
+    return os.path.join(output_dir, f"{safe_filename(tf_name)}{EXTENSIONS[compression]}")
+
+
+def format_fasta(sequences, line_width=None, strands=None):
+    """
+    Arma en un solo bloque el texto FASTA de una lista de secuencias.
+
+    Args:
+        sequences (lista de tuplas): (peak_id, start, end, seq) por registro.
+        line_width (int): Si se indica, corta cada secuencia en líneas de ese ancho.
+        strands (list): Hebra ('+' o '-') de cada registro; si se indica, se
+                        agrega al encabezado como '>peak_id|start-end(-)'.
+
+    Returns:
+        str: Registros con encabezado '>peak_id|start-end'.
+    """
+    if strands is not None:
+        sequences = [
+            (peak_id, start, f"{end}({strand})", seq) for (peak_id, start, end, seq), strand in zip(sequences, strands)
+        ]
+    if not line_width:
+        return "".join(f">{peak_id}|{start}-{end}\n{seq}\n" for peak_id, start, end, seq in sequences)
+    return "".join(
+        f">{peak_id}|{start}-{end}\n"
+        + "".join(f"{seq[i:i + line_width]}\n" for i in range(0, len(seq), line_width))
+        for peak_id, start, end, seq in sequences
+    )
+
+
+def bgzf_compress(data, level=6):
+    """
+    Comprime en formato BGZF (gzip por bloques, compatible con bgzip/samtools).
+
+    Cada bloque es un miembro gzip independiente de hasta 64 KB sin comprimir
+    con el campo extra 'BC' que indica su tamaño, seguido del bloque EOF.
+    """
+    blocks = []
+    for i in range(0, len(data), BGZF_BLOCK_SIZE):
+        chunk = data[i:i + BGZF_BLOCK_SIZE]
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        cdata = compressor.compress(chunk) + compressor.flush()
+        block_size = len(cdata) + 26  # encabezado (18) + CRC32 e ISIZE (8)
+        blocks.append(
+            b'\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff\x06\x00BC\x02\x00'
+            + struct.pack('<H', block_size - 1)
+            + cdata
+            + struct.pack('<II', zlib.crc32(chunk), len(chunk))
+        )
+    blocks.append(BGZF_EOF)
+    return b''.join(blocks)
+
+
+def encode_payload(text, compression=None, level=6):
+    """Convierte el texto FASTA en los bytes a escribir, comprimidos si se pide."""
+    data = text.encode('utf-8')
+    if compression == 'gzip':
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if compression == 'bgzip':
+        return bgzf_compress(data, level)
+    return data
+
+
+def atomic_write(output_path, payload):
+    """
+    Escribe los bytes en un archivo temporal del mismo directorio y lo renombra.
+
+    El renombrado (os.replace) es atómico, así que ningún lector ve archivos a
+    medio escribir y un fallo deja intacta la versión anterior.
+    """
+    directory, name = os.path.split(output_path)
+    while True:
+        tmp_path = os.path.join(directory, f".{name}.{os.urandom(4).hex()}.tmp")
+        try:
+            # Modo 0o666: la umask del proceso fija los permisos finales, igual que con open()
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+            break
+        except FileExistsError:
+            continue
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(payload)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_tf_fastas(tf_name, sequences, output_dir, line_width=None, compression=None, level=6, strands=None,
+                    checksums=None):
     """
     Guarda las secuencias extraídas en un archivo FASTA, agrupadas por factor de transcripción (TF).
 
@@ -13,23 +124,122 @@ def write_tf_fastas(tf_name, sequences, output_dir):
                                    - end (int): Posición final (1-based, inclusiva) del pico.
                                    - seq (str): Secuencia de nucleótidos correspondiente al pico.
         output_dir (str): Ruta al directorio donde se guardará el archivo FASTA.
+        line_width (int): Ancho de línea de las secuencias (None o 0 = una sola línea).
+        compression (str): None, 'gzip' o 'bgzip' (gzip por bloques).
+        level (int): Nivel de compresión (1-9).
+        strands (list): Hebra de cada secuencia, para el encabezado (ver format_fasta).
+        checksums (dict): Si se indica, guarda en checksums[tf_name] el SHA-256 de
+                          los bytes escritos, calculado en memoria (sin releer el archivo).
 
     Comportamiento:
         - Crea un nombre de archivo seguro a partir de tf_name, removiendo caracteres no permitidos.
         - Escribe un archivo FASTA con encabezados formateados como '>peak_id|start-end'.
+        - Arma todo el contenido del TF en un solo bloque y lo escribe con una sola
+          llamada sobre un archivo temporal que luego se renombra de forma atómica.
         - Captura y reporta errores de escritura en la salida de error estándar.
 
+    Returns:
+        str: Ruta del archivo escrito, o None si hubo un error.
+
     Excepciones:
         - No lanza excepciones, pero imprime errores de IO si no puede escribir el archivo.
     """
-    # Crear nombre seguro para el archivo
-    safe_name = "".join(c for c in tf_name if c.isalnum() or c in ('_', '-')).rstrip()
-    output_path = os.path.join(output_dir, f"{safe_name}.fa")
-    
+    output_path = fasta_path(tf_name, output_dir, compression)
+
     try:
-        with open(output_path, 'w') as out_file:
-            for peak_id, start, end, seq in sequences:
-                out_file.write(f">{peak_id}|{start}-{end}\n{seq}\n")
+        payload = encode_payload(format_fasta(sequences, line_width, strands), compression, level)
+        atomic_write(output_path, payload)
+        if checksums is not None:
+            checksums[tf_name] = hashlib.sha256(payload).hexdigest()
+        return output_path
     except IOError as e:
-        import sys
         print(f"ERROR: No se pudo escribir en {output_path}: {str(e)}", file=sys.stderr)
+        return None
+
+
+class FastaHandlePool:
+    """
+    Escritores FASTA por TF para el modo streaming, con un máximo de archivos abiertos.
+
+    Cada TF se escribe por partes (append) en un temporal del directorio de
+    salida. Solo se mantienen abiertos `max_open` archivos a la vez: al
+    necesitar uno nuevo se cierra el usado hace más tiempo (LRU) y se
+    reabre en modo append cuando vuelve a llegar un bloque de ese TF. Al
+    terminar, finalize() cierra todo y renombra cada temporal a su ruta
+    final de forma atómica.
+
+    Con gzip cada bloque se agrega como un miembro gzip independiente y con
+    bgzip como bloques BGZF; ambos formatos admiten esta concatenación.
+    """
+
+    def __init__(self, output_dir, max_open=256, line_width=None, compression=None, level=6):
+        self.output_dir = output_dir
+        self.max_open = max_open
+        self.line_width = line_width
+        self.compression = compression
+        self.level = level
+        self._handles = OrderedDict()  # tf_name -> archivo abierto, del menos al más reciente
+        self._paths = {}               # tf_name -> (ruta temporal, ruta final)
+
+    def _handle(self, tf_name):
+        """Devuelve el archivo abierto del TF, abriéndolo (y cerrando el más antiguo) si hace falta."""
+        handle = self._handles.get(tf_name)
+        if handle is not None:
+            self._handles.move_to_end(tf_name)
+            return handle
+
+        if len(self._handles) >= self.max_open:
+            _, oldest = self._handles.popitem(last=False)
+            oldest.close()
+
+        if tf_name in self._paths:
+            mode = 'ab'
+        else:
+            final_path = fasta_path(tf_name, self.output_dir, self.compression)
+            directory, name = os.path.split(final_path)
+            self._paths[tf_name] = (os.path.join(directory, f".{name}.stream.tmp"), final_path)
+            mode = 'wb'
+        handle = open(self._paths[tf_name][0], mode)
+        self._handles[tf_name] = handle
+        return handle
+
+    def append(self, tf_name, sequences):
+        """Agrega al FASTA del TF una lista de tuplas (peak_id, start, end, seq)."""
+        text = format_fasta(sequences, self.line_width)
+        data = text.encode('utf-8')
+        if self.compression == 'gzip':
+            data = gzip.compress(data, compresslevel=self.level, mtime=0)
+        elif self.compression == 'bgzip':
+            data = bgzf_compress(data, self.level)[:-len(BGZF_EOF)]
+        self._handle(tf_name).write(data)
+
+    def finalize(self):
+        """
+        Cierra todos los archivos y los mueve a su ruta final.
+
+        Returns:
+            dict: {tf_name: ruta final} de los TFs escritos.
+        """
+        for handle in self._handles.values():
+            handle.close()
+        self._handles.clear()
+
+        written = {}
+        for tf_name, (tmp_path, final_path) in self._paths.items():
+            if self.compression == 'bgzip':
+                with open(tmp_path, 'ab') as handle:
+                    handle.write(BGZF_EOF)
+            os.replace(tmp_path, final_path)
+            written[tf_name] = final_path
+        self._paths.clear()
+        return written
+
+    def abort(self):
+        """Cierra los archivos y elimina los temporales sin tocar las salidas anteriores."""
+        for handle in self._handles.values():
+            handle.close()
+        self._handles.clear()
+        for tmp_path, _ in self._paths.values():
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._paths.clear()
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+# Índice de k-meros del genoma para buscar ocurrencias de motivos (exactos o con códigos IUPAC)
+# python src/kmer_index.py -g data/E_coli_K12_MG1655_U00096.3.fasta -m TGTGANNNNNNTCACA
+# Solo las ocurrencias dentro de los picos de un TF:
+# python src/kmer_index.py -g data/E_coli_K12_MG1655_U00096.3.fasta -m TGTGANNNNNNTCACA -p data/union_peaks_file.tsv --tf CRP
+
+import argparse
+import contextlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+from genome import reverse_complement
+from genome_cache import matches_source, source_fingerprint
+from intervals import IntervalIndex, merge_intervals
+from io_utils import atomic_write
+from seq_stats import BASE_CODES, encode_words
+
+# Formato del archivo ('<genoma>.kmeridx'):
+#   MAGIC (8 bytes) | longitud del encabezado JSON (uint32 little-endian) | encabezado JSON | relleno | arreglos
+# El encabezado guarda la huella del FASTA, el contig, k y la posición de cada arreglo:
+#   genome: bytes de la secuencia; offsets: inicio en positions de cada una de las 4**k palabras;
+#   positions: posiciones (0-based) de cada palabra, agrupadas por palabra y en orden creciente.
+MAGIC = b'PAKIDX\x01\x00'
+INDEX_SUFFIX = '.kmeridx'
+DEFAULT_K = 8
+
+# Bases que acepta cada código IUPAC, como máscara de bits (A=1, C=2, G=4, T=8)
+IUPAC = {
+    'A': 'A', 'C': 'C', 'G': 'G', 'T': 'T', 'U': 'T',
+    'R': 'AG', 'Y': 'CT', 'S': 'CG', 'W': 'AT', 'K': 'GT', 'M': 'AC',
+    'B': 'CGT', 'D': 'AGT', 'H': 'ACT', 'V': 'ACG', 'N': 'ACGT',
+}
+IUPAC_MASKS = {code: sum(1 << 'ACGT'.index(base) for base in bases) for code, bases in IUPAC.items()}
+
+# Bit de cada byte del genoma (0 para N y demás símbolos: no coinciden con ninguna posición del motivo)
+BASE_BITS = np.where(BASE_CODES < 4, np.left_shift(1, BASE_CODES & 3), 0).astype(np.uint8)
+
+# Máximo de palabras a consultar en el índice para un motivo; con más se recorre el genoma completo
+MAX_ANCHOR_WORDS = 4096
+
+
+def default_index_path(fasta_path):
+    """Ruta por defecto del índice: junto al FASTA, con sufijo .kmeridx."""
+    return f"{fasta_path}{INDEX_SUFFIX}"
+
+
+def motif_masks(motif):
+    """
+    Convierte un motivo IUPAC en la lista de máscaras de bases aceptadas por posición.
+
+    Raises:
+        ValueError: Si el motivo está vacío o tiene símbolos que no son IUPAC.
+    """
+    if not motif:
+        raise ValueError("Motivo vacio")
+    try:
+        return [IUPAC_MASKS[symbol] for symbol in motif.upper()]
+    except KeyError as e:
+        raise ValueError(f"Simbolo IUPAC invalido en el motivo {motif}: {e.args[0]}") from None
+
+
+class KmerIndex:
+    """
+    Índice de todas las palabras de longitud k del genoma (ambas hebras se resuelven al consultar).
+
+    Las posiciones de cada palabra se guardan contiguas en `positions`, en el
+    rango offsets[w]:offsets[w + 1] (w = código en base 4 de la palabra), como
+    en un ordenamiento por conteo. Para buscar un motivo se elige la ventana de
+    k posiciones del motivo con menos combinaciones de bases (el ancla), se
+    reúnen las posiciones de esas palabras y se verifica en bloque el resto
+    del motivo contra el genoma. Los motivos más cortos que k o demasiado
+    degenerados se buscan recorriendo el genoma con operaciones vectorizadas.
+
+    Atributos:
+        k (int): Longitud de las palabras indexadas.
+        genome (np.ndarray): Bytes de la secuencia (uint8).
+        offsets (np.ndarray): 4**k + 1 inicios en `positions`.
+        positions (np.ndarray): Posiciones 0-based de las palabras sin N.
+    """
+
+    def __init__(self, k, genome, offsets, positions):
+        self.k = k
+        self.genome = genome
+        self.offsets = offsets
+        self.positions = positions
+        self._bits = None
+
+    @classmethod
+    def build(cls, genome_bytes, k=DEFAULT_K):
+        """Construye el índice sobre los bytes del genoma."""
+        genome = np.frombuffer(genome_bytes, dtype=np.uint8)
+        words, valid = encode_words(BASE_CODES[genome], k)
+        positions = np.flatnonzero(valid)
+        words = words[positions]
+        order = np.argsort(words, kind='stable')
+        dtype = np.int32 if len(genome) < 2 ** 31 else np.int64
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(words, minlength=4 ** k))))
+        return cls(k, genome, offsets, positions[order].astype(dtype))
+
+    def __len__(self):
+        return len(self.genome)
+
+    @property
+    def bits(self):
+        """Bit de base (ver BASE_BITS) de cada posición del genoma; se calcula la primera vez."""
+        if self._bits is None:
+            self._bits = BASE_BITS[self.genome]
+        return self._bits
+
+    def _scan(self, masks):
+        """Posiciones de inicio del motivo recorriendo todo el genoma."""
+        n_windows = len(self.genome) - len(masks) + 1
+        if n_windows <= 0:
+            return np.empty(0, dtype=np.int64)
+        match = np.ones(n_windows, dtype=bool)
+        for offset, mask in enumerate(masks):
+            match &= (self.bits[offset:offset + n_windows] & mask) != 0
+        return np.flatnonzero(match)
+
+    def find(self, motif):
+        """
+        Posiciones 0-based donde empieza el motivo en la hebra directa.
+
+        Args:
+            motif (str): Motivo con códigos IUPAC.
+
+        Returns:
+            np.ndarray: Posiciones en orden creciente.
+        """
+        masks = motif_masks(motif)
+        if len(masks) < self.k:
+            return self._scan(masks)
+
+        # Ancla: la ventana de k posiciones con menos palabras posibles
+        n_words = [
+            int(np.prod([bin(mask).count('1') for mask in masks[i:i + self.k]]))
+            for i in range(len(masks) - self.k + 1)
+        ]
+        anchor = int(np.argmin(n_words))
+        if n_words[anchor] > MAX_ANCHOR_WORDS:
+            return self._scan(masks)
+
+        # Códigos de todas las palabras del ancla y rangos de positions que les corresponden
+        words = np.zeros(1, dtype=np.int64)
+        for mask in masks[anchor:anchor + self.k]:
+            codes = np.array([code for code in range(4) if mask >> code & 1], dtype=np.int64)
+            words = (words[:, None] * 4 + codes[None, :]).ravel()
+        lo = self.offsets[words]
+        counts = self.offsets[words + 1] - lo
+        gather = np.repeat(lo - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        candidates = self.positions[gather].astype(np.int64) - anchor
+        candidates = candidates[(candidates >= 0) & (candidates + len(masks) <= len(self.genome))]
+        for offset, mask in enumerate(masks):
+            if anchor <= offset < anchor + self.k:
+                continue  # Ya coincide por construcción
+            candidates = candidates[(BASE_BITS[self.genome[candidates + offset]] & mask) != 0]
+        candidates.sort()
+        return candidates
+
+    def search(self, motif, both_strands=True):
+        """
+        Ocurrencias del motivo en una o ambas hebras.
+
+        En la hebra reversa se busca el complemento inverso del motivo; la
+        posición reportada es siempre la de la hebra directa.
+
+        Returns:
+            tuple: (starts, ends, strands): coordenadas 1-based inclusivas y
+                   '+'/'-' de cada ocurrencia, ordenadas por posición.
+        """
+        motif = motif.upper().replace('U', 'T')
+        hits = [(self.find(motif), '+')]
+        if both_strands:
+            hits.append((self.find(reverse_complement(motif)), '-'))
+        starts = np.concatenate([positions for positions, _ in hits]) + 1
+        strands = np.array([strand for positions, strand in hits for _ in range(len(positions))], dtype='<U1')
+        order = np.argsort(starts, kind='stable')
+        return starts[order], starts[order] + len(motif) - 1, strands[order]
+
+    def sequence(self, start, end, strand='+'):
+        """Secuencia de [start, end] (1-based, inclusivas), complementada e invertida si strand es '-'."""
+        seq = self.genome[start - 1:end].tobytes().decode('ascii')
+        return reverse_complement(seq) if strand == '-' else seq
+
+    def save(self, index_path, fasta_path, contig=None):
+        """Guarda el índice con la huella del FASTA de origen (ver read_index)."""
+        arrays = {'genome': self.genome, 'offsets': self.offsets, 'positions': self.positions}
+        layout = {}
+        payloads = []
+        offset = 0
+        for name, array in arrays.items():
+            data = np.ascontiguousarray(array).tobytes()
+            layout[name] = [offset, array.dtype.str, len(array)]
+            payloads.append(data + b'\0' * (-len(data) % 8))
+            offset += len(data) + (-len(data) % 8)
+
+        header = json.dumps(dict(source_fingerprint(fasta_path), k=self.k, contig=contig, arrays=layout)).encode('utf-8')
+        prefix = MAGIC + struct.pack('<I', len(header)) + header
+        prefix += b'\0' * (-len(prefix) % 8)
+        atomic_write(index_path, prefix + b''.join(payloads))
+        return index_path
+
+
+def read_index(index_path):
+    """
+    Abre un índice guardado con KmerIndex.save; los arreglos se leen con mmap sin copiarlos.
+
+    Returns:
+        tuple: (encabezado, KmerIndex).
+    """
+    with open(index_path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"No es un indice de k-meros valido: {index_path}")
+        (header_len,) = struct.unpack('<I', f.read(4))
+        header = json.loads(f.read(header_len))
+        data_offset = len(MAGIC) + 4 + header_len
+        data_offset += -data_offset % 8
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    arrays = {
+        name: np.frombuffer(buffer, dtype=dtype, count=count, offset=data_offset + offset)
+        for name, (offset, dtype, count) in header['arrays'].items()
+    }
+    return header, KmerIndex(header['k'], arrays['genome'], arrays['offsets'], arrays['positions'])
+
+
+def is_index_fresh(header, fasta_path, k, contig=None, index_path=None):
+    """
+    Indica si el índice corresponde al FASTA actual, con el mismo k y contig.
+
+    Con index_path se actualiza el mtime guardado si solo cambió ese dato (ver matches_source).
+    """
+    return (header['k'] == k and header['contig'] == contig
+            and matches_source(header, fasta_path, index_path))
+
+
+def hits_in_peaks(starts, ends, peak_index):
+    """
+    Relaciona ocurrencias con los picos que las contienen por completo.
+
+    Primero se descartan en bloque las ocurrencias fuera de la unión de los
+    picos (búsqueda binaria sobre los intervalos fusionados) y solo las que
+    quedan se consultan una a una en el IntervalIndex.
+
+    Args:
+        starts, ends (np.ndarray): Coordenadas 1-based inclusivas de las ocurrencias.
+        peak_index (IntervalIndex): Índice de los picos.
+
+    Returns:
+        list: Tuplas (i, tf_name, peak_start, peak_end, peak_id), con i la
+              posición de la ocurrencia en starts/ends.
+    """
+    if not len(peak_index):
+        return []
+    _, _, merged_starts, merged_ends = merge_intervals(peak_index.starts, peak_index.ends, gap=-1)
+    group = np.searchsorted(merged_starts, starts, side='right') - 1
+    inside = (group >= 0) & (ends <= merged_ends[np.maximum(group, 0)])
+
+    pairs = []
+    for i in np.flatnonzero(inside).tolist():
+        start, end = int(starts[i]), int(ends[i])
+        for tf_name, peak_start, peak_end, peak_id in peak_index.query_peaks(start, end):
+            if peak_start <= start and end <= peak_end:
+                pairs.append((i, tf_name, peak_start, peak_end, peak_id))
+    return pairs
+
+
+def read_motifs(args):
+    """Motivos de -m y de --motif-file (una por línea: motivo, o nombre y motivo separados por tabulador)."""
+    motifs = [(motif, motif) for motif in args.motif or []]
+    if args.motif_file:
+        with open(args.motif_file) as f:
+            for line in f:
+                fields = line.split()
+                if not fields or fields[0].startswith('#'):
+                    continue
+                motifs.append((fields[0], fields[-1]))
+    return motifs
+
+
+def parse_args():
+    """
+    Argumentos de la búsqueda de motivos:
+    - --genome (-g): Archivo FASTA con el genoma de referencia
+    - --motif (-m), --motif-file: Motivos (IUPAC) a buscar
+    - --peaks (-p), --tf: Limitar las ocurrencias a los picos (de ciertos TFs)
+    - --output (-o): Archivo de salida (por defecto, salida estándar)
+    - -k, --index, --rebuild: Longitud de palabra y ruta del índice / reconstruirlo
+    - --forward-only: Solo la hebra directa
+    - --genome-backend, --contig, --no-cache: Carga del genoma, como en main.py
+    """
+    parser = argparse.ArgumentParser(
+        description='Busca ocurrencias de motivos en el genoma con un índice de k-meros persistente',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('-g', '--genome', required=True, help='Archivo FASTA con la secuencia del genoma de referencia')
+    parser.add_argument('-m', '--motif', nargs='+', default=None, help='Motivos a buscar (A, C, G, T y códigos IUPAC)')
+    parser.add_argument('--motif-file', default=None, help='Archivo con un motivo por línea (opcionalmente nombre<TAB>motivo)')
+    parser.add_argument('-p', '--peaks', default=None, help='Archivo TSV de picos: solo ocurrencias dentro de algún pico')
+    parser.add_argument('--tf', nargs='+', default=None, help='Con -p, solo los picos de estos TFs')
+    parser.add_argument('-o', '--output', default=None, help='Archivo TSV de salida (por defecto se escribe en la salida estándar)')
+    parser.add_argument('-k', type=int, default=DEFAULT_K, help='Longitud de las palabras del índice')
+    parser.add_argument('--index', default=None, help='Ruta del índice (por defecto <genoma>.kmeridx)')
+    parser.add_argument('--rebuild', action='store_true', help='Reconstruye el índice aunque esté al día')
+    parser.add_argument('--forward-only', action='store_true', help='Busca solo en la hebra directa')
+    parser.add_argument('--genome-backend', choices=('builtin', 'biopython', 'mmap'), default='builtin',
+                        help='Forma de cargar el genoma al construir el índice')
+    parser.add_argument('--contig', default=None, help='Registro del FASTA a indexar (por defecto, el primero)')
+    parser.add_argument('--no-cache', action='store_true', help='Ignora la cache binaria del genoma al construir el índice')
+    return parser.parse_args()
+
+
+def load_index(args, genome_file):
+    """Abre el índice si está al día; si no, carga el genoma, lo construye y lo guarda."""
+    index_path = args.index or default_index_path(genome_file)
+    if not args.rebuild and os.path.exists(index_path):
+        try:
+            header, index = read_index(index_path)
+            if is_index_fresh(header, genome_file, args.k, args.contig, index_path):
+                return index
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Advertencia: Indice ilegible {index_path}: {str(e)}. Se reconstruye.", file=sys.stderr)
+
+    from main import load_reference
+
+    # Los mensajes de carga van a stderr: la salida estándar puede ser el TSV de ocurrencias (sin -o)
+    with contextlib.redirect_stdout(sys.stderr):
+        genome_seq = load_reference(args, genome_file)
+    t0 = time.perf_counter()
+    index = KmerIndex.build(str(genome_seq).encode('ascii'), args.k)
+    try:
+        index.save(index_path, genome_file, args.contig)
+        print(f"Indice de {args.k}-meros guardado en {index_path} ({time.perf_counter() - t0:.2f} s)", file=sys.stderr)
+    except OSError as e:
+        print(f"Advertencia: No se pudo guardar el indice {index_path}: {str(e)}", file=sys.stderr)
+    return index
+
+
+def main():
+    """Carga (o construye) el índice y escribe las ocurrencias de cada motivo."""
+    args = parse_args()
+    genome_file = os.path.abspath(args.genome)
+    for path in (genome_file, args.peaks, args.motif_file):
+        if path and not os.path.exists(path):
+            print(f"ERROR: Archivo no encontrado: {os.path.abspath(path)}", file=sys.stderr)
+            sys.exit(1)
+    if args.k < 1 or args.k > 12:
+        print(f"ERROR: -k debe estar entre 1 y 12 (recibido: {args.k})", file=sys.stderr)
+        sys.exit(1)
+    if args.tf and not args.peaks:
+        print("ERROR: --tf requiere -p", file=sys.stderr)
+        sys.exit(1)
+
+    motifs = read_motifs(args)
+    if not motifs:
+        print("ERROR: Indique al menos un motivo con -m o --motif-file", file=sys.stderr)
+        sys.exit(1)
+    try:
+        for _, motif in motifs:
+            motif_masks(motif)
+    except ValueError as e:
+        print(f"ERROR: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+    index = load_index(args, genome_file)
+    peak_index = None
+    if args.peaks:
+        from peaks_cache import load_peak_table
+
+        peaks_dict = load_peak_table(os.path.abspath(args.peaks), quiet=True)
+        if args.tf:
+            selected = set(args.tf)
+            peaks_dict = {tf_name: peaks for tf_name, peaks in peaks_dict.items() if tf_name in selected}
+            if not peaks_dict:
+                print(f"ERROR: Ninguno de los TFs indicados tiene picos en {args.peaks}", file=sys.stderr)
+                sys.exit(1)
+        peak_index = IntervalIndex(peaks_dict)
+
+    out = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        columns = ['Motif', 'Strand', 'Start', 'End', 'Sequence']
+        if peak_index is not None:
+            columns += ['TF_name', 'Peak_start', 'Peak_end', 'Peak_id']
+        out.write('\t'.join(columns) + '\n')
+        for name, motif in motifs:
+            t0 = time.perf_counter()
+            starts, ends, strands = index.search(motif, both_strands=not args.forward_only)
+            if peak_index is None:
+                rows = [(i,) for i in range(len(starts))]
+            else:
+                rows = hits_in_peaks(starts, ends, peak_index)
+            elapsed_ms = (time.perf_counter() - t0) * 1000
+            for i, *peak in rows:
+                start, end, strand = int(starts[i]), int(ends[i]), str(strands[i])
+                fields = [name, strand, start, end, index.sequence(start, end, strand)] + peak
+                out.write('\t'.join(str(field) for field in fields) + '\n')
+            print(f"{name}: {len(rows)} ocurrencias en {elapsed_ms:.1f} ms", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,10 @@
 import argparse
 import os
 import sys
-from peaks import parse_peaks
-from genome import load_genome
-from extractor import extract_sequences as write_sequences
+
+# Los módulos del proyecto (y con ellos NumPy) se importan dentro de las
+# funciones, después de validar los argumentos: así --help y los errores de
+# uso responden sin pagar esas importaciones. Ver benchmarks/check_startup.py.
 
 # Ejemplo de uso
 # Con archivo de picos más corto: python src/main.py -p data/union_peaks_file_short.tsv -g data/E_coli_K12_MG1655_U00096.3.fasta -o results/
@@ -16,8 +17,30 @@ def parse_args():
     
     Define tres argumentos obligatorios:
     - --peaks (-p): Archivo TSV con datos de picos ChIP-Seq
-    - --genome (-g): Archivo FASTA con el genoma de referencia
+    - --genome (-g): Archivo FASTA con el genoma de referencia (o --genome-list)
     - --outdir (-o): Directorio de salida para los resultados
+
+    Y opciones adicionales:
+    - --columnar: Lee el TSV con parse_peaks_table en cada ejecución, sin la cache de picos
+    - --genome-backend: 'builtin' o 'biopython' (load_genome) o 'mmap' (load_indexed_genome)
+    - --contig: Registro del genoma indexado del que se extraen las secuencias
+    - --no-cache: No usar la cache binaria del genoma aunque exista y esté al día
+    - --no-peaks-cache: Leer siempre el TSV de picos en lugar de su cache binaria
+    - --workers: Procesos para la extracción en paralelo por grupos de TFs
+    - --line-width, --compress, --compress-level: Formato de los FASTA de salida
+    - --incremental: Omite los TFs sin cambios desde la última ejecución
+    - --merge-gap: Fusión de picos solapados/cercanos de cada TF antes de extraer
+    - --dedup: Extracción única de intervalos compartidos entre picos y TFs
+    - --stream, --chunk-size, --max-open-files: Procesamiento por bloques con memoria acotada
+    - --summit-window, --window-edge: Ventanas de ancho fijo alrededor de Peak_center
+    - --top-k: Solo los K picos de mayor Max_Fold_Enrichment de cada TF
+    - --strand-column, --genes: Hebra de cada pico (columna del TSV o gen de Proximal_genes)
+    - --upstream, --downstream: Flancos agregados a cada pico según su hebra
+    - --stats, --markov-order, --length-bin: Estadísticas por TF y modelos de fondo para MEME
+    - --metrics: Reporte JSON con tiempos por etapa, contadores y memoria
+    - --quiet: Omite el resumen por TF y los avisos por fila
+    - --profile, --trace-memory: Perfiles opcionales con cProfile y tracemalloc
+    - --genome-list, --genome-jobs: Modo por lotes contra varios genomas (ver batch.py)
     
     Returns:
         argparse.Namespace: Objeto con los argumentos parseados
@@ -35,15 +58,274 @@ def parse_args():
         help='Archivo TSV con información de picos de ChIP-Seq (formato: TF, start, end, ID)'
     )
     parser.add_argument(
-        '-g', '--genome', required=True,
-        help='Archivo FASTA con la secuencia del genoma de referencia'
+        '-g', '--genome', nargs='+', default=None,
+        help='Archivo FASTA con la secuencia del genoma de referencia (con varios, se extrae contra cada uno)'
+    )
+    parser.add_argument(
+        '--genome-list', default=None, metavar='LISTA',
+        help='Archivo con un genoma por línea (ruta, o nombre<TAB>ruta) para extraer contra todos en un solo lote'
+    )
+    parser.add_argument(
+        '--genome-jobs', type=int, default=None, metavar='N',
+        help='Genomas procesados en paralelo en el modo por lotes (por defecto, uno por CPU)'
     )
     parser.add_argument(
         '-o', '--outdir', required=True,
         help='Directorio donde se guardarán los archivos FASTA por TF'
     )
+    parser.add_argument(
+        '--columnar', action='store_true',
+        help='Lee el TSV en cada ejecución con el parser columnar de una sola pasada (PeakTable con arreglos '
+             'tipados), sin usar ni escribir la cache de picos'
+    )
+    parser.add_argument(
+        '--genome-backend', choices=('builtin', 'biopython', 'mmap'), default='builtin',
+        help='Forma de cargar el genoma: lector FASTA propio o Bio.SeqIO (completo en memoria) o mmap con indice .fai'
+    )
+    parser.add_argument(
+        '--contig', default=None,
+        help='Registro del FASTA a usar con la cache binaria o --genome-backend mmap (por defecto, el primero)'
+    )
+    parser.add_argument(
+        '--no-cache', action='store_true',
+        help='Ignora la cache binaria del genoma (<genoma>.pa2bit) aunque esté al día'
+    )
+    parser.add_argument(
+        '--no-peaks-cache', action='store_true',
+        help='Lee siempre el TSV de picos sin usar ni escribir su cache binaria (<picos>.peakcache)'
+    )
+    parser.add_argument(
+        '--workers', type=int, default=1,
+        help='Número de procesos para extraer y escribir los FASTA en paralelo'
+    )
+    parser.add_argument(
+        '--line-width', type=int, default=0,
+        help='Corta las secuencias en líneas de N columnas (0 = una sola línea por secuencia)'
+    )
+    parser.add_argument(
+        '--compress', choices=('gzip', 'bgzip'), default=None,
+        help='Comprime los FASTA de salida (.fa.gz) con gzip o gzip por bloques (BGZF)'
+    )
+    parser.add_argument(
+        '--compress-level', type=int, default=6, choices=range(1, 10), metavar='{1-9}',
+        help='Nivel de compresión para --compress'
+    )
+    parser.add_argument(
+        '--incremental', action='store_true',
+        help='Solo regenera los FASTA de TFs cuyos picos, genoma u opciones cambiaron (según manifest.json)'
+    )
+    parser.add_argument(
+        '--merge-gap', type=int, default=None,
+        help='Fusiona los picos de cada TF que se solapan o están a lo sumo a N pb antes de extraer'
+    )
+    parser.add_argument(
+        '--dedup', action='store_true',
+        help='Extrae una sola vez cada intervalo repetido entre picos y TFs y reporta la proporción de duplicados'
+    )
+    parser.add_argument(
+        '--stream', action='store_true',
+        help='Lee el archivo de picos por bloques y agrega las secuencias a cada FASTA sin cargar toda la tabla'
+    )
+    parser.add_argument(
+        '--chunk-size', type=int, default=100000,
+        help='Picos por bloque en modo --stream'
+    )
+    parser.add_argument(
+        '--max-open-files', type=int, default=256,
+        help='Máximo de archivos FASTA abiertos a la vez en modo --stream'
+    )
+    parser.add_argument(
+        '--summit-window', type=int, default=None, metavar='N',
+        help='Extrae ventanas de ±N pb alrededor de Peak_center en lugar del intervalo completo del pico'
+    )
+    parser.add_argument(
+        '--window-edge', choices=('clip', 'drop'), default='clip',
+        help='Ventanas o flancos que salen del genoma: recortarlos (clip) o descartarlos (drop)'
+    )
+    parser.add_argument(
+        '--top-k', type=int, default=None, metavar='K',
+        help='Conserva solo los K picos de mayor Max_Fold_Enrichment de cada TF'
+    )
+    parser.add_argument(
+        '--strand-column', default=None, metavar='COLUMNA',
+        help="Columna del TSV con la hebra de cada pico ('+', '-' o '.'); los picos '-' se escriben como complementaria inversa"
+    )
+    parser.add_argument(
+        '--genes', default=None, metavar='ANOTACION',
+        help='GFF/GTF o TSV (gen, hebra): cada pico toma la hebra del primer gen de Proximal_genes'
+    )
+    parser.add_argument(
+        '--upstream', type=int, default=0, metavar='N',
+        help="Agrega N pb en 5' de cada pico (según su hebra)"
+    )
+    parser.add_argument(
+        '--downstream', type=int, default=0, metavar='N',
+        help="Agrega N pb en 3' de cada pico (según su hebra)"
+    )
+    parser.add_argument(
+        '--stats', action='store_true',
+        help='Escribe sequence_stats.tsv (longitudes, GC%%, N por TF) y un modelo de fondo de MEME por TF en background/'
+    )
+    parser.add_argument(
+        '--markov-order', type=int, default=2,
+        help='Orden del modelo de Markov de fondo de --stats'
+    )
+    parser.add_argument(
+        '--length-bin', type=int, default=50,
+        help='Ancho en pb de las clases del histograma de longitudes de --stats'
+    )
+    parser.add_argument(
+        '--metrics', default=None, metavar='JSON',
+        help='Guarda un reporte JSON con tiempos por etapa, contadores (filas, rechazos, bytes por TF) y memoria'
+    )
+    parser.add_argument(
+        '--quiet', action='store_true',
+        help='No imprime el resumen por TF ni un aviso por cada fila omitida (solo el total por motivo)'
+    )
+    parser.add_argument(
+        '--profile', default=None, metavar='PROF',
+        help='Perfila la ejecución con cProfile y guarda las estadísticas en este archivo'
+    )
+    parser.add_argument(
+        '--trace-memory', action='store_true',
+        help='Registra con tracemalloc el pico de memoria de Python y los sitios que más asignan (en --metrics)'
+    )
     return parser.parse_args()
 
+def load_reference(args, genome_file, metrics=None):
+    """
+    Carga el genoma según las opciones de línea de comandos.
+
+    Usa la cache binaria si existe y está al día (salvo --no-cache); si no,
+    el backend indicado con --genome-backend. Con --contig se selecciona el
+    registro a usar en los backends indexados.
+
+    Returns:
+        Secuencia del genoma (str, Bio.Seq.Seq o vista con len() y rebanadas).
+    """
+    from metrics import RunMetrics
+
+    metrics = metrics or RunMetrics()
+    with metrics.stage('genome_load'):
+        genome_seq = _load_reference(args, genome_file)
+    metrics.counters['genome_length'] = len(genome_seq)
+    print(f"Genoma cargado (longitud: {len(genome_seq)} pb)")
+    return genome_seq
+
+
+def _load_reference(args, genome_file):
+    """Elige el backend del genoma y devuelve la secuencia a usar (ver load_reference)."""
+    from genome import load_genome, load_indexed_genome
+    from genome_cache import default_cache_path, is_cache_fresh, load_genome_cache
+
+    cache_file = default_cache_path(genome_file)
+    if not args.no_cache and is_cache_fresh(cache_file, genome_file):
+        print(f"Usando cache binaria del genoma: {cache_file}")
+        genome = load_genome_cache(cache_file)
+    elif args.genome_backend == 'mmap':
+        genome = load_indexed_genome(genome_file)
+    else:
+        genome = None
+
+    if genome is not None:
+        if args.contig and args.contig not in genome.names:
+            print(f"ERROR: Contig '{args.contig}' no encontrado. Disponibles: {', '.join(genome.names)}", file=sys.stderr)
+            sys.exit(1)
+        genome_seq = genome[args.contig] if args.contig else genome.seq
+    else:
+        genome_record = load_genome(genome_file, args.genome_backend)
+        genome_seq = genome_record.seq
+    return genome_seq
+
+
+def extract_for_genome(args, peaks_dict, genome_file, output_dir, metrics):
+    """
+    Carga un genoma y extrae contra él los picos ya leídos.
+
+    Aplica antes, según las opciones, las ventanas alrededor de la cumbre,
+    la selección top-k, las hebras y los flancos, que dependen de la
+    longitud del genoma. Es el paso 2/2 de main() y el trabajo de cada
+    genoma en el modo por lotes (ver batch.py).
+    """
+    from extractor import extract_sequences as write_sequences
+    from manifest import genome_fingerprint
+
+    stranded = args.strand_column is not None or args.genes is not None
+    flanks = args.upstream or args.downstream
+    write_options = {
+        'line_width': args.line_width,
+        'compression': args.compress,
+        'level': args.compress_level,
+    }
+    genome_seq = load_reference(args, genome_file, metrics)
+
+    # Ventanas alrededor de la cumbre y selección de los mejores picos por TF
+    if args.summit_window is not None:
+        n_before = peaks_dict.n_rows
+        peaks_dict = peaks_dict.summit_windows(args.summit_window, len(genome_seq), args.window_edge)
+        print(f"Ventanas de ±{args.summit_window} pb alrededor de Peak_center: {peaks_dict.n_rows} picos"
+              f" ({n_before - peaks_dict.n_rows} descartados en los bordes del genoma)")
+    if args.top_k is not None:
+        n_before = peaks_dict.n_rows
+        peaks_dict = peaks_dict.top_k(args.top_k)
+        print(f"Top {args.top_k} picos por TF segun Max_Fold_Enrichment: {n_before} -> {peaks_dict.n_rows}")
+    if stranded:
+        n_minus = int((peaks_dict.strands < 0).sum())
+        n_unknown = int((peaks_dict.strands == 0).sum())
+        print(f"Hebras: {peaks_dict.n_rows - n_minus} picos en +, {n_minus} en - (complementaria inversa)")
+        if n_unknown:
+            print(f"Advertencia: {n_unknown} picos sin hebra conocida se extraen en la hebra +", file=sys.stderr)
+    if flanks:
+        n_before = peaks_dict.n_rows
+        peaks_dict = peaks_dict.flank(args.upstream, args.downstream, len(genome_seq), args.window_edge)
+        print(f"Flancos de {args.upstream} pb en 5' y {args.downstream} pb en 3': {peaks_dict.n_rows} picos"
+              f" ({n_before - peaks_dict.n_rows} descartados en los bordes del genoma)")
+
+    write_sequences(
+        genome_seq, peaks_dict, output_dir,
+        workers=args.workers, write_options=write_options, incremental=args.incremental,
+        dedup=args.dedup, quiet=args.quiet, metrics=metrics,
+        stats_options={'markov_order': args.markov_order, 'bin_width': args.length_bin} if args.stats else None,
+        genome_hash=genome_fingerprint(genome_file, args.contig) if args.incremental else None
+    )
+
+
+def resolve_genomes(args):
+    """
+    Lista de genomas de -g y --genome-list como tuplas (nombre, ruta absoluta).
+
+    Termina con error si no se indicó ninguno, si falta algún archivo, si
+    alguno está comprimido con gzip (los lectores del genoma solo aceptan
+    FASTA de texto) o si dos genomas tienen el mismo nombre (cada uno escribe
+    en su subdirectorio).
+    """
+    from batch import genome_name, read_genome_list
+
+    genomes = [(genome_name(path), os.path.abspath(path)) for path in args.genome or []]
+    if args.genome_list:
+        if not os.path.exists(args.genome_list):
+            print(f"ERROR: Lista de genomas no encontrada: {os.path.abspath(args.genome_list)}", file=sys.stderr)
+            sys.exit(1)
+        genomes.extend(read_genome_list(args.genome_list))
+    if not genomes:
+        print("ERROR: Indique el genoma con -g o --genome-list", file=sys.stderr)
+        sys.exit(1)
+    for _, path in genomes:
+        if not os.path.exists(path):
+            print(f"ERROR: Archivo del genoma no encontrado: {path}", file=sys.stderr)
+            sys.exit(1)
+        with open(path, 'rb') as f:
+            if f.read(2) == b'\x1f\x8b':
+                print(f"ERROR: El genoma esta comprimido con gzip; descomprimalo antes (gunzip): {path}", file=sys.stderr)
+                sys.exit(1)
+    names = [name for name, _ in genomes]
+    repeated = sorted({name for name in names if names.count(name) > 1})
+    if repeated:
+        print(f"ERROR: Nombres de genoma repetidos: {', '.join(repeated)} (use nombre<TAB>ruta en --genome-list)", file=sys.stderr)
+        sys.exit(1)
+    return genomes
+
+
 def main():
     """
     Función principal que orquesta el proceso completo:
@@ -58,46 +340,156 @@ def main():
 
     # Convertir rutas a absolutas
     peak_file = os.path.abspath(args.peaks)
-    genome_file = os.path.abspath(args.genome)
     output_dir = os.path.abspath(args.outdir)
 
     # Paso 2: Validación de entradas
     if not os.path.exists(peak_file):
         print(f"ERROR: Archivo de picos no encontrado: {peak_file}", file=sys.stderr)
         sys.exit(1)
-    if not os.path.exists(genome_file):
-        print(f"ERROR: Archivo del genoma no encontrado: {genome_file}", file=sys.stderr)
+    genome_list = resolve_genomes(args)
+    genome_file = genome_list[0][1] if len(genome_list) == 1 and not args.genome_list else None
+    if genome_file is None:
+        if args.stream:
+            print("ERROR: El modo por lotes (varios genomas) no se puede combinar con --stream", file=sys.stderr)
+            sys.exit(1)
+        if args.genome_jobs is not None and args.genome_jobs < 1:
+            print(f"ERROR: --genome-jobs debe ser al menos 1 (recibido: {args.genome_jobs})", file=sys.stderr)
+            sys.exit(1)
+    else:
+        genome_list = None
+
+    if args.workers < 1:
+        print(f"ERROR: --workers debe ser al menos 1 (recibido: {args.workers})", file=sys.stderr)
+        sys.exit(1)
+    if args.line_width < 0:
+        print(f"ERROR: --line-width no puede ser negativo (recibido: {args.line_width})", file=sys.stderr)
+        sys.exit(1)
+    if args.stream and (args.workers > 1 or args.incremental or args.columnar or args.merge_gap is not None):
+        print("ERROR: --stream no se puede combinar con --workers, --incremental, --columnar ni --merge-gap", file=sys.stderr)
+        sys.exit(1)
+    summits = args.summit_window is not None or args.top_k is not None
+    if summits and (args.stream or args.merge_gap is not None):
+        print("ERROR: --summit-window y --top-k no se pueden combinar con --stream ni --merge-gap", file=sys.stderr)
+        sys.exit(1)
+    if (args.summit_window is not None and args.summit_window < 0) or (args.top_k is not None and args.top_k < 1):
+        print("ERROR: --summit-window no puede ser negativo y --top-k debe ser al menos 1", file=sys.stderr)
+        sys.exit(1)
+    if args.merge_gap is not None and args.merge_gap < 0:
+        print(f"ERROR: --merge-gap no puede ser negativo (recibido: {args.merge_gap})", file=sys.stderr)
+        sys.exit(1)
+    if args.chunk_size < 1 or args.max_open_files < 1:
+        print("ERROR: --chunk-size y --max-open-files deben ser al menos 1", file=sys.stderr)
+        sys.exit(1)
+    stranded = args.strand_column is not None or args.genes is not None
+    flanks = args.upstream or args.downstream
+    if args.strand_column is not None and args.genes is not None:
+        print("ERROR: Use --strand-column o --genes, no ambos", file=sys.stderr)
+        sys.exit(1)
+    if (stranded or flanks) and (args.stream or args.merge_gap is not None):
+        print("ERROR: --strand-column, --genes, --upstream y --downstream no se pueden combinar con --stream ni --merge-gap", file=sys.stderr)
+        sys.exit(1)
+    if args.upstream < 0 or args.downstream < 0:
+        print("ERROR: --upstream y --downstream no pueden ser negativos", file=sys.stderr)
+        sys.exit(1)
+    if args.genes is not None and not os.path.exists(args.genes):
+        print(f"ERROR: Archivo de genes no encontrado: {os.path.abspath(args.genes)}", file=sys.stderr)
+        sys.exit(1)
+    if args.stats and (args.stream or args.incremental):
+        # En esos modos no todas las secuencias pasan por memoria en esta ejecución
+        print("ERROR: --stats no se puede combinar con --stream ni --incremental", file=sys.stderr)
+        sys.exit(1)
+    if args.markov_order < 0 or args.length_bin < 1:
+        print("ERROR: --markov-order no puede ser negativo y --length-bin debe ser al menos 1", file=sys.stderr)
         sys.exit(1)
 
+    from peaks import iter_peak_chunks, parse_peaks, parse_peaks_table, parse_strand, read_gene_strands, strand_from_genes
+    from peaks_cache import load_peak_table
+    from extractor import extract_sequences_stream
+    from batch import run_batch
+    from intervals import merge_peaks_dict
+    from metrics import RunMetrics, format_rejected_rows
+
     # Crear directorio de salida si no existe
     os.makedirs(output_dir, exist_ok=True)
 
+    metrics = RunMetrics()
+    metrics.start_profiling(args.profile, args.trace_memory)
+
     print("\n" + "="*60)
     print(f"{'EXTRACCION DE SITIOS DE UNION':^60}")
     print("="*60)
     print(f"Archivo de picos: {peak_file}")
-    print(f"Archivo del genoma: {genome_file}")
+    if genome_list is None:
+        print(f"Archivo del genoma: {genome_file}")
+    else:
+        print(f"Genomas: {', '.join(name for name, _ in genome_list)}")
     print(f"Directorio de salida: {output_dir}")
     print("="*60)
 
-    # Paso 3: Procesar archivo de picos
-    print("\nPaso 1/2: Procesando archivo de picos...")
-    peaks_dict = parse_peaks(peak_file)
-    if not peaks_dict:
-        print("ERROR: No se encontraron picos validos en el archivo", file=sys.stderr)
-        sys.exit(1)
-    print(f"Encontrados {len(peaks_dict)} factores de transcripcion con picos validos")
+    write_options = {
+        'line_width': args.line_width,
+        'compression': args.compress,
+        'level': args.compress_level,
+    }
 
-    # Paso 4: Cargar genoma
-    print("\nPaso 2/2: Extrayendo secuencias...")
-    genome_record = load_genome(genome_file)
-    genome_seq = genome_record.seq
-    genome_length = len(genome_seq)
+    if args.stream:
+        # Modo streaming: el genoma se carga primero y los picos se procesan por bloques
+        print("\nModo streaming: extrayendo secuencias por bloques de picos...")
+        genome_seq = load_reference(args, genome_file, metrics)
+        n_tfs = extract_sequences_stream(
+            genome_seq, iter_peak_chunks(peak_file, args.chunk_size, metrics.counters, args.quiet), output_dir,
+            write_options=write_options, max_open_files=args.max_open_files, dedup=args.dedup,
+            quiet=args.quiet, metrics=metrics
+        )
+        if args.quiet and metrics.counters.get('rows_rejected'):
+            print(f"Advertencia: Filas omitidas: {format_rejected_rows(metrics.counters)}", file=sys.stderr)
+        if not n_tfs:
+            print("ERROR: No se encontraron picos validos en el archivo", file=sys.stderr)
+            sys.exit(1)
+    else:
+        # Paso 3: Procesar archivo de picos
+        print("\nPaso 1/2: Procesando archivo de picos...")
+        with metrics.stage('parse'):
+            if stranded:
+                # La columna de hebra (o de genes) no se guarda en la cache: se lee el TSV
+                if args.genes is not None:
+                    strand = {'Proximal_genes': strand_from_genes(read_gene_strands(args.genes))}
+                else:
+                    strand = {args.strand_column: parse_strand}
+                peaks_dict = parse_peaks_table(peak_file, metrics.counters, args.quiet, summits=summits, strand=strand)
+            elif args.columnar or (args.no_peaks_cache and (summits or flanks)):
+                # --columnar lee siempre el TSV con el parser columnar, sin la cache de picos
+                peaks_dict = parse_peaks_table(peak_file, metrics.counters, args.quiet, summits=summits)
+            elif not args.no_peaks_cache:
+                peaks_dict = load_peak_table(peak_file, metrics.counters, args.quiet, summits=summits)
+            else:
+                peaks_dict = parse_peaks(peak_file, metrics.counters, args.quiet)
+        if args.quiet and metrics.counters.get('rows_rejected'):
+            print(f"Advertencia: Filas omitidas: {format_rejected_rows(metrics.counters)}", file=sys.stderr)
+        if not peaks_dict:
+            print("ERROR: No se encontraron picos validos en el archivo", file=sys.stderr)
+            sys.exit(1)
+        print(f"Encontrados {len(peaks_dict)} factores de transcripcion con picos validos")
+        if args.merge_gap is not None:
+            n_before = sum(len(peaks) for _, peaks in peaks_dict.items())
+            with metrics.stage('merge'):
+                peaks_dict = merge_peaks_dict(peaks_dict, args.merge_gap)
+            n_after = sum(len(peaks) for peaks in peaks_dict.values())
+            print(f"Picos fusionados (distancia maxima {args.merge_gap} pb): {n_before} -> {n_after}")
 
-    print(f"Genoma cargado (longitud: {genome_length} pb)")
+        if genome_list is None:
+            # Pasos 4 y 5: Cargar genoma y extraer secuencias
+            print("\nPaso 2/2: Extrayendo secuencias...")
+            extract_for_genome(args, peaks_dict, genome_file, output_dir, metrics)
+        else:
+            print(f"\nPaso 2/2: Extrayendo secuencias contra {len(genome_list)} genomas...")
+            with metrics.stage('batch'):
+                run_batch(args, peaks_dict, genome_list, output_dir, metrics.counters)
 
-    # Paso 5. Extraer secuencias
-    write_sequences(genome_seq, peaks_dict, output_dir)
+    metrics.stop_profiling()
+    if args.metrics:
+        metrics.save(args.metrics)
+        print(f"Metricas guardadas en {os.path.abspath(args.metrics)}")
 
     # Mensaje final
     print("\n" + "="*60)
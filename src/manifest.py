@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import sys
+
+from genome_cache import default_cache_path, file_sha256, matches_source, read_cache_header
+from io_utils import atomic_write
+
+# Manifiesto de la última extracción, guardado en el directorio de salida
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+
+def peaks_fingerprint(peak_ids, starts, ends, minus=None):
+    """
+    Calcula el hash de contenido de la lista de picos de un TF.
+
+    Args:
+        peak_ids (list): IDs de pico.
+        starts (np.ndarray): Coordenadas iniciales.
+        ends (np.ndarray): Coordenadas finales.
+        minus (np.ndarray): Máscara de picos en la hebra '-' (None si no hay hebras).
+
+    Returns:
+        str: SHA-256 en hexadecimal.
+    """
+    digest = hashlib.sha256()
+    digest.update(starts.astype('<i8').tobytes())
+    digest.update(ends.astype('<i8').tobytes())
+    digest.update('\0'.join(peak_ids).encode('utf-8'))
+    if minus is not None:
+        digest.update(b'strand' + minus.tobytes())
+    return digest.hexdigest()
+
+
+def genome_fingerprint(genome_file, contig=None):
+    """
+    Huella del genoma usado en la extracción, sin releer la secuencia cargada.
+
+    Combina el SHA-256 del FASTA de origen con el contig extraído (None =
+    el primero). Si la cache binaria del genoma corresponde al FASTA se usa
+    el SHA-256 guardado en su encabezado; si no, se calcula leyendo el
+    archivo por bloques.
+    """
+    cache_path = default_cache_path(genome_file)
+    source_sha256 = None
+    if os.path.exists(cache_path):
+        try:
+            header, _ = read_cache_header(cache_path)
+            if matches_source(header, genome_file, cache_path):
+                source_sha256 = header['source_sha256']
+        except (OSError, ValueError, KeyError):
+            pass
+    if source_sha256 is None:
+        source_sha256 = file_sha256(genome_file)
+    return hashlib.sha256(f"{source_sha256}\0{contig or ''}".encode('utf-8')).hexdigest()
+
+
+def load_manifest(output_dir):
+    """
+    Lee el manifiesto del directorio de salida.
+
+    Devuelve un manifiesto vacío si no existe, está dañado o es de otra versión.
+    """
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    empty = {'version': MANIFEST_VERSION, 'genome': None, 'write_options': None, 'tfs': {}}
+    if not os.path.exists(path):
+        return empty
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Advertencia: Manifiesto ilegible {path}: {str(e)}. Se reconstruye.", file=sys.stderr)
+        return empty
+    if manifest.get('version') != MANIFEST_VERSION:
+        return empty
+    return manifest
+
+
+def remove_manifest(output_dir):
+    """Elimina el manifiesto de una ejecución anterior, que ya no describe la salida."""
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def save_manifest(output_dir, manifest):
+    """Guarda el manifiesto de forma atómica."""
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    atomic_write(path, json.dumps(manifest, indent=1, sort_keys=True).encode('utf-8'))
+
+
+def is_clean(manifest, tf_name, peaks_hash, genome_hash, write_options, output_dir):
+    """
+    Indica si el FASTA de un TF está al día y puede omitirse.
+
+    Un TF está limpio si su lista de picos, el genoma y las opciones de
+    escritura coinciden con los registrados, y el archivo de salida existe
+    con el mismo hash que se guardó al escribirlo.
+    """
+    entry = manifest['tfs'].get(tf_name)
+    if entry is None:
+        return False
+    if (entry['peaks'] != peaks_hash
+            or manifest['genome'] != genome_hash
+            or manifest['write_options'] != write_options):
+        return False
+    if entry['output'] is None:
+        return True
+    output_path = os.path.join(output_dir, entry['output'])
+    return os.path.exists(output_path) and file_sha256(output_path) == entry['output_sha256']
+
+
+def make_entry(peaks_hash, output_path, output_sha256, written, rejected):
+    """
+    Crea la entrada del manifiesto para un TF recién escrito.
+
+    Args:
+        peaks_hash (str): Hash de la lista de picos del TF.
+        output_path (str): Ruta del FASTA escrito, o None si no se generó.
+        output_sha256 (str): SHA-256 de los bytes escritos (ver write_tf_fastas), o None.
+        written (int): Número de secuencias escritas.
+        rejected (list): Picos fuera del genoma (tf_name, peak_id, start, end).
+    """
+    return {
+        'peaks': peaks_hash,
+        'output': os.path.basename(output_path) if output_path else None,
+        'output_sha256': output_sha256 if output_path else None,
+        'sequences': written,
+        'rejected': [list(peak) for peak in rejected],
+    }
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# Ejecución de MEME sobre los FASTA por TF generados por main.py
+# python src/meme_scheduler.py -i results/ -o meme_results/ --jobs 4
+# Solo generar el script meme_results/run_meme.sh (sin ejecutar):
+# python src/meme_scheduler.py -i results/ -o meme_results/ --script-only
+
+import argparse
+import gzip
+import json
+import os
+import shlex
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from genome_cache import file_sha256
+from io_utils import EXTENSIONS, atomic_write
+from seq_stats import BACKGROUND_DIR
+
+# Parámetros de MEME por defecto (ADN, cero o una ocurrencia por secuencia, ambas hebras)
+DEFAULT_MEME_ARGS = '-dna -mod zoops -nmotifs 3 -minw 6 -maxw 20 -revcomp'
+
+# Archivos del directorio de resultados
+STATE_NAME = 'meme_state.json'
+SUMMARY_NAME = 'meme_summary.tsv'
+LOG_DIR = 'logs'
+
+
+def fasta_total_length(path):
+    """Suma de las longitudes de las secuencias de un FASTA (plano o .gz)."""
+    opener = gzip.open if path.endswith('.gz') else open
+    total = 0
+    with opener(path, 'rb') as f:
+        for line in f:
+            if not line.startswith(b'>'):
+                total += len(line.rstrip(b'\r\n'))
+    return total
+
+
+def find_fastas(fasta_dir):
+    """
+    Lista los FASTA por TF del directorio de salida de main.py.
+
+    Returns:
+        list: Tuplas (tf_name, ruta), en orden alfabético.
+    """
+    extensions = sorted(set(EXTENSIONS.values()), key=len, reverse=True)
+    fastas = []
+    for name in sorted(os.listdir(fasta_dir)):
+        if name.startswith('.'):
+            continue  # Temporales de escritura atómica o del modo streaming
+        for extension in extensions:
+            if name.endswith(extension):
+                fastas.append((name[:-len(extension)], os.path.join(fasta_dir, name)))
+                break
+    return fastas
+
+
+def build_jobs(fasta_dir, results_dir, meme='meme', meme_args=DEFAULT_MEME_ARGS):
+    """
+    Arma la lista de trabajos de MEME, uno por FASTA.
+
+    Los trabajos se ordenan de mayor a menor longitud total de secuencia
+    (la misma heurística LPT que balance_groups), de modo que los más largos
+    empiezan primero y no quedan solos al final. Los FASTA comprimidos
+    (.fa.gz) se descomprimen en '{results_dir}/inputs' antes de ejecutar,
+    porque MEME solo lee texto plano. Si main.py se ejecutó con --stats, el
+    modelo de fondo de cada TF ('{fasta_dir}/background/{TF}.bg') se pasa a
+    MEME con -bfile, salvo que meme_args ya indique uno.
+
+    Args:
+        fasta_dir (str): Directorio con los FASTA por TF.
+        results_dir (str): Directorio de resultados; cada TF usa '{results_dir}/{TF}'.
+        meme (str): Ejecutable de MEME (o un sustituto con la misma interfaz).
+        meme_args (str): Parámetros adicionales de MEME.
+
+    Returns:
+        list: Diccionarios con tf, fasta, input (FASTA que lee MEME), length,
+              outdir, log y command.
+    """
+    jobs = []
+    for tf_name, fasta in find_fastas(fasta_dir):
+        outdir = os.path.join(results_dir, tf_name)
+        meme_input = os.path.join(results_dir, 'inputs', f"{tf_name}.fa") if fasta.endswith('.gz') else fasta
+        command = [meme, meme_input, '-oc', outdir] + shlex.split(meme_args)
+        background = os.path.join(fasta_dir, BACKGROUND_DIR, f"{tf_name}.bg")
+        if '-bfile' not in command and os.path.exists(background):
+            command += ['-bfile', background]
+        jobs.append({
+            'tf': tf_name,
+            'fasta': fasta,
+            'input': meme_input,
+            'length': fasta_total_length(fasta),
+            'outdir': outdir,
+            'log': os.path.join(results_dir, LOG_DIR, f"{tf_name}.log"),
+            'command': command,
+        })
+    jobs.sort(key=lambda job: (-job['length'], job['tf']))
+    return jobs
+
+
+def write_run_script(jobs, script_path, results_dir):
+    """
+    Genera un script bash ejecutable con una línea de MEME por FASTA.
+
+    Cada trabajo guarda su salida en su log y agrega una línea con el
+    resultado a '{results_dir}/run_meme.log'.
+
+    Returns:
+        str: Ruta del script.
+    """
+    run_log = os.path.join(results_dir, 'run_meme.log')
+    lines = [
+        '#!/usr/bin/env bash',
+        '# Generado por meme_scheduler.py: un trabajo de MEME por TF, del más largo al más corto',
+        f"mkdir -p {shlex.quote(os.path.join(results_dir, LOG_DIR))}",
+        f"LOG={shlex.quote(run_log)}",
+        'echo "inicio $(date -Iseconds)" >> "$LOG"',
+    ]
+    for job in jobs:
+        tf_name = shlex.quote(job['tf'])
+        command = ' '.join(shlex.quote(arg) for arg in job['command'])
+        if job['input'] != job['fasta']:
+            command = (f"mkdir -p {shlex.quote(os.path.dirname(job['input']))} && "
+                       f"gzip -dc {shlex.quote(job['fasta'])} > {shlex.quote(job['input'])} && {command}")
+        lines.append(
+            f"if {command} > {shlex.quote(job['log'])} 2>&1; "
+            f"then echo -e \"{tf_name}\\tok\" >> \"$LOG\"; "
+            f"else echo -e \"{tf_name}\\terror $?\" >> \"$LOG\"; fi"
+        )
+    lines.append('echo "fin $(date -Iseconds)" >> "$LOG"')
+    atomic_write(script_path, ('\n'.join(lines) + '\n').encode('utf-8'))
+    os.chmod(script_path, 0o755)
+    return script_path
+
+
+def load_state(results_dir):
+    """Lee el estado de ejecuciones anteriores ({tf: entrada}); vacío si no existe o está dañado."""
+    path = os.path.join(results_dir, STATE_NAME)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Advertencia: Estado ilegible {path}: {str(e)}. Se ignora.", file=sys.stderr)
+        return {}
+
+
+def save_state(results_dir, state):
+    """Guarda el estado de forma atómica."""
+    path = os.path.join(results_dir, STATE_NAME)
+    atomic_write(path, json.dumps(state, indent=1, sort_keys=True).encode('utf-8'))
+
+
+def is_done(state, job, fasta_hash):
+    """Un trabajo está completo si terminó bien con el mismo FASTA y el mismo comando."""
+    entry = state.get(job['tf'])
+    return (entry is not None and entry['status'] == 'ok'
+            and entry['fasta_sha256'] == fasta_hash and entry['command'] == job['command'])
+
+
+def run_job(job, timeout=None, retries=0):
+    """
+    Ejecuta un trabajo de MEME con reintentos.
+
+    La salida estándar y de error van al log del trabajo (se agrega un bloque
+    por intento). Si se supera el tiempo límite se mata el grupo de procesos
+    completo y el intento cuenta como fallido.
+
+    Returns:
+        dict: status ('ok', 'error' o 'timeout'), attempts, returncode y seconds.
+    """
+    os.makedirs(os.path.dirname(job['log']), exist_ok=True)
+    if job['input'] != job['fasta']:
+        os.makedirs(os.path.dirname(job['input']), exist_ok=True)
+        with gzip.open(job['fasta'], 'rb') as source:
+            atomic_write(job['input'], source.read())
+    t0 = time.perf_counter()
+    for attempt in range(1, retries + 2):
+        with open(job['log'], 'a') as log:
+            log.write(f"# intento {attempt}: {' '.join(shlex.quote(arg) for arg in job['command'])}\n")
+            log.flush()
+            try:
+                process = subprocess.Popen(job['command'], stdout=log, stderr=subprocess.STDOUT,
+                                           start_new_session=True)
+            except OSError as e:
+                log.write(f"# no se pudo ejecutar: {str(e)}\n")
+                return {'status': 'error', 'attempts': attempt, 'returncode': None,
+                        'seconds': time.perf_counter() - t0}
+            try:
+                returncode = process.wait(timeout=timeout)
+                status = 'ok' if returncode == 0 else 'error'
+            except subprocess.TimeoutExpired:
+                os.killpg(process.pid, signal.SIGKILL)
+                process.wait()
+                returncode, status = None, 'timeout'
+            log.write(f"# intento {attempt}: {status} (codigo {returncode})\n")
+        if status == 'ok':
+            break
+    return {'status': status, 'attempts': attempt, 'returncode': returncode, 'seconds': time.perf_counter() - t0}
+
+
+def write_summary(jobs, state, results_dir):
+    """Escribe el resumen TSV (un TF por línea, en el orden de ejecución) y devuelve su ruta."""
+    path = os.path.join(results_dir, SUMMARY_NAME)
+    lines = ["TF_name\tStatus\tAttempts\tSeconds\tTotal_length\tReturn_code\tLog\n"]
+    for job in jobs:
+        entry = state.get(job['tf'], {})
+        seconds = entry.get('seconds')
+        lines.append(
+            f"{job['tf']}\t{entry.get('status', 'pending')}\t{entry.get('attempts', 0)}\t"
+            f"{'' if seconds is None else f'{seconds:.2f}'}\t{job['length']}\t"
+            f"{'' if entry.get('returncode') is None else entry['returncode']}\t{job['log']}\n"
+        )
+    atomic_write(path, "".join(lines).encode('utf-8'))
+    return path
+
+
+def run_jobs(jobs, results_dir, n_jobs=1, timeout=None, retries=0, force=False):
+    """
+    Ejecuta los trabajos en un grupo acotado de procesos y retoma los ya completados.
+
+    Cada trabajo corre en su propio proceso de MEME; como mucho n_jobs a la
+    vez. El estado (meme_state.json) se guarda al terminar cada trabajo, así
+    que si la ejecución se interrumpe la siguiente omite los que terminaron
+    bien con el mismo FASTA y comando (salvo force=True).
+
+    Returns:
+        dict: Estado final {tf: entrada}.
+    """
+    state = load_state(results_dir)
+    hashes = {job['tf']: file_sha256(job['fasta']) for job in jobs}
+    pending = [job for job in jobs if force or not is_done(state, job, hashes[job['tf']])]
+    if len(pending) < len(jobs):
+        print(f"Se retoman {len(pending)} trabajos; {len(jobs) - len(pending)} ya completados")
+
+    with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+        futures = {pool.submit(run_job, job, timeout, retries): job for job in pending}
+        for future in as_completed(futures):
+            job = futures[future]
+            result = future.result()
+            state[job['tf']] = dict(result, fasta_sha256=hashes[job['tf']], command=job['command'])
+            save_state(results_dir, state)
+            print(f"{job['tf']}: {result['status']} ({result['seconds']:.1f} s, {result['attempts']} intento(s))")
+    return state
+
+
+def parse_args():
+    """
+    Argumentos del planificador:
+    - --input (-i): Directorio con los FASTA por TF (salida de main.py)
+    - --outdir (-o): Directorio de resultados de MEME, logs, estado y resumen
+    - --meme, --meme-args: Ejecutable y parámetros de MEME
+    - --jobs, --timeout, --retries: Paralelismo, tiempo límite por trabajo y reintentos
+    - --script, --script-only: Ruta del run_meme.sh generado / generarlo sin ejecutar
+    - --force: Vuelve a ejecutar también los trabajos ya completados
+    """
+    parser = argparse.ArgumentParser(
+        description='Ejecuta MEME sobre cada FASTA por TF con un grupo acotado de procesos',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('-i', '--input', required=True, help='Directorio con los FASTA por TF')
+    parser.add_argument('-o', '--outdir', required=True, help='Directorio de resultados de MEME')
+    parser.add_argument('--meme', default='meme', help='Ejecutable de MEME (o un sustituto con la misma interfaz)')
+    parser.add_argument('--meme-args', default=DEFAULT_MEME_ARGS, help='Parámetros adicionales de MEME')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='Trabajos de MEME simultáneos')
+    parser.add_argument('--timeout', type=float, default=None, help='Tiempo límite por intento, en segundos')
+    parser.add_argument('--retries', type=int, default=0, help='Reintentos de un trabajo fallido')
+    parser.add_argument('--script', default=None,
+                        help='Ruta del script generado (por defecto run_meme.sh dentro del directorio de resultados)')
+    parser.add_argument('--script-only', action='store_true', help='Solo genera run_meme.sh, sin ejecutar MEME')
+    parser.add_argument('--force', action='store_true', help='Ejecuta también los trabajos ya completados')
+    return parser.parse_args()
+
+
+def main():
+    """Genera run_meme.sh y ejecuta los trabajos de MEME, salvo con --script-only."""
+    args = parse_args()
+    fasta_dir = os.path.abspath(args.input)
+    results_dir = os.path.abspath(args.outdir)
+
+    if not os.path.isdir(fasta_dir):
+        print(f"ERROR: Directorio de FASTA no encontrado: {fasta_dir}", file=sys.stderr)
+        sys.exit(1)
+    if args.jobs < 1 or args.retries < 0:
+        print("ERROR: --jobs debe ser al menos 1 y --retries no puede ser negativo", file=sys.stderr)
+        sys.exit(1)
+
+    jobs = build_jobs(fasta_dir, results_dir, args.meme, args.meme_args)
+    if not jobs:
+        print(f"ERROR: No hay archivos FASTA en {fasta_dir}", file=sys.stderr)
+        sys.exit(1)
+    os.makedirs(results_dir, exist_ok=True)
+
+    script_path = os.path.abspath(args.script) if args.script else os.path.join(results_dir, 'run_meme.sh')
+    script_path = write_run_script(jobs, script_path, results_dir)
+    print(f"Script generado: {script_path} ({len(jobs)} trabajos)")
+    if args.script_only:
+        return
+
+    print(f"Ejecutando {len(jobs)} trabajos de MEME con {args.jobs} procesos...")
+    t0 = time.perf_counter()
+    state = run_jobs(jobs, results_dir, args.jobs, args.timeout, args.retries, args.force)
+    summary_path = write_summary(jobs, state, results_dir)
+
+    failed = [job['tf'] for job in jobs if state.get(job['tf'], {}).get('status') != 'ok']
+    print(f"\nTrabajos completados: {len(jobs) - len(failed)}/{len(jobs)} en {time.perf_counter() - t0:.1f} s")
+    print(f"Resumen: {summary_path}")
+    if failed:
+        print(f"ERROR: Fallaron {len(failed)} trabajos: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
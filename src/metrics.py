@@ -0,0 +1,153 @@
+import json
+import os
+import resource
+import socket
+import sys
+import time
+from contextlib import contextmanager
+
+from io_utils import atomic_write
+
+# Versión del formato del reporte de métricas (--metrics)
+METRICS_VERSION = 1
+
+
+def peak_rss_kb(children=False):
+    """
+    Pico de memoria residente en KB.
+
+    Para el proceso actual usa VmHWM de /proc/self/status, que se reinicia al
+    hacer exec; ru_maxrss en Linux conserva el pico del proceso padre al
+    momento del fork. Con children=True devuelve el máximo de los procesos
+    hijos ya terminados (procesos de --workers).
+    """
+    if children:
+        return resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class RunMetrics:
+    """
+    Mediciones de una ejecución: tiempos por etapa, contadores y memoria.
+
+    Las etapas se miden con el contexto stage() (tiempo de reloj y de CPU)
+    o se acumulan con add_time() cuando el trabajo está intercalado, como la
+    extracción y la escritura de cada grupo de TFs. Los contadores son un
+    diccionario plano que llenan parse_peaks, parse_peaks_table y la
+    extracción; los valores pueden ser enteros o diccionarios de enteros
+    (por ejemplo, filas rechazadas por motivo o bytes escritos por TF).
+
+    Atributos:
+        stages (dict): {etapa: {'wall_s': float, 'cpu_s': float}}
+        counters (dict): Contadores de la ejecución.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+        self._started = time.time()
+        self._t0 = time.perf_counter()
+        self._profiler = None
+        self._profile_path = None
+        self._trace_memory = False
+        self._memory = None
+
+    @contextmanager
+    def stage(self, name):
+        """Mide el tiempo de reloj y de CPU del bloque y lo suma a la etapa `name`."""
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - wall0, time.process_time() - cpu0)
+
+    def add_time(self, name, wall_s, cpu_s=None):
+        """Suma tiempo a una etapa; cpu_s es opcional (no se mide en los procesos de trabajo)."""
+        entry = self.stages.setdefault(name, {'wall_s': 0.0})
+        entry['wall_s'] += wall_s
+        if cpu_s is not None:
+            entry['cpu_s'] = entry.get('cpu_s', 0.0) + cpu_s
+
+    def count(self, name, n=1):
+        """Suma n al contador `name`."""
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def start_profiling(self, profile_path=None, trace_memory=False):
+        """
+        Activa los perfiles opcionales.
+
+        Args:
+            profile_path (str): Si se indica, perfila con cProfile y guarda ahí
+                                las estadísticas (legibles con pstats o snakeviz).
+            trace_memory (bool): Registra con tracemalloc el pico de memoria
+                                 de Python y los sitios que más memoria asignan.
+        """
+        if trace_memory:
+            import tracemalloc
+            tracemalloc.start()
+            self._trace_memory = True
+        if profile_path:
+            import cProfile
+            self._profile_path = profile_path
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def stop_profiling(self, top=10):
+        """Detiene los perfiles y guarda sus resultados (llamar antes de report())."""
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler.dump_stats(self._profile_path)
+            self._profiler = None
+        if self._trace_memory:
+            import tracemalloc
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self._trace_memory = False
+            self._memory = {
+                'current_mb': current / 1024 ** 2,
+                'peak_mb': peak / 1024 ** 2,
+                'top': [
+                    {'site': str(stat.traceback[0]), 'size_mb': stat.size / 1024 ** 2, 'blocks': stat.count}
+                    for stat in snapshot.statistics('lineno')[:top]
+                ],
+            }
+
+    def report(self):
+        """Arma el reporte de la ejecución como diccionario serializable a JSON."""
+        memory = {
+            'peak_rss_mb': peak_rss_kb() / 1024,
+            'children_peak_rss_mb': peak_rss_kb(children=True) / 1024,
+        }
+        if self._memory is not None:
+            memory['tracemalloc'] = self._memory
+        return {
+            'version': METRICS_VERSION,
+            'host': socket.gethostname(),
+            'pid': os.getpid(),
+            'command': sys.argv,
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S%z', time.localtime(self._started)),
+            'wall_s': time.perf_counter() - self._t0,
+            'stages': self.stages,
+            'counters': self.counters,
+            'memory': memory,
+            'profile': self._profile_path,
+        }
+
+    def save(self, path):
+        """Guarda el reporte JSON de forma atómica."""
+        atomic_write(path, json.dumps(self.report(), indent=1, sort_keys=True).encode('utf-8'))
+
+
+def format_rejected_rows(counters):
+    """Resumen en una línea de las filas omitidas por motivo, p. ej. '3 (field_count: 2, start_after_end: 1)'."""
+    rejected = counters.get('rows_rejected', {})
+    detail = ', '.join(f"{reason}: {n}" for reason, n in sorted(rejected.items()))
+    return f"{sum(rejected.values())} ({detail})" if rejected else "0"
@@ -1,7 +1,129 @@
+from array import array
 from collections import defaultdict
+import heapq
 import sys       # Para salida de errores y codigos de salida
 
-def parse_peaks(peak_file_path):
+import numpy as np
+
+# Columnas obligatorias que debe tener el archivo
+REQUIRED_COLUMNS = {'TF_name', 'Peak_start', 'Peak_end', 'Dataset_Ids', 'Peak_number'}
+
+
+def _coordinate(value):
+    """Convierte una coordenada del archivo (p. ej. '3389342.0') a entero."""
+    return int(float(value))
+
+
+# Columnas adicionales para ventanas alrededor de la cumbre y selección por
+# enriquecimiento, con la conversión de sus valores
+SUMMIT_COLUMNS = {'Peak_center': _coordinate, 'Max_Fold_Enrichment': float}
+
+# Hebra de un pico: 1 ('+'), -1 ('-') o 0 (desconocida; se extrae como '+')
+STRAND_VALUES = {'+': 1, '-': -1, '.': 0, '': 0, '1': 1, '-1': -1}
+
+
+def parse_strand(value):
+    """Convierte el valor de una columna de hebra ('+', '-', '.', '1', '-1') a 1, -1 o 0."""
+    try:
+        return STRAND_VALUES[value.strip()]
+    except KeyError:
+        raise ValueError(f"hebra invalida: '{value}'") from None
+
+
+def read_gene_strands(genes_file_path):
+    """
+    Lee la hebra de cada gen de una anotación.
+
+    Acepta un GFF/GTF (9 columnas; el nombre se toma de los atributos Name=,
+    gene= o gene_name, y la hebra de la columna 7) o un TSV simple con el
+    nombre del gen y su hebra en las dos primeras columnas. Se ignoran las
+    líneas vacías y las que empiezan con '#'.
+
+    Returns:
+        dict: {nombre_gen: 1 o -1}.
+    """
+    strands = {}
+    with open(genes_file_path) as f:
+        for line in f:
+            if not line.strip() or line.startswith('#'):
+                continue
+            fields = line.rstrip('\r\n').split('\t')
+            if len(fields) >= 9 and fields[6] in ('+', '-'):
+                for attribute in fields[8].replace('"', '').split(';'):
+                    key, _, value = attribute.strip().replace(' ', '=', 1).partition('=')
+                    if key in ('Name', 'gene', 'gene_name') and value:
+                        strands.setdefault(value, parse_strand(fields[6]))
+            elif len(fields) >= 2 and fields[1].strip() in ('+', '-'):
+                strands.setdefault(fields[0].strip(), parse_strand(fields[1]))
+    return strands
+
+
+def strand_from_genes(gene_strands):
+    """
+    Conversión de la columna Proximal_genes a hebra: la del primer gen listado
+    con hebra conocida en gene_strands (0 si ninguno la tiene).
+    """
+    def convert(value):
+        for gene in value.split(','):
+            strand = gene_strands.get(gene.strip())
+            if strand:
+                return strand
+        return 0
+    return convert
+
+
+def fit_to_genome(starts, ends, genome_length, edge='clip'):
+    """
+    Ajusta intervalos a los límites del genoma.
+
+    Args:
+        starts, ends (np.ndarray): Coordenadas 1-based inclusivas.
+        genome_length (int): Longitud del genoma.
+        edge (str): 'clip' recorta los intervalos que salen del genoma;
+                    'drop' los descarta.
+
+    Returns:
+        tuple: (starts, ends, keep); keep marca los intervalos utilizables.
+    """
+    if edge == 'drop':
+        keep = (starts >= 1) & (ends <= genome_length)
+    else:
+        starts = np.maximum(starts, 1)
+        ends = np.minimum(ends, genome_length)
+        keep = starts <= ends
+    return starts, ends, keep
+
+
+def _check_header(header):
+    """
+    Verifica que el encabezado contenga las columnas obligatorias.
+
+    Si falta alguna, imprime un mensaje de error y finaliza el programa.
+    """
+    if not REQUIRED_COLUMNS.issubset(set(header)):
+        missing = REQUIRED_COLUMNS - set(header)
+        print(f"ERROR: Faltan columnas requeridas: {missing}", file=sys.stderr)
+        sys.exit(1)  # Terminar el programa si faltan columnas
+
+
+def _skip_row(counters, reason, message, quiet=False, skipped=None):
+    """
+    Registra una fila omitida.
+
+    Suma la fila a counters['rows_rejected'][reason] si se pasan contadores,
+    agrega (reason, message) a la lista `skipped` si se indica (para la
+    cache de picos) e imprime el aviso en stderr salvo en modo silencioso.
+    """
+    if counters is not None:
+        rejected = counters.setdefault('rows_rejected', {})
+        rejected[reason] = rejected.get(reason, 0) + 1
+    if skipped is not None:
+        skipped.append((reason, message))
+    if not quiet:
+        print(message, file=sys.stderr)
+
+
+def parse_peaks(peak_file_path, counters=None, quiet=False):
     """
     Analiza el archivo de picos y devuelve un diccionario con el formato:
     {tf_name: [(start, end, peak_id), ...]}
@@ -21,6 +143,10 @@ def parse_peaks(peak_file_path):
     Salida de errores:
         - Si faltan columnas requeridas en el encabezado, imprime un mensaje de error y finaliza el programa.
         - Las advertencias se muestran en stderr pero no detienen la ejecución.
+
+    Con `counters` (dict) se registran las filas leídas en 'rows_read' y las
+    omitidas por motivo en 'rows_rejected'; con quiet=True no se imprime un
+    aviso por fila.
     """ 
     # Diccionario para agrupar picos por factor de transcripcion
     peaks_by_tf = defaultdict(list)
@@ -28,23 +154,18 @@ def parse_peaks(peak_file_path):
     with open(peak_file_path) as f:
         # Leer el encabezado del archivo TSV
         header = f.readline().split('\t')
-        
-        # Columnas obligatorias que debe tener el archivo
-        required_columns = {'TF_name', 'Peak_start', 'Peak_end', 'Dataset_Ids', 'Peak_number'}
-        
+
         # Verificar que todas las columnas requeridas estén presentes
-        if not required_columns.issubset(set(header)):
-            missing = required_columns - set(header)
-            print(f"ERROR: Faltan columnas requeridas: {missing}", file=sys.stderr)
-            sys.exit(1)  # Terminar el programa si faltan columnas
+        _check_header(header)
 
         # Procesar cada línea del archivo (comenzando desde la línea 2)
+        line_num = 1
         for line_num, line in enumerate(f, 2):
             fields = line.strip().split('\t')
             
             # Verificar que el número de campos coincida con la cabecera
             if len(fields) != len(header):
-                print(f"Advertencia: Linea {line_num} tiene {len(fields)} campos (se esperaban {len(header)}). Se omite.", file=sys.stderr)
+                _skip_row(counters, 'field_count', f"Advertencia: Linea {line_num} tiene {len(fields)} campos (se esperaban {len(header)}). Se omite.", quiet)
                 continue
             
             try:
@@ -58,7 +179,7 @@ def parse_peaks(peak_file_path):
                 
                 # Validar que las coordenadas sean correctas
                 if start > end:
-                    print(f"Advertencia: Linea {line_num} tiene coordenadas invalidas ({start} > {end}). Se omite.", file=sys.stderr)
+                    _skip_row(counters, 'start_after_end', f"Advertencia: Linea {line_num} tiene coordenadas invalidas ({start} > {end}). Se omite.", quiet)
                     continue
                 
                 # Crear ID unico para el pico
@@ -68,7 +189,394 @@ def parse_peaks(peak_file_path):
                 peaks_by_tf[tf_name].append((start, end, peak_id))
                 
             except (ValueError, KeyError) as e:
-                print(f"Advertencia: Error procesando linea {line_num}: {str(e)}. Se omite.", file=sys.stderr)
+                _skip_row(counters, 'parse_error', f"Advertencia: Error procesando linea {line_num}: {str(e)}. Se omite.", quiet)
                 continue
 
-    return peaks_by_tf
\ No newline at end of file
+    if counters is not None:
+        counters['rows_read'] = counters.get('rows_read', 0) + line_num - 1
+    return peaks_by_tf
+
+class PeakTable:
+    """
+    Tabla columnar de picos respaldada por arreglos de NumPy.
+
+    Es la salida de parse_peaks_table y se comporta como el diccionario
+    {tf_name: [(start, end, peak_id), ...]} que devuelve parse_peaks
+    (len, iteración, items, indexado por TF), por lo que extract_sequences
+    puede consumirla directamente.
+
+    Atributos:
+        starts (np.ndarray): Coordenadas iniciales (1-based) de cada fila.
+        ends (np.ndarray): Coordenadas finales (1-based, inclusivas) de cada fila.
+        tf_codes (np.ndarray): Código entero del TF de cada fila (índice en tf_names).
+        tf_names (list): Nombres de TF en orden de primera aparición.
+        dataset_codes (np.ndarray): Código del Dataset_Ids de cada fila (índice en datasets).
+        datasets (list): Tabla de Dataset_Ids internados.
+        peak_numbers (list): Peak_number de cada fila (cadenas internadas).
+        centers (np.ndarray): Peak_center de cada fila, o None si no se leyó.
+        scores (np.ndarray): Max_Fold_Enrichment de cada fila, o None si no se leyó.
+        strands (np.ndarray): Hebra de cada fila (int8: 1, -1 o 0), o None si no se leyó.
+    """
+
+    def __init__(self, starts, ends, tf_codes, tf_names, dataset_codes, datasets, peak_numbers,
+                 centers=None, scores=None, strands=None):
+        self.starts = starts
+        self.ends = ends
+        self.tf_codes = tf_codes
+        self.tf_names = tf_names
+        self.dataset_codes = dataset_codes
+        self.datasets = datasets
+        self.peak_numbers = peak_numbers
+        self.centers = centers
+        self.scores = scores
+        self.strands = strands
+
+        # Agrupar filas por TF una sola vez: orden estable por código y desplazamientos
+        self._order = np.argsort(tf_codes, kind='stable')
+        counts = np.bincount(tf_codes, minlength=len(tf_names))
+        self._offsets = np.concatenate(([0], np.cumsum(counts)))
+        self._codes = {name: code for code, name in enumerate(tf_names)}
+
+    @property
+    def n_rows(self):
+        """Número total de picos válidos en la tabla."""
+        return len(self.starts)
+
+    def peak_id(self, row):
+        """Reconstruye el ID de pico '{Dataset_Ids}_{Peak_number}' de una fila."""
+        return f"{self.datasets[self.dataset_codes[row]]}_{self.peak_numbers[row]}"
+
+    def rows(self, tf_name):
+        """Devuelve los índices de fila (en orden de archivo) de un TF."""
+        code = self._codes[tf_name]
+        return self._order[self._offsets[code]:self._offsets[code + 1]]
+
+    def grouped(self):
+        """
+        Devuelve los picos ordenados por TF (y en orden de archivo dentro de cada TF).
+
+        Returns:
+            tuple: (offsets, starts, ends, peak_ids), donde las filas del TF
+                   tf_names[i] ocupan el rango offsets[i]:offsets[i + 1].
+        """
+        order = self._order
+        peak_ids = [self.peak_id(row) for row in order.tolist()]
+        return self._offsets, self.starts[order], self.ends[order], peak_ids
+
+    def __len__(self):
+        return len(self.tf_names)
+
+    def __iter__(self):
+        return iter(self.tf_names)
+
+    def __contains__(self, tf_name):
+        return tf_name in self._codes
+
+    def __getitem__(self, tf_name):
+        rows = self.rows(tf_name)
+        return [
+            (start, end, self.peak_id(row))
+            for row, start, end in zip(rows.tolist(), self.starts[rows].tolist(), self.ends[rows].tolist())
+        ]
+
+    def keys(self):
+        return list(self.tf_names)
+
+    def items(self):
+        for tf_name in self.tf_names:
+            yield tf_name, self[tf_name]
+
+    def subset(self, rows, starts=None, ends=None):
+        """
+        Crea una tabla con solo las filas `rows` (en ese orden).
+
+        Args:
+            rows (np.ndarray): Índices de fila a conservar.
+            starts, ends (np.ndarray): Coordenadas nuevas de esas filas; por
+                                       defecto, las de la tabla actual.
+
+        Returns:
+            PeakTable: Tabla con los mismos TFs (aunque alguno quede sin filas).
+        """
+        return PeakTable(
+            starts=self.starts[rows] if starts is None else starts,
+            ends=self.ends[rows] if ends is None else ends,
+            tf_codes=self.tf_codes[rows],
+            tf_names=self.tf_names,
+            dataset_codes=self.dataset_codes[rows],
+            datasets=self.datasets,
+            peak_numbers=[self.peak_numbers[row] for row in rows.tolist()],
+            centers=None if self.centers is None else self.centers[rows],
+            scores=None if self.scores is None else self.scores[rows],
+            strands=None if self.strands is None else self.strands[rows],
+        )
+
+    def summit_windows(self, half_width, genome_length, edge='clip'):
+        """
+        Reemplaza cada pico por una ventana de ±half_width pb alrededor de Peak_center.
+
+        Ver summit_windows. Las filas cuya ventana no cabe en el genoma (con
+        edge='drop') o queda vacía se eliminan.
+
+        Returns:
+            PeakTable: Tabla con las ventanas como coordenadas.
+        """
+        if self.centers is None:
+            raise ValueError("La tabla no tiene la columna Peak_center (use parse_peaks_table(..., summits=True))")
+        starts, ends, keep = summit_windows(self.centers, half_width, genome_length, edge)
+        rows = np.flatnonzero(keep)
+        return self.subset(rows, starts[rows], ends[rows])
+
+    def flank(self, upstream, downstream, genome_length, edge='clip'):
+        """
+        Agrega a cada pico `upstream` pb antes y `downstream` pb después, según su hebra.
+
+        En la hebra '-' el sentido se invierte: el flanco 5' (upstream) queda
+        a la derecha del pico. Sin hebras se toma todo como '+'. Los
+        intervalos que salen del genoma se ajustan con fit_to_genome.
+
+        Returns:
+            PeakTable: Tabla con los intervalos extendidos.
+        """
+        minus = self.strands < 0 if self.strands is not None else np.zeros(self.n_rows, dtype=bool)
+        starts = self.starts - np.where(minus, downstream, upstream)
+        ends = self.ends + np.where(minus, upstream, downstream)
+        starts, ends, keep = fit_to_genome(starts, ends, genome_length, edge)
+        rows = np.flatnonzero(keep)
+        return self.subset(rows, starts[rows], ends[rows])
+
+    def top_k(self, k):
+        """
+        Conserva los k picos de mayor Max_Fold_Enrichment de cada TF.
+
+        Usa un heap acotado por TF (heapq.nlargest) en lugar de ordenar todas
+        las filas; en empates gana el pico que aparece antes en el archivo.
+        Las filas conservadas mantienen el orden de archivo.
+
+        Returns:
+            PeakTable: Tabla con a lo sumo k picos por TF.
+        """
+        if self.scores is None:
+            raise ValueError("La tabla no tiene la columna Max_Fold_Enrichment (use parse_peaks_table(..., summits=True))")
+        scores = self.scores.tolist()
+        offsets = self._offsets.tolist()
+        keep = []
+        for lo, hi in zip(offsets, offsets[1:]):
+            keep.extend(heapq.nlargest(k, self._order[lo:hi].tolist(), key=scores.__getitem__))
+        keep.sort()
+        return self.subset(np.array(keep, dtype=np.int64))
+
+
+def summit_windows(centers, half_width, genome_length, edge='clip'):
+    """
+    Calcula ventanas de ancho fijo centradas en la cumbre de cada pico.
+
+    La ventana de un centro c es [c - half_width, c + half_width] (1-based e
+    inclusiva, 2 * half_width + 1 pb).
+
+    Args:
+        centers (np.ndarray): Peak_center de cada pico (1-based).
+        half_width (int): Bases a cada lado del centro.
+        genome_length (int): Longitud del genoma.
+        edge (str): 'clip' recorta las ventanas que salen del genoma;
+                    'drop' descarta esas ventanas.
+
+    Returns:
+        tuple: (starts, ends, keep); keep marca las ventanas utilizables.
+    """
+    return fit_to_genome(centers - half_width, centers + half_width, genome_length, edge)
+
+
+def peak_batch(peaks_dict):
+    """
+    Convierte los picos de todos los TFs en arreglos de coordenadas agrupados por TF.
+
+    Args:
+        peaks_dict (dict | PeakTable): {tf_name: [(start, end, peak_id), ...], ...}
+                                       o la tabla columnar de parse_peaks_table.
+
+    Returns:
+        tuple: (tf_names, offsets, starts, ends, peak_ids). Los picos del TF
+               tf_names[i] ocupan el rango offsets[i]:offsets[i + 1] de los arreglos.
+    """
+    if isinstance(peaks_dict, PeakTable):
+        offsets, starts, ends, peak_ids = peaks_dict.grouped()
+        return list(peaks_dict.tf_names), offsets, starts, ends, peak_ids
+
+    tf_names = list(peaks_dict)
+    counts = [len(peaks_dict[tf_name]) for tf_name in tf_names]
+    offsets = np.concatenate(([0], np.cumsum(counts, dtype=np.int64)))
+    rows = [peak for tf_name in tf_names for peak in peaks_dict[tf_name]]
+    starts = np.fromiter((peak[0] for peak in rows), dtype=np.int64, count=len(rows))
+    ends = np.fromiter((peak[1] for peak in rows), dtype=np.int64, count=len(rows))
+    peak_ids = [peak[2] for peak in rows]
+    return tf_names, offsets, starts, ends, peak_ids
+
+
+def peak_strands(peaks_dict):
+    """
+    Hebra de cada pico en el mismo orden que peak_batch.
+
+    Returns:
+        np.ndarray: Máscara booleana (True = hebra '-'), o None si los picos
+                    no tienen hebra (diccionario o tabla sin la columna).
+    """
+    if isinstance(peaks_dict, PeakTable) and peaks_dict.strands is not None:
+        return peaks_dict.strands[peaks_dict._order] < 0
+    return None
+
+
+def _iter_rows(f, counters=None, quiet=False, extra_columns=None, skipped=None):
+    """
+    Recorre las filas de datos de un archivo de picos ya abierto.
+
+    Lee y valida el encabezado, resuelve los índices de columna una sola vez
+    y genera (tf_name, start, end, dataset, peak_number) por cada fila válida,
+    seguido del valor de cada columna de `extra_columns` ({columna: conversión},
+    p. ej. SUMMIT_COLUMNS). Las filas
+    inválidas se omiten con los mismos avisos que parse_peaks y, como allí,
+    se registran en `counters` si se indica.
+    """
+    header = f.readline().split('\t')
+    _check_header(header)
+
+    # Resolver los índices de columna una sola vez
+    n_columns = len(header)
+    columns = [column.rstrip('\r\n') for column in header]
+    i_tf = columns.index('TF_name')
+    i_start = columns.index('Peak_start')
+    i_end = columns.index('Peak_end')
+    i_dataset = columns.index('Dataset_Ids')
+    i_number = columns.index('Peak_number')
+    extra_columns = extra_columns or {}
+    missing = set(extra_columns) - set(columns)
+    if missing:
+        print(f"ERROR: Faltan columnas requeridas: {missing}", file=sys.stderr)
+        sys.exit(1)
+    i_extra = [(columns.index(column), convert) for column, convert in extra_columns.items()]
+
+    line_num = 1
+    for line_num, line in enumerate(f, 2):
+        fields = line.strip().split('\t')
+
+        if len(fields) != n_columns:
+            _skip_row(counters, 'field_count', f"Advertencia: Linea {line_num} tiene {len(fields)} campos (se esperaban {n_columns}). Se omite.", quiet, skipped)
+            continue
+
+        try:
+            start = int(float(fields[i_start]))
+            end = int(float(fields[i_end]))
+            extras = tuple(convert(fields[i]) for i, convert in i_extra)
+        except ValueError as e:
+            _skip_row(counters, 'parse_error', f"Advertencia: Error procesando linea {line_num}: {str(e)}. Se omite.", quiet, skipped)
+            continue
+
+        if start > end:
+            _skip_row(counters, 'start_after_end', f"Advertencia: Linea {line_num} tiene coordenadas invalidas ({start} > {end}). Se omite.", quiet, skipped)
+            continue
+
+        row = (fields[i_tf], start, end, fields[i_dataset], fields[i_number])
+        yield row + extras if i_extra else row
+
+    if counters is not None:
+        counters['rows_read'] = counters.get('rows_read', 0) + line_num - 1
+
+
+def parse_peaks_table(peak_file_path, counters=None, quiet=False, summits=False, skipped=None, strand=None):
+    """
+    Analiza el archivo de picos en una sola pasada y devuelve una PeakTable columnar.
+
+    Aplica las mismas validaciones y mensajes que parse_peaks, pero resuelve
+    los índices de columna una sola vez desde el encabezado y guarda las
+    coordenadas directamente en arreglos tipados en lugar de crear un
+    diccionario y una tupla por línea. Los nombres de TF, Dataset_Ids y
+    Peak_number se internan en tablas para no repetir cadenas.
+
+    Args:
+        peak_file_path (str): Ruta al archivo TSV de picos.
+        counters (dict): Contadores de filas leídas y omitidas (ver parse_peaks).
+        quiet (bool): No imprime un aviso por cada fila omitida.
+        summits (bool): Lee también Peak_center y Max_Fold_Enrichment (columnas
+                        obligatorias en ese caso), para summit_windows y top_k.
+        skipped (list): Si se indica, recibe (motivo, aviso) de cada fila omitida.
+        strand (dict): {columna: conversión} de la que se obtiene la hebra de
+                       cada fila: {'Strand': parse_strand} o
+                       {'Proximal_genes': strand_from_genes(...)}.
+
+    Returns:
+        PeakTable: Tabla columnar con los picos válidos.
+    """
+    extra_columns = dict(SUMMIT_COLUMNS) if summits else {}
+    extra_columns.update(strand or {})
+    starts = array('q')
+    ends = array('q')
+    tf_codes = array('i')
+    dataset_codes = array('i')
+    peak_numbers = []
+    centers = array('q')
+    scores = array('d')
+    strands = array('b')
+
+    # Tablas de internado: valor -> código
+    tf_index = {}
+    dataset_index = {}
+    number_index = {}
+
+    with open(peak_file_path) as f:
+        for tf_name, start, end, dataset, number, *extras in _iter_rows(f, counters, quiet, extra_columns or None, skipped):
+            starts.append(start)
+            ends.append(end)
+            tf_codes.append(tf_index.setdefault(tf_name, len(tf_index)))
+            dataset_codes.append(dataset_index.setdefault(dataset, len(dataset_index)))
+            peak_numbers.append(number_index.setdefault(number, number))
+            if summits:
+                centers.append(extras[0])
+                scores.append(extras[1])
+            if strand:
+                strands.append(extras[-1])
+
+    return PeakTable(
+        starts=np.frombuffer(starts, dtype=np.int64),
+        ends=np.frombuffer(ends, dtype=np.int64),
+        tf_codes=np.frombuffer(tf_codes, dtype=np.int32),
+        tf_names=list(tf_index),
+        dataset_codes=np.frombuffer(dataset_codes, dtype=np.int32),
+        datasets=list(dataset_index),
+        peak_numbers=peak_numbers,
+        centers=np.frombuffer(centers, dtype=np.int64) if summits else None,
+        scores=np.frombuffer(scores, dtype=np.float64) if summits else None,
+        strands=np.frombuffer(strands, dtype=np.int8) if strand else None,
+    )
+
+
+def iter_peak_chunks(peak_file_path, chunk_size=100000, counters=None, quiet=False):
+    """
+    Lee el archivo de picos por bloques acotados, sin materializar toda la tabla.
+
+    Args:
+        peak_file_path (str): Ruta al archivo TSV de picos.
+        chunk_size (int): Número máximo de picos válidos por bloque.
+        counters (dict): Contadores de filas leídas y omitidas (ver parse_peaks).
+        quiet (bool): No imprime un aviso por cada fila omitida.
+
+    Yields:
+        tuple: (tf_names, starts, ends, peak_ids) de cada bloque, en orden de
+               archivo; starts y ends son arreglos int64 de NumPy.
+    """
+    with open(peak_file_path) as f:
+        rows = _iter_rows(f, counters, quiet)
+        while True:
+            tf_names = []
+            starts = array('q')
+            ends = array('q')
+            peak_ids = []
+            for tf_name, start, end, dataset, number in rows:
+                tf_names.append(tf_name)
+                starts.append(start)
+                ends.append(end)
+                peak_ids.append(f"{dataset}_{number}")
+                if len(tf_names) == chunk_size:
+                    break
+            if not tf_names:
+                return
+            yield tf_names, np.frombuffer(starts, dtype=np.int64), np.frombuffer(ends, dtype=np.int64), peak_ids
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# Cache binaria de la tabla de picos (archivo hermano del TSV, '<picos>.peakcache')
+# python src/peaks_cache.py -p data/union_peaks_file.tsv
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+
+import numpy as np
+
+from genome_cache import matches_source, source_fingerprint
+from io_utils import atomic_write
+from peaks import PeakTable, SUMMIT_COLUMNS, parse_peaks_table
+
+# Formato del archivo:
+#   MAGIC (8 bytes) | longitud del encabezado JSON (uint32 little-endian) | encabezado JSON | relleno | arreglos
+# El encabezado guarda la huella del TSV (tamaño, mtime, SHA-256), las tablas de cadenas (TFs,
+# Dataset_Ids, Peak_number), las filas omitidas con su aviso y la posición de cada arreglo.
+# Los arreglos son columnas de ancho fijo alineadas a 8 bytes, que se leen con mmap sin copiarlas.
+MAGIC = b'PAPEAK\x01\x00'
+CACHE_SUFFIX = '.peakcache'
+
+# Columnas guardadas: nombre -> tipo de NumPy
+ARRAYS = {
+    'starts': '<i8',
+    'ends': '<i8',
+    'tf_codes': '<i4',
+    'dataset_codes': '<i4',
+    'number_codes': '<i4',
+    'centers': '<i8',
+    'scores': '<f8',
+}
+
+
+def default_cache_path(peak_file_path):
+    """Ruta por defecto de la cache: junto al TSV, con sufijo .peakcache."""
+    return f"{peak_file_path}{CACHE_SUFFIX}"
+
+
+def has_summit_columns(peak_file_path):
+    """Indica si el encabezado del TSV tiene las columnas de SUMMIT_COLUMNS."""
+    with open(peak_file_path) as f:
+        columns = {column.rstrip('\r\n') for column in f.readline().split('\t')}
+    return set(SUMMIT_COLUMNS) <= columns
+
+
+def write_peaks_cache(table, peak_file_path, rows_read, skipped, cache_path=None):
+    """
+    Guarda una PeakTable ya leída como cache binaria del TSV.
+
+    Args:
+        table (PeakTable): Tabla leída de `peak_file_path`.
+        peak_file_path (str): TSV de origen (se guarda su huella).
+        rows_read (int): Filas de datos leídas del TSV.
+        skipped (list): Tuplas (motivo, aviso) de las filas omitidas.
+        cache_path (str): Ruta de salida (por defecto '<picos>.peakcache').
+
+    Returns:
+        str: Ruta de la cache escrita.
+    """
+    cache_path = cache_path or default_cache_path(peak_file_path)
+    number_index = {}
+    number_codes = np.fromiter(
+        (number_index.setdefault(number, len(number_index)) for number in table.peak_numbers),
+        dtype=np.int32, count=table.n_rows,
+    )
+    columns = {
+        'starts': table.starts,
+        'ends': table.ends,
+        'tf_codes': table.tf_codes,
+        'dataset_codes': table.dataset_codes,
+        'number_codes': number_codes,
+    }
+    if table.centers is not None:
+        columns['centers'] = table.centers
+        columns['scores'] = table.scores
+
+    arrays = {}
+    payloads = []
+    offset = 0
+    for name, column in columns.items():
+        data = np.ascontiguousarray(column, dtype=ARRAYS[name]).tobytes()
+        arrays[name] = offset
+        payloads.append(data + b'\0' * (-len(data) % 8))
+        offset += len(data) + (-len(data) % 8)
+
+    header = json.dumps(dict(
+        source_fingerprint(peak_file_path),
+        n_rows=table.n_rows,
+        rows_read=rows_read,
+        summits=table.centers is not None,
+        tf_names=table.tf_names,
+        datasets=table.datasets,
+        peak_numbers=list(number_index),
+        skipped=[list(entry) for entry in skipped],
+        arrays=arrays,
+    )).encode('utf-8')
+    prefix = MAGIC + struct.pack('<I', len(header)) + header
+    prefix += b'\0' * (-len(prefix) % 8)
+    atomic_write(cache_path, prefix + b''.join(payloads))
+    return cache_path
+
+
+def read_peaks_cache(cache_path):
+    """
+    Abre la cache con mmap.
+
+    Returns:
+        tuple: (encabezado, {nombre: arreglo}). Los arreglos son de solo
+               lectura y apuntan directamente al archivo mapeado.
+    """
+    with open(cache_path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"No es una cache de picos valida: {cache_path}")
+        (header_len,) = struct.unpack('<I', f.read(4))
+        header = json.loads(f.read(header_len))
+        data_offset = len(MAGIC) + 4 + header_len
+        data_offset += -data_offset % 8
+        if os.fstat(f.fileno()).st_size == data_offset:
+            buffer = b''  # Tabla sin filas: no hay nada que mapear
+        else:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    n_rows = header['n_rows']
+    arrays = {
+        name: np.frombuffer(buffer, dtype=ARRAYS[name], count=n_rows, offset=data_offset + offset)
+        for name, offset in header['arrays'].items()
+    }
+    return header, arrays
+
+
+def table_from_cache(header, arrays):
+    """Reconstruye la PeakTable a partir del encabezado y los arreglos de la cache."""
+    numbers = np.array(header['peak_numbers'] + [''], dtype=object)[:-1]
+    return PeakTable(
+        starts=arrays['starts'],
+        ends=arrays['ends'],
+        tf_codes=arrays['tf_codes'],
+        tf_names=header['tf_names'],
+        dataset_codes=arrays['dataset_codes'],
+        datasets=header['datasets'],
+        peak_numbers=numbers[arrays['number_codes']].tolist(),
+        centers=arrays.get('centers'),
+        scores=arrays.get('scores'),
+    )
+
+
+def _merge_counters(counters, rows_read, skipped):
+    """Suma a `counters` las filas leídas y las omitidas por motivo."""
+    if counters is None:
+        return
+    counters['rows_read'] = counters.get('rows_read', 0) + rows_read
+    rejected = counters.setdefault('rows_rejected', {}) if skipped else None
+    for reason, _ in skipped:
+        rejected[reason] = rejected.get(reason, 0) + 1
+
+
+def load_peak_table(peak_file_path, counters=None, quiet=False, summits=False, cache_path=None):
+    """
+    Lee la tabla de picos desde la cache binaria o, si no está al día, desde el TSV.
+
+    Si la cache existe y corresponde al TSV actual (ver matches_source), se
+    carga con mmap y se repiten los avisos de las filas omitidas que se
+    guardaron al crearla, de modo que la salida es la misma que al leer el
+    texto. Si no, se lee el TSV con parse_peaks_table y se escribe la cache
+    para la próxima vez (incluyendo Peak_center y Max_Fold_Enrichment si el
+    archivo los tiene). Un error al escribirla solo genera un aviso.
+
+    Args:
+        peak_file_path (str): Ruta al archivo TSV de picos.
+        counters (dict): Contadores de filas leídas y omitidas (ver parse_peaks).
+        quiet (bool): No imprime un aviso por cada fila omitida.
+        summits (bool): Se necesitan Peak_center y Max_Fold_Enrichment.
+        cache_path (str): Ruta de la cache (por defecto '<picos>.peakcache').
+
+    Returns:
+        PeakTable: Tabla columnar con los picos válidos.
+    """
+    cache_path = cache_path or default_cache_path(peak_file_path)
+    if os.path.exists(cache_path):
+        try:
+            header, arrays = read_peaks_cache(cache_path)
+            if matches_source(header, peak_file_path, cache_path) and (header['summits'] or not summits):
+                if not quiet:
+                    for _, message in header['skipped']:
+                        print(message, file=sys.stderr)
+                _merge_counters(counters, header['rows_read'], header['skipped'])
+                return table_from_cache(header, arrays)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Advertencia: Cache de picos ilegible {cache_path}: {str(e)}. Se reconstruye.", file=sys.stderr)
+
+    local_counters = {}
+    skipped = []
+    with_summits = summits or has_summit_columns(peak_file_path)
+    table = parse_peaks_table(peak_file_path, local_counters, quiet, summits=with_summits, skipped=skipped)
+    _merge_counters(counters, local_counters.get('rows_read', 0), skipped)
+    try:
+        write_peaks_cache(table, peak_file_path, local_counters.get('rows_read', 0), skipped, cache_path)
+    except OSError as e:
+        print(f"Advertencia: No se pudo escribir la cache de picos {cache_path}: {str(e)}", file=sys.stderr)
+    return table
+
+
+def parse_args():
+    """
+    Argumentos del comando de cache:
+    - --peaks (-p): Archivo TSV de picos
+    - --cache (-c): Ruta de la cache (por defecto '<picos>.peakcache')
+    """
+    parser = argparse.ArgumentParser(
+        description='Genera la cache binaria de la tabla de picos',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('-p', '--peaks', required=True, help='Archivo TSV con información de picos de ChIP-Seq')
+    parser.add_argument('-c', '--cache', default=None, help='Ruta de la cache (por defecto <picos>.peakcache)')
+    return parser.parse_args()
+
+
+def main():
+    """Crea (o recrea) la cache de picos del TSV indicado."""
+    args = parse_args()
+    peak_file = os.path.abspath(args.peaks)
+    if not os.path.exists(peak_file):
+        print(f"ERROR: Archivo de picos no encontrado: {peak_file}", file=sys.stderr)
+        sys.exit(1)
+
+    cache_path = args.cache or default_cache_path(peak_file)
+    if os.path.exists(cache_path):
+        os.remove(cache_path)
+    counters = {}
+    table = load_peak_table(peak_file, counters, quiet=True, cache_path=cache_path)
+    print(f"Cache de picos escrita en {cache_path} ({table.n_rows} picos de {len(table)} TFs, "
+          f"{counters['rows_read'] - table.n_rows} filas omitidas)")
+
+
+if __name__ == '__main__':
+    main()
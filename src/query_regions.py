@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# Consulta por lotes de regiones contra el índice de intervalos de los picos
+# python src/query_regions.py -p data/union_peaks_file.tsv -r regiones.tsv -o tfs_por_region.tsv
+
+import argparse
+import os
+import sys
+import time
+
+from intervals import IntervalIndex, merge_peaks_dict
+from peaks import parse_peaks_table
+
+
+def read_regions(regions_file_path):
+    """
+    Lee el archivo de regiones.
+
+    Formato: una región por línea, separada por tabuladores: inicio, fin y
+    opcionalmente una etiqueta (coordenadas 1-based inclusivas, como las de
+    los picos). Se ignoran líneas vacías y las que empiezan con '#'.
+
+    Returns:
+        list: Tuplas (etiqueta, inicio, fin). Si no hay etiqueta se usa 'inicio-fin'.
+    """
+    regions = []
+    with open(regions_file_path) as f:
+        for line_num, line in enumerate(f, 1):
+            if not line.strip() or line.startswith('#'):
+                continue
+            fields = line.rstrip('\r\n').split('\t')
+            try:
+                start, end = int(float(fields[0])), int(float(fields[1]))
+            except (ValueError, IndexError) as e:
+                print(f"Advertencia: Region invalida en linea {line_num}: {str(e)}. Se omite.", file=sys.stderr)
+                continue
+            if start > end:
+                print(f"Advertencia: Linea {line_num} tiene coordenadas invalidas ({start} > {end}). Se omite.", file=sys.stderr)
+                continue
+            label = fields[2] if len(fields) > 2 and fields[2] else f"{start}-{end}"
+            regions.append((label, start, end))
+    return regions
+
+
+def parse_args():
+    """
+    Argumentos de la consulta de regiones:
+    - --peaks (-p): Archivo TSV con datos de picos ChIP-Seq
+    - --regions (-r): Archivo TSV con las regiones a consultar
+    - --output (-o): Archivo de salida (por defecto, salida estándar)
+    - --merge-gap: Fusiona antes los picos de cada TF separados por a lo sumo N pb
+    - --detail: Una línea por pico solapado en lugar de un resumen por región
+    """
+    parser = argparse.ArgumentParser(
+        description='Consulta qué TFs tienen picos dentro de un conjunto de regiones del genoma',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        '-p', '--peaks', required=True,
+        help='Archivo TSV con información de picos de ChIP-Seq'
+    )
+    parser.add_argument(
+        '-r', '--regions', required=True,
+        help='Archivo TSV con regiones: inicio, fin y etiqueta opcional (1-based, inclusivas)'
+    )
+    parser.add_argument(
+        '-o', '--output', default=None,
+        help='Archivo TSV de salida (por defecto se escribe en la salida estándar)'
+    )
+    parser.add_argument(
+        '--merge-gap', type=int, default=None,
+        help='Fusiona los picos de cada TF que se solapan o están a lo sumo a N pb antes de consultar'
+    )
+    parser.add_argument(
+        '--detail', action='store_true',
+        help='Escribe una línea por pico solapado (región, TF, inicio, fin, ID)'
+    )
+    return parser.parse_args()
+
+
+def main():
+    """Construye el índice de intervalos y resuelve todas las regiones del archivo."""
+    args = parse_args()
+
+    for path in (args.peaks, args.regions):
+        if not os.path.exists(path):
+            print(f"ERROR: Archivo no encontrado: {os.path.abspath(path)}", file=sys.stderr)
+            sys.exit(1)
+    if args.merge_gap is not None and args.merge_gap < 0:
+        print(f"ERROR: --merge-gap no puede ser negativo (recibido: {args.merge_gap})", file=sys.stderr)
+        sys.exit(1)
+
+    peaks_dict = parse_peaks_table(args.peaks)
+    if args.merge_gap is not None:
+        peaks_dict = merge_peaks_dict(peaks_dict, args.merge_gap)
+    index = IntervalIndex(peaks_dict)
+    regions = read_regions(args.regions)
+
+    out = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        t0 = time.perf_counter()
+        if args.detail:
+            out.write("Region\tTF_name\tPeak_start\tPeak_end\tPeak_id\n")
+            for label, start, end in regions:
+                for tf_name, peak_start, peak_end, peak_id in index.query_peaks(start, end):
+                    out.write(f"{label}\t{tf_name}\t{peak_start}\t{peak_end}\t{peak_id}\n")
+        else:
+            out.write("Region\tStart\tEnd\tN_peaks\tN_TFs\tTFs\n")
+            for label, start, end in regions:
+                hits = index.query(start, end)
+                tfs = index.tfs_of(hits)
+                out.write(f"{label}\t{start}\t{end}\t{len(hits)}\t{len(tfs)}\t{','.join(tfs)}\n")
+        elapsed = time.perf_counter() - t0
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    rate = len(regions) / elapsed if elapsed > 0 else float('inf')
+    print(f"{len(regions)} regiones consultadas contra {len(index)} picos en {elapsed:.3f} s ({rate:.0f} regiones/s)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
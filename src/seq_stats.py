@@ -0,0 +1,172 @@
+import os
+
+import numpy as np
+
+from io_utils import atomic_write, safe_filename
+
+# Reporte de estadísticas por TF y directorio de los modelos de fondo para MEME (-bfile)
+STATS_REPORT = 'sequence_stats.tsv'
+BACKGROUND_DIR = 'background'
+
+# Código de cada byte: A/C/G/T (mayúscula o minúscula) -> 0..3, cualquier otro -> 4
+BASE_CODES = np.full(256, 4, dtype=np.uint8)
+for _code, _bases in enumerate(('Aa', 'Cc', 'Gg', 'Tt')):
+    for _base in _bases:
+        BASE_CODES[ord(_base)] = _code
+BASES = 'ACGT'
+
+STATS_COLUMNS = ('TF_name', 'Sequences', 'Total_bases', 'Min_length', 'Median_length', 'Mean_length',
+                 'Max_length', 'GC_percent', 'N_count', 'Other_count', 'Length_histogram')
+
+
+def background_path(tf_name, output_dir):
+    """Ruta del modelo de fondo de un TF: '{output_dir}/background/{TF}.bg'."""
+    return os.path.join(output_dir, BACKGROUND_DIR, f"{safe_filename(tf_name)}.bg")
+
+
+def encode_words(codes, k):
+    """
+    Codifica en base 4 (A=0 ... T=3) la palabra de longitud k que empieza en cada posición.
+
+    Args:
+        codes (np.ndarray): Códigos uint8 de las bases (ver BASE_CODES).
+        k (int): Longitud de las palabras.
+
+    Returns:
+        tuple: (words, valid). words[i] es el código de la palabra que empieza
+               en i y valid[i] indica si esa ventana no contiene ningún código 4
+               (N, otra base o separador entre secuencias).
+    """
+    n_windows = max(len(codes) - k + 1, 0)
+    invalid = np.concatenate(([0], np.cumsum(codes == 4)))
+    valid = invalid[k:k + n_windows] == invalid[:n_windows]
+    words = np.zeros(n_windows, dtype=np.int64)
+    for offset in range(k):
+        words = words * 4 + (codes[offset:offset + n_windows] & 3)
+    return words, valid
+
+
+def kmer_counts(codes, k):
+    """
+    Cuenta las palabras de longitud k de una secuencia codificada (ver BASE_CODES).
+
+    Las ventanas que contienen un código 4 (N, otra base o el separador entre
+    secuencias) no se cuentan, de modo que ninguna palabra cruza de una
+    secuencia a otra.
+
+    Args:
+        codes (np.ndarray): Códigos uint8 de las bases.
+        k (int): Longitud de las palabras.
+
+    Returns:
+        np.ndarray: Conteos (int64) de las 4**k palabras, indexadas en base 4 (A=0 ... T=3).
+    """
+    words, valid = encode_words(codes, k)
+    return np.bincount(words[valid], minlength=4 ** k)
+
+
+def reverse_complement_index(k):
+    """Índice de la palabra complementaria inversa de cada una de las 4**k palabras."""
+    words = np.arange(4 ** k)
+    rc = np.zeros_like(words)
+    for _ in range(k):
+        rc = rc * 4 + (3 - words % 4)
+        words //= 4
+    return rc
+
+
+def sequence_stats(sequences, markov_order=2, bin_width=50):
+    """
+    Estadísticas de un conjunto de secuencias, calculadas en bloque.
+
+    Las secuencias se unen en un solo buffer de bytes (separadas por '\\n') y
+    se cuentan con np.bincount: bytes para GC y N, y palabras codificadas en
+    base 4 para las frecuencias del modelo de fondo.
+
+    Args:
+        sequences (list): Secuencias (str) de un TF.
+        markov_order (int): Orden del modelo de Markov de fondo; se cuentan las
+                            palabras de longitud 1 a markov_order + 1.
+        bin_width (int): Ancho en pb de las clases del histograma de longitudes.
+
+    Returns:
+        dict: Columnas de STATS_COLUMNS (salvo TF_name) y 'kmers', la lista de
+              conteos de palabras de cada longitud.
+    """
+    lengths = np.fromiter((len(seq) for seq in sequences), dtype=np.int64, count=len(sequences))
+    raw = np.frombuffer('\n'.join(sequences).encode('ascii'), dtype=np.uint8)
+    byte_counts = np.bincount(raw, minlength=256)
+    codes = BASE_CODES[raw]
+    acgt = np.bincount(codes, minlength=5)[:4]
+
+    n_count = int(byte_counts[ord('N')] + byte_counts[ord('n')])
+    gc = int(acgt[1] + acgt[2])
+    histogram = np.bincount(lengths // bin_width) if len(lengths) else np.zeros(0, dtype=np.int64)
+    return {
+        'Sequences': len(sequences),
+        'Total_bases': int(lengths.sum()),
+        'Min_length': int(lengths.min()) if len(lengths) else 0,
+        'Median_length': float(np.median(lengths)) if len(lengths) else 0.0,
+        'Mean_length': float(lengths.mean()) if len(lengths) else 0.0,
+        'Max_length': int(lengths.max()) if len(lengths) else 0,
+        'GC_percent': 100.0 * gc / int(acgt.sum()) if acgt.sum() else 0.0,
+        'N_count': n_count,
+        'Other_count': int(lengths.sum() - acgt.sum()) - n_count,
+        'Length_histogram': ','.join(
+            f"{i * bin_width}-{(i + 1) * bin_width - 1}:{count}"
+            for i, count in enumerate(histogram.tolist()) if count
+        ),
+        'kmers': [kmer_counts(codes, k) for k in range(1, markov_order + 2)],
+    }
+
+
+def format_background(kmers, both_strands=True, pseudocount=1):
+    """
+    Texto del modelo de fondo en el formato de MEME (el de fasta-get-markov).
+
+    Para cada orden m se listan las 4**(m+1) palabras con su frecuencia
+    relativa. Igual que fasta-get-markov, por defecto se suman los conteos de
+    cada palabra y su complementaria inversa y se agrega un pseudoconteo.
+
+    Args:
+        kmers (list): Conteos de palabras de longitud 1, 2, ... (ver sequence_stats).
+        both_strands (bool): Combina cada palabra con su complementaria inversa.
+        pseudocount (float): Pseudoconteo sumado a cada palabra.
+
+    Returns:
+        str: Texto del archivo de fondo.
+    """
+    lines = []
+    for k, counts in enumerate(kmers, start=1):
+        counts = counts.astype(np.float64)
+        if both_strands:
+            counts = counts + counts[reverse_complement_index(k)]
+        freqs = (counts + pseudocount) / (counts.sum() + pseudocount * len(counts))
+        lines.append(f"# order {k - 1}")
+        for word, freq in enumerate(freqs.tolist()):
+            letters = ''.join(BASES[(word >> (2 * (k - 1 - i))) & 3] for i in range(k))
+            lines.append(f"{letters} {freq:.3e}")
+    return '\n'.join(lines) + '\n'
+
+
+def write_stats_report(tf_stats, output_dir):
+    """
+    Escribe el TSV de estadísticas por TF y el modelo de fondo de cada uno.
+
+    Args:
+        tf_stats (dict): {tf_name: resultado de sequence_stats}, en el orden del reporte.
+        output_dir (str): Directorio de salida.
+
+    Returns:
+        str: Ruta del reporte escrito.
+    """
+    os.makedirs(os.path.join(output_dir, BACKGROUND_DIR), exist_ok=True)
+    rows = ['\t'.join(STATS_COLUMNS)]
+    for tf_name, stats in tf_stats.items():
+        values = [tf_name] + [stats[column] for column in STATS_COLUMNS[1:]]
+        rows.append('\t'.join(f"{value:.2f}" if isinstance(value, float) else str(value) for value in values))
+        atomic_write(background_path(tf_name, output_dir), format_background(stats['kmers']).encode('ascii'))
+
+    report_path = os.path.join(output_dir, STATS_REPORT)
+    atomic_write(report_path, ('\n'.join(rows) + '\n').encode('utf-8'))
+    return report_path
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+# Servidor residente de extracción: carga una vez el genoma y los picos y atiende peticiones
+# python src/server.py -p data/union_peaks_file.tsv -g data/E_coli_K12_MG1655_U00096.3.fasta
+# Desde otra terminal (ver client.py):
+# python src/client.py -p data/union_peaks_file.tsv -g data/E_coli_K12_MG1655_U00096.3.fasta -o results/
+
+import argparse
+import asyncio
+import io
+import ipaddress
+import json
+import os
+import signal
+import socket
+import stat
+import sys
+
+import numpy as np
+
+from client import DEFAULT_SOCKET, MAX_REQUEST_BYTES, SOCKET_DIR
+from extractor import extract_batch, extract_sequences, sliceable_genome
+from io_utils import format_fasta
+from main import load_reference
+from manifest import genome_fingerprint
+from metrics import RunMetrics, format_rejected_rows
+from peaks import peak_batch
+from peaks_cache import load_peak_table
+
+
+class LoadedPeaks:
+    """
+    Picos cargados en el servidor: tabla, arreglos por TF y FASTA ya armados.
+
+    Se arma completo antes de publicarlo y PeakServer.load_peaks lo
+    reemplaza con una sola asignación, de modo que una petición atendida
+    mientras se recargan los picos (en otro hilo) ve el estado anterior o
+    el nuevo, nunca una mezcla de ambos. 'extract' con otro archivo de
+    picos arma uno propio sin publicarlo.
+
+    Atributos:
+        peak_file (str): Archivo de picos leído.
+        peak_mtime (int): mtime (ns) del archivo al leerlo.
+        peaks (PeakTable): Tabla de picos.
+        tfs (dict): {tf_name: (peak_ids, starts, ends)}.
+        counters (dict): Filas leídas y omitidas (ver parse_peaks).
+        fasta_cache (dict): {(tf_name, line_width): (encabezado, FASTA)} ya armados.
+    """
+
+    def __init__(self, peak_file):
+        self.peak_file = peak_file
+        self.peak_mtime = os.stat(peak_file).st_mtime_ns
+        self.counters = {}
+        self.peaks = load_peak_table(peak_file, self.counters, quiet=True)
+        tf_names, offsets, starts, ends, peak_ids = peak_batch(self.peaks)
+        bounds = offsets.tolist()
+        self.tfs = {
+            tf_name: (peak_ids[lo:hi], starts[lo:hi], ends[lo:hi])
+            for tf_name, lo, hi in zip(tf_names, bounds, bounds[1:])
+        }
+        self.fasta_cache = {}
+
+
+class PeakServer:
+    """
+    Estado del servidor: genoma (la vista del backend) y picos agrupados por TF.
+
+    Las peticiones son diccionarios con la operación en 'op' y se resuelven
+    con handle(), que devuelve (encabezado, contenido en bytes). El FASTA
+    de cada TF se arma la primera vez que se pide y queda guardado hasta
+    que se vuelven a leer los picos. Cada operación toma al empezar los
+    picos cargados (LoadedPeaks) y trabaja solo con ellos; solo 'reload'
+    los reemplaza.
+
+    Operaciones:
+        status: Genoma y archivo de picos cargados, número de TFs y picos.
+        fasta: FASTA de un TF ('tf', 'line_width').
+        regions: FASTA de una lista de regiones [etiqueta, inicio, fin] ('regions', 'line_width').
+        reload: Vuelve a leer el archivo de picos ('peaks', o el cargado).
+        extract: Escribe un FASTA por TF en 'outdir', igual que main.py. Si
+                 'peaks' no es el archivo cargado (o cambió), lo lee solo
+                 para esta petición.
+        shutdown: Detiene el servidor.
+    """
+
+    def __init__(self, genome_file, genome_seq, peak_file, contig=None):
+        self.genome_file = genome_file
+        self.contig = contig
+        # Vista del backend (mmap con .fai o cache de 2 bits) sin copiarla; extract_batch lee cada región
+        self.genome = sliceable_genome(genome_seq)
+        self.shutdown_requested = None
+        self.load_peaks(peak_file)
+
+    def load_peaks(self, peak_file):
+        """Lee el archivo de picos (o su cache binaria) y publica los picos nuevos en una sola asignación."""
+        self.loaded = LoadedPeaks(peak_file)
+        return self.loaded
+
+    def peaks_changed(self, peak_file):
+        """Indica si hay que volver a leer los picos (otro archivo o modificado desde la carga)."""
+        loaded = self.loaded
+        return peak_file != loaded.peak_file or os.stat(peak_file).st_mtime_ns != loaded.peak_mtime
+
+    def status(self, request):
+        loaded = self.loaded
+        header = {
+            'genome': self.genome_file,
+            'genome_length': len(self.genome),
+            'peaks': loaded.peak_file,
+            'tfs': len(loaded.tfs),
+            'rows': sum(len(peak_ids) for peak_ids, _, _ in loaded.tfs.values()),
+            'rows_rejected': loaded.counters.get('rows_rejected', {}),
+        }
+        text = "".join(f"{key}\t{value}\n" for key, value in header.items())
+        return header, text.encode('utf-8')
+
+    def fasta(self, request):
+        loaded = self.loaded
+        tf_name = request['tf']
+        line_width = request.get('line_width') or None
+        key = (tf_name, line_width)
+        cached = loaded.fasta_cache.get(key)
+        if cached is None:
+            if tf_name not in loaded.tfs:
+                raise ValueError(f"TF '{tf_name}' sin picos en {loaded.peak_file}")
+            peak_ids, starts, ends = loaded.tfs[tf_name]
+            in_bounds, sequences = extract_batch(self.genome, starts, ends)
+            kept = np.flatnonzero(in_bounds).tolist()
+            records = [
+                (peak_ids[i], start, end, seq)
+                for i, start, end, seq in zip(kept, starts[in_bounds].tolist(), ends[in_bounds].tolist(), sequences)
+            ]
+            cached = ({'sequences': len(records), 'rejected': len(peak_ids) - len(records)},
+                      format_fasta(records, line_width).encode('utf-8'))
+            loaded.fasta_cache[key] = cached
+        return cached
+
+    def regions(self, request):
+        # Cada región es [etiqueta, inicio, fin], como las devuelve query_regions.read_regions
+        regions = request['regions']
+        starts = np.array([start for _, start, _ in regions], dtype=np.int64)
+        ends = np.array([end for _, _, end in regions], dtype=np.int64)
+        in_bounds, sequences = extract_batch(self.genome, starts, ends)
+        kept = [region for region, keep in zip(regions, in_bounds.tolist()) if keep]
+        records = [(label, start, end, seq) for (label, start, end), seq in zip(kept, sequences)]
+        header = {'sequences': len(records), 'rejected': len(regions) - len(records)}
+        return header, format_fasta(records, request.get('line_width') or None).encode('utf-8')
+
+    def reload(self, request):
+        peak_file = request.get('peaks') or self.loaded.peak_file
+        loaded = self.load_peaks(peak_file)
+        message = f"Picos recargados: {len(loaded.tfs)} TFs desde {peak_file}"
+        return {'tfs': len(loaded.tfs), 'message': message}, b''
+
+    def extract(self, request):
+        if request['genome'] != self.genome_file:
+            raise ValueError(f"El servidor tiene cargado otro genoma ({self.genome_file})")
+        # Otros picos se leen solo para esta petición: los cargados cambian únicamente con 'reload'
+        loaded = LoadedPeaks(request['peaks']) if self.peaks_changed(request['peaks']) else self.loaded
+        if not loaded.tfs:
+            raise ValueError("No se encontraron picos validos en el archivo")
+
+        output_dir = request['outdir']
+        os.makedirs(output_dir, exist_ok=True)
+        metrics = RunMetrics()
+        out, err = io.StringIO(), io.StringIO()
+        incremental = request.get('incremental', False)
+        genome_hash = genome_fingerprint(self.genome_file, self.contig) if incremental else None
+        extract_sequences(
+            self.genome, loaded.peaks, output_dir,
+            write_options=request.get('write_options'), incremental=incremental,
+            dedup=request.get('dedup', False), metrics=metrics, genome_hash=genome_hash, out=out, err=err
+        )
+        header = {'counters': metrics.counters, 'message': err.getvalue().rstrip('\n')}
+        return header, out.getvalue().encode('utf-8')
+
+    def shutdown(self, request):
+        self.shutdown_requested.set()
+        return {'message': "Servidor detenido"}, b''
+
+    # Operaciones que modifican el estado o escriben archivos: se ejecutan de a una en un hilo aparte
+    BLOCKING = ('reload', 'extract')
+    # Operaciones que leen del genoma: en un hilo aparte salvo que el FASTA ya esté armado
+    SLICING = ('fasta', 'regions')
+
+    def is_cached(self, request):
+        """Indica si la petición se responde con un FASTA ya armado, sin leer el genoma."""
+        key = (request.get('tf'), request.get('line_width') or None)
+        return request.get('op') == 'fasta' and key in self.loaded.fasta_cache
+
+    def handle(self, request):
+        """Resuelve una petición y devuelve (encabezado, contenido)."""
+        if request.get('op') not in OPERATIONS:
+            raise ValueError(f"Operacion desconocida: {request.get('op')}")
+        return getattr(self, request['op'])(request)
+
+    async def serve_client(self, reader, writer):
+        """Atiende las peticiones de un cliente hasta que cierre la conexión."""
+        loop = asyncio.get_running_loop()
+        self._clients[asyncio.current_task()] = writer
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    # Línea más larga que MAX_REQUEST_BYTES: se responde con el error y se cierra,
+                    # porque el resto de la línea ya no se puede separar de la petición siguiente
+                    error = f"Peticion demasiado grande (maximo {MAX_REQUEST_BYTES} bytes por linea)"
+                    writer.write(json.dumps({'ok': False, 'error': error, 'bytes': 0}).encode('utf-8') + b'\n')
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if request.get('op') in self.BLOCKING:
+                        async with self._lock:
+                            header, payload = await loop.run_in_executor(None, self.handle, request)
+                    elif request.get('op') in self.SLICING and not self.is_cached(request):
+                        header, payload = await loop.run_in_executor(None, self.handle, request)
+                    else:
+                        header, payload = self.handle(request)
+                    header = dict(header, ok=True, bytes=len(payload))
+                except Exception as e:  # El error se informa al cliente y el servidor sigue atendiendo
+                    header, payload = {'ok': False, 'error': f"{type(e).__name__}: {str(e)}", 'bytes': 0}, b''
+                writer.write(json.dumps(header).encode('utf-8') + b'\n')
+                if payload:
+                    writer.write(payload)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            del self._clients[asyncio.current_task()]
+            writer.close()
+
+    async def serve(self, socket_path=DEFAULT_SOCKET, host=None, port=None):
+        """
+        Escucha en el socket Unix (o en host:port) hasta recibir 'shutdown' o SIGINT/SIGTERM.
+
+        El socket Unix queda con permisos 0600 (ver prepare_socket).
+
+        Raises:
+            RuntimeError: Si el socket no se puede usar (ver prepare_socket).
+        """
+        self.shutdown_requested = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._clients = {}  # {tarea: writer} de las conexiones abiertas
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.shutdown_requested.set)
+
+        if port is not None:
+            server = await asyncio.start_server(self.serve_client, host or '127.0.0.1', port, limit=MAX_REQUEST_BYTES)
+            where = f"{host or '127.0.0.1'}:{port}"
+        else:
+            prepare_socket(socket_path)
+            server = await asyncio.start_unix_server(self.serve_client, socket_path, limit=MAX_REQUEST_BYTES)
+            os.chmod(socket_path, 0o600)
+            where = socket_path
+        print(f"Servidor escuchando en {where} ({len(self.loaded.tfs)} TFs, genoma de {len(self.genome)} pb)", flush=True)
+
+        async with server:
+            await self.shutdown_requested.wait()
+            # Cerrar las conexiones abiertas y esperar a que terminen sus peticiones en curso, para
+            # que asyncio.run no cancele las tareas de los clientes a mitad de una lectura
+            clients = list(self._clients.items())
+            for _, writer in clients:
+                writer.close()
+            await asyncio.gather(*(task for task, _ in clients), return_exceptions=True)
+        if port is None and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+# Operaciones que se pueden pedir al servidor
+OPERATIONS = ('status', 'fasta', 'regions', 'reload', 'extract', 'shutdown')
+
+
+def prepare_socket(socket_path):
+    """
+    Deja libre la ruta del socket Unix antes de escuchar en ella.
+
+    El directorio del socket por defecto se crea con permisos 0700 y se
+    rechaza si es de otro usuario o lo pueden abrir otros. Un socket que
+    ya existe se prueba conectándose: si responde otro servidor no se toca;
+    si nadie escucha (queda de una ejecución anterior) se elimina.
+
+    Raises:
+        RuntimeError: Si el directorio no es seguro, la ruta existe y no es
+                      un socket, o ya hay un servidor escuchando.
+    """
+    directory = os.path.dirname(os.path.abspath(socket_path))
+    if directory == os.path.abspath(SOCKET_DIR):
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        info = os.lstat(directory)
+        if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+            raise RuntimeError(f"El directorio del socket {directory} debe ser del usuario y tener permisos 0700")
+
+    if not os.path.lexists(socket_path):
+        return
+    if not stat.S_ISSOCK(os.lstat(socket_path).st_mode):
+        raise RuntimeError(f"{socket_path} existe y no es un socket")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except OSError:
+        os.remove(socket_path)  # Socket de una ejecución anterior
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"Ya hay un servidor escuchando en {socket_path}")
+
+
+def is_loopback(host):
+    """Indica si host es una dirección local ('localhost', 127.0.0.0/8 o ::1)."""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def parse_args():
+    """
+    Argumentos del servidor:
+    - --peaks (-p): Archivo TSV con datos de picos ChIP-Seq
+    - --genome (-g): Archivo FASTA con el genoma de referencia
+    - --genome-backend, --contig, --no-cache: Carga del genoma, como en main.py
+    - --socket: Socket Unix en el que escuchar
+    - --host, --port: Escuchar en TCP (solo direcciones locales) en lugar del socket
+    """
+    parser = argparse.ArgumentParser(
+        description='Servidor residente que mantiene cargados el genoma y los picos para extraer secuencias',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('-p', '--peaks', required=True, help='Archivo TSV con información de picos de ChIP-Seq')
+    parser.add_argument('-g', '--genome', required=True, help='Archivo FASTA con la secuencia del genoma de referencia')
+    parser.add_argument('--genome-backend', choices=('builtin', 'biopython', 'mmap'), default='builtin',
+                        help='Forma de cargar el genoma: lector FASTA propio, Bio.SeqIO o mmap con indice .fai')
+    parser.add_argument('--contig', default=None, help='Registro del FASTA a usar (por defecto, el primero)')
+    parser.add_argument('--no-cache', action='store_true', help='Ignora la cache binaria del genoma')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET, help='Socket Unix en el que escuchar')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='Dirección TCP si se usa --port; solo locales, el servidor no tiene autenticación')
+    parser.add_argument('--port', type=int, default=None, help='Escucha en este puerto TCP en lugar del socket Unix')
+    return parser.parse_args()
+
+
+def main():
+    """Carga el genoma y los picos una sola vez y atiende peticiones hasta que se detenga."""
+    args = parse_args()
+    peak_file = os.path.abspath(args.peaks)
+    genome_file = os.path.abspath(args.genome)
+    for path in (peak_file, genome_file):
+        if not os.path.exists(path):
+            print(f"ERROR: Archivo no encontrado: {path}", file=sys.stderr)
+            sys.exit(1)
+    if args.port is not None and not is_loopback(args.host):
+        print(f"ERROR: --host debe ser una direccion local (127.0.0.1, ::1 o localhost), no {args.host}", file=sys.stderr)
+        sys.exit(1)
+
+    genome_seq = load_reference(args, genome_file)
+    server = PeakServer(genome_file, genome_seq, peak_file, args.contig)
+    if server.loaded.counters.get('rows_rejected'):
+        print(f"Advertencia: Filas omitidas: {format_rejected_rows(server.loaded.counters)}", file=sys.stderr)
+    try:
+        asyncio.run(server.serve(args.socket, args.host, args.port))
+    except RuntimeError as e:
+        print(f"ERROR: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
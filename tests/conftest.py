@@ -0,0 +1,140 @@
+import os
+import random
+import sys
+
+import pytest
+
+# Los módulos de src/ se importan por nombre, como al ejecutar src/main.py
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# Columnas del archivo de picos, en el orden de data/union_peaks_file.tsv
+PEAK_COLUMNS = ['', 'Dataset_Ids', 'TF_name', 'Peak_start', 'Peak_end', 'Peak_center', 'Peak_number',
+                'Max_Fold_Enrichment', 'Max_Norm_Fold_Enrichment', 'Proximal_genes', 'Center_position_type']
+
+GENOME_LENGTH = 5000
+
+
+def random_sequence(length, seed):
+    """Secuencia aleatoria con una corrida de N, una en minúsculas y códigos IUPAC sueltos."""
+    rng = random.Random(seed)
+    bases = [rng.choice('ACGT') for _ in range(length)]
+    bases[100:130] = 'N' * 30
+    bases[400:460] = [base.lower() for base in bases[400:460]]
+    for position in (777, 1500, 3333):
+        if position < length:
+            bases[position] = rng.choice('RYKMSW')
+    return ''.join(bases)
+
+
+def write_fasta(path, records, line_width=60):
+    """Escribe [(nombre, secuencia)] como FASTA con líneas de line_width columnas."""
+    with open(path, 'w') as f:
+        for name, seq in records:
+            f.write(f">{name} registro de prueba\n")
+            for i in range(0, len(seq), line_width):
+                f.write(seq[i:i + line_width] + '\n')
+    return path
+
+
+def write_peaks(path, rows, index_column=True):
+    """
+    Escribe un archivo de picos con las columnas de data/union_peaks_file.tsv.
+
+    Cada fila es (dataset, tf, start, end, center, number, fold) o una cadena
+    ya formateada (para filas mal formadas). Con index_column=False se omite
+    la primera columna (sin nombre), que el extractor original no admite.
+    """
+    columns = PEAK_COLUMNS if index_column else PEAK_COLUMNS[1:]
+    with open(path, 'w') as f:
+        f.write('\t'.join(columns) + '\n')
+        for i, row in enumerate(rows):
+            if isinstance(row, str):
+                f.write(row + '\n')
+                continue
+            dataset, tf_name, start, end, center, number, fold = row
+            fields = [dataset, tf_name, float(start), float(end), float(center), number, fold, 1.0,
+                      'geneA,geneB', 'intergenic']
+            if index_column:
+                fields.insert(0, i)
+            f.write('\t'.join(str(field) for field in fields) + '\n')
+    return path
+
+
+def sample_peak_rows(genome_length=GENOME_LENGTH, seed=1):
+    """
+    Picos de varios TFs con los casos que la extracción debe respetar: intervalos
+    compartidos entre TFs, picos fuera del genoma, un TF sin picos válidos y
+    filas mal formadas.
+    """
+    rng = random.Random(seed)
+    rows = []
+    for tf_index, tf_name in enumerate(['AraC', 'CRP', 'Fur', 'IHF-alpha', 'LexA']):
+        for number in range(1, 13):
+            start = rng.randint(1, genome_length - 400)
+            end = start + rng.randint(0, 350)
+            rows.append((f"DS{tf_index}_a,DS{tf_index}_b", tf_name, start, end, (start + end) // 2, number,
+                         round(rng.uniform(1, 100), 2)))
+    # El mismo intervalo en varios TFs y datasets
+    for tf_name in ('AraC', 'CRP', 'LexA'):
+        rows.append((f"shared_{tf_name}", tf_name, 1200, 1450, 1325, 99, 50.0))
+    # Bordes del genoma y picos fuera de él
+    rows.append(('edge', 'Fur', 1, 10, 5, 100, 3.0))
+    rows.append(('edge', 'Fur', genome_length - 9, genome_length, genome_length - 5, 101, 3.0))
+    rows.append(('edge', 'Fur', genome_length - 5, genome_length + 20, genome_length, 102, 3.0))
+    rows.append(('edge', 'CRP', 0, 30, 15, 103, 3.0))
+    rows.append(('out', 'OxyR', genome_length + 100, genome_length + 200, genome_length + 150, 1, 2.0))
+    # Filas que el parser omite
+    rows.append('bad\tonly\tthree')
+    rows.append(f"x\tDSX\tCRP\t500.0\t400.0\t450.0\t7\t1.0\t1.0\tgeneA\tintergenic")
+    rows.append(f"x\tDSX\tCRP\tabc\t400.0\t450.0\t8\t1.0\t1.0\tgeneA\tintergenic")
+    return rows
+
+
+@pytest.fixture
+def genome_seq():
+    """Secuencia del primer registro del genoma de prueba."""
+    return random_sequence(GENOME_LENGTH, seed=7)
+
+
+@pytest.fixture
+def genome_file(tmp_path, genome_seq):
+    """FASTA de prueba con dos registros; el primero es genome_seq."""
+    return write_fasta(str(tmp_path / 'genoma.fa'), [('chr', genome_seq), ('plasmido', random_sequence(900, 8))])
+
+
+@pytest.fixture
+def peaks_file(tmp_path):
+    """Archivo de picos de prueba (ver sample_peak_rows)."""
+    return write_peaks(str(tmp_path / 'picos.tsv'), sample_peak_rows())
+
+
+def run_main(argv, module='main'):
+    """
+    Ejecuta main() de un módulo de src/ con los argumentos dados.
+
+    Returns:
+        int: Código de salida (0 si main() termina sin sys.exit).
+    """
+    cli = __import__(module)
+    saved = sys.argv
+    sys.argv = [f"{module}.py"] + [str(arg) for arg in argv]
+    try:
+        cli.main()
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else 1
+    finally:
+        sys.argv = saved
+    return 0
+
+
+def read_outputs(output_dir, suffixes=('.fa', '.fa.gz')):
+    """Devuelve {nombre de archivo: bytes} de los FASTA de un directorio de salida."""
+    outputs = {}
+    for name in sorted(os.listdir(output_dir)):
+        if name.endswith(suffixes):
+            with open(os.path.join(output_dir, name), 'rb') as f:
+                outputs[name] = f.read()
+    return outputs
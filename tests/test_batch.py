@@ -0,0 +1,71 @@
+import gzip
+import json
+
+from batch import BATCH_REPORT, BATCH_SUMMARY, RUN_LOG, genome_name, read_genome_list
+from conftest import random_sequence, read_outputs, run_main, write_fasta
+
+
+def test_genome_name_and_list(tmp_path):
+    assert genome_name('/datos/E_coli.fasta') == 'E_coli'
+    assert genome_name('/datos/E_coli.fasta.gz') == 'E_coli.fasta.gz'
+    assert genome_name('cepa.1.fna') == 'cepa.1'
+
+    genome_list = tmp_path / 'lista.txt'
+    genome_list.write_text('# genomas\n\ngenomas/k12.fa\nsakai\tgenomas/o157.fasta\n/abs/cepa.fna\n')
+    assert read_genome_list(str(genome_list)) == [
+        ('k12', str(tmp_path / 'genomas' / 'k12.fa')),
+        ('sakai', str(tmp_path / 'genomas' / 'o157.fasta')),
+        ('cepa', '/abs/cepa.fna'),
+    ]
+
+
+def test_batch_matches_single_genome_runs(genome_file, peaks_file, tmp_path, capsys):
+    other = write_fasta(str(tmp_path / 'otra.fa'), [('chr2', random_sequence(4000, 21))])
+    genome_list = tmp_path / 'lista.txt'
+    genome_list.write_text(f"k12\t{genome_file}\n{other}\n")
+    output_dir = tmp_path / 'lote'
+
+    assert run_main(['-p', peaks_file, '--genome-list', genome_list, '-o', output_dir, '--genome-jobs', '2']) == 0
+    for name, path in (('k12', genome_file), ('otra', other)):
+        assert run_main(['-p', peaks_file, '-g', path, '-o', tmp_path / name]) == 0
+        assert read_outputs(output_dir / name) == read_outputs(tmp_path / name)
+        assert 'secuencias extraidas' in (output_dir / name / RUN_LOG).read_text()
+
+    report = json.loads((output_dir / BATCH_REPORT).read_text())
+    assert [result['genome'] for result in report['genomes']] == ['k12', 'otra']
+    assert all(result['status'] == 'ok' for result in report['genomes'])
+    assert report['rows_rejected'] == {'field_count': 1, 'parse_error': 1, 'start_after_end': 1}
+    header, *rows = (output_dir / BATCH_SUMMARY).read_text().splitlines()
+    assert header.startswith('Genome\tStatus\tGenome_length')
+    assert [row.split('\t')[:3] for row in rows] == [['k12', 'ok', '5000'], ['otra', 'ok', '4000']]
+
+
+def test_batch_reports_failed_genome(genome_file, peaks_file, tmp_path, capsys):
+    broken = tmp_path / 'roto.fa'
+    broken.write_text('ACGT\n>chr\nACGT\n')
+    output_dir = tmp_path / 'lote'
+
+    assert run_main(['-p', peaks_file, '-g', genome_file, broken, '-o', output_dir, '--genome-jobs', '1']) == 1
+    assert 'Fallaron 1 genomas: roto' in capsys.readouterr().err
+    statuses = {result['genome']: result['status'] for result in json.loads((output_dir / BATCH_REPORT).read_text())['genomes']}
+    assert statuses['genoma'] == 'ok' and statuses['roto'].startswith('error')
+    assert (output_dir / 'genoma' / 'AraC.fa').exists()
+
+
+def test_duplicate_genome_names(genome_file, peaks_file, tmp_path, capsys):
+    (tmp_path / 'copia').mkdir()
+    copy = tmp_path / 'copia' / 'genoma.fa'
+    copy.write_bytes(open(genome_file, 'rb').read())
+
+    assert run_main(['-p', peaks_file, '-g', genome_file, copy, '-o', tmp_path / 'lote']) == 1
+    assert 'Nombres de genoma repetidos: genoma' in capsys.readouterr().err
+    assert not (tmp_path / 'lote').exists()
+
+
+def test_gzipped_genome_is_rejected(genome_file, peaks_file, tmp_path, capsys):
+    compressed = tmp_path / 'genoma.fa.gz'
+    compressed.write_bytes(gzip.compress(open(genome_file, 'rb').read()))
+
+    assert run_main(['-p', peaks_file, '-g', genome_file, compressed, '-o', tmp_path / 'lote']) == 1
+    assert 'comprimido con gzip' in capsys.readouterr().err
+    assert not (tmp_path / 'lote').exists()
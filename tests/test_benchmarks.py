@@ -0,0 +1,90 @@
+import os
+import sys
+
+import pytest
+
+from benchmarks.run import STAGES, _run_in_child, compare_with_baseline, prepare_case
+from benchmarks.synthetic import contig_lengths, parse_size, write_genome, write_peaks
+from genome import build_fai
+from peaks import parse_peaks
+from peaks_cache import default_cache_path
+
+
+def test_parse_size():
+    assert parse_size('1M') == 1000000
+    assert parse_size('10k') == 10000
+    assert parse_size('1.5G') == 1500000000
+    assert parse_size('1e6') == 1000000
+    assert parse_size(250) == 250
+
+
+def test_contig_lengths_sum_to_genome():
+    assert contig_lengths(1000, 1) == [1000]
+    assert contig_lengths(1000, 3) == [900, 50, 50]
+    assert sum(contig_lengths(123457, 4)) == 123457
+
+
+def test_write_genome_is_deterministic(tmp_path):
+    first, second, other = tmp_path / 'a.fa', tmp_path / 'b.fa', tmp_path / 'c.fa'
+    lengths = write_genome(first, 10007, n_contigs=3, line_width=70, seed=4, block_lines=7)
+    write_genome(second, 10007, n_contigs=3, line_width=70, seed=4, block_lines=7)
+    write_genome(other, 10007, n_contigs=3, line_width=70, seed=5, block_lines=7)
+
+    assert first.read_bytes() == second.read_bytes() != other.read_bytes()
+    # build_fai rechaza líneas irregulares, así que también valida el formato
+    records = build_fai(str(first))
+    assert list(records) == ['chr', 'plasmid1', 'plasmid2']
+    assert [length for length, *_ in records.values()] == lengths == contig_lengths(10007, 3)
+    assert all(len(line) <= 70 for line in first.read_text().splitlines())
+
+
+def test_write_peaks_stays_in_genome(tmp_path):
+    path = tmp_path / 'picos.tsv'
+    counts = write_peaks(path, 2500, 20000, n_tfs=30, seed=1, block_rows=1000)
+    write_peaks(tmp_path / 'otra.tsv', 2500, 20000, n_tfs=30, seed=1, block_rows=1000)
+
+    assert path.read_bytes() == (tmp_path / 'otra.tsv').read_bytes()
+    peaks = parse_peaks(str(path), quiet=True)
+    assert {tf_name: len(rows) for tf_name, rows in peaks.items()} == counts
+    assert sum(counts.values()) == 2500
+    # Los TFs más frecuentes van primero, como en la tabla real
+    assert counts['tf0000'] > counts.get('tf0029', 0)
+    assert all(1 <= start <= end <= 20000 for rows in peaks.values() for start, end, _ in rows)
+
+
+def test_compare_with_baseline_flags_slowdowns():
+    def result(stage, wall_s):
+        return {'stage': stage, 'variant': 'v', 'genome_size': 10, 'n_contigs': 1, 'n_peaks': 5, 'wall_s': wall_s}
+
+    baseline = {'results': [result('parse', 1.0), result('extract', 2.0), result('write', 0.0)]}
+    results = [result('parse', 1.05), result('extract', 3.0), result('write', 1.0), result('end_to_end', 9.0)]
+
+    assert compare_with_baseline(results, baseline, tolerance=0.1) == [results[1]]
+    assert results[0]['change'] == 0.05 and results[1]['baseline_wall_s'] == 2.0
+    assert 'change' not in results[2] and 'change' not in results[3]
+
+
+@pytest.fixture
+def bench_case(tmp_path, monkeypatch):
+    # end_to_end reemplaza sys.argv; se restaura al terminar
+    monkeypatch.setattr(sys, 'argv', list(sys.argv))
+    return prepare_case(str(tmp_path), 20000, 2, 300, seed=0)
+
+
+def test_prepare_case_reuses_files(bench_case, tmp_path):
+    assert os.path.exists(bench_case['genome'] + '.fai') and os.path.exists(bench_case['cache'])
+    mtimes = {name: os.stat(bench_case[name]).st_mtime_ns for name in ('genome', 'cache', 'peaks')}
+
+    again = prepare_case(str(tmp_path), 20000, 2, 300, seed=0)
+    assert again == bench_case
+    assert {name: os.stat(again[name]).st_mtime_ns for name in mtimes} == mtimes
+
+
+@pytest.mark.parametrize('stage', sorted(STAGES))
+def test_stages_run_in_process(stage, bench_case):
+    for variant in STAGES[stage]:
+        elapsed, units, unit_name, maxrss_kb = _run_in_child(stage, variant, bench_case)
+        assert elapsed >= 0 and units > 0 and unit_name.endswith('/s') and maxrss_kb > 0
+        if stage == 'end_to_end':
+            # Solo la variante 'cached' deja la cache de picos
+            assert os.path.exists(default_cache_path(bench_case['peaks'])) == (variant == 'cached')
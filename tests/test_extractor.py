@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from extractor import balance_groups, extract_batch, extract_sequences, format_dedup_stats
+from genome import load_indexed_genome
+from genome_cache import CachedGenome, build_genome_cache, load_genome_cache
+from peaks import parse_peaks_table
+
+
+def naive_extract(genome_seq, starts, ends):
+    """Extracción pico a pico, como el extractor original."""
+    in_bounds, sequences = [], []
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        ok = start - 1 >= 0 and end <= len(genome_seq)
+        in_bounds.append(ok)
+        if ok:
+            sequences.append(genome_seq[start - 1:end])
+    return np.array(in_bounds), sequences
+
+
+def random_intervals(genome_length, n, seed=0):
+    rng = np.random.default_rng(seed)
+    starts = rng.integers(-20, genome_length + 20, n)
+    ends = starts + rng.integers(0, 300, n)
+    return starts, ends
+
+
+@pytest.mark.parametrize('backend', ['str', 'mmap', 'cache', 'bytes'])
+def test_extract_batch_matches_naive(backend, genome_file, genome_seq):
+    if backend == 'str':
+        genome = genome_seq
+    elif backend == 'mmap':
+        genome = load_indexed_genome(genome_file).seq
+    elif backend == 'cache':
+        genome = load_genome_cache(build_genome_cache(genome_file)).seq
+    else:
+        genome = genome_seq.encode('ascii')
+    starts, ends = random_intervals(len(genome_seq), 500)
+
+    in_bounds, sequences = extract_batch(genome, starts, ends)
+    expected_in_bounds, expected = naive_extract(genome_seq, starts, ends)
+
+    assert np.array_equal(in_bounds, expected_in_bounds)
+    assert sequences == expected
+
+
+def test_cache_fetch_batch_across_blocks(genome_file, genome_seq, monkeypatch):
+    # Bloques pequeños para que las regiones se repartan en varios
+    monkeypatch.setattr(CachedGenome, 'BATCH_BASES', 1000)
+    genome = load_genome_cache(build_genome_cache(genome_file))
+    starts, ends = random_intervals(len(genome_seq), 300, seed=3)
+    starts = np.clip(starts, 0, len(genome_seq))
+    ends = np.clip(ends, 0, len(genome_seq))
+
+    assert genome.fetch_batch('chr', starts, ends) == [genome_seq[s:e] for s, e in zip(starts.tolist(), ends.tolist())]
+
+
+def test_indexed_genome_is_not_materialized(genome_file, peaks_file, tmp_path, monkeypatch):
+    view = load_indexed_genome(genome_file).seq
+    monkeypatch.setattr(type(view), '__str__', lambda self: pytest.fail("se convirtió el contig completo en str"))
+    output_dir = tmp_path / 'out'
+    output_dir.mkdir()
+    extract_sequences(view, parse_peaks_table(peaks_file, quiet=True), str(output_dir), quiet=True)
+
+    assert (output_dir / 'AraC.fa').exists()
+
+
+def test_balance_groups_spreads_heavy_tfs():
+    def task(name, total_bases):
+        return name, [], np.array([1]), np.array([total_bases]), None
+
+    tasks = [task('nac', 900), task('ulaR', 800), task('a', 300), task('b', 300), task('c', 200), task('d', 100)]
+    groups = balance_groups(tasks, 3)
+
+    assert sorted(i for group in groups for i in group) == list(range(len(tasks)))
+    assert not any({0, 1} <= set(group) for group in groups)
+    loads = [sum(int(tasks[i][3][0]) for i in group) for group in groups]
+    assert max(loads) - min(loads) <= 300
+    assert balance_groups(tasks[:2], 4) == [[0], [1]]
+
+
+def test_dedup_extracts_each_interval_once(genome_seq):
+    starts = np.array([1200, 10, 1200, 10, 4990, 1200, 6000])
+    ends = np.array([1450, 20, 1450, 21, 5000, 1450, 6010])
+    stats = {}
+
+    in_bounds, sequences = extract_batch(genome_seq, starts, ends, dedup=True, stats=stats)
+
+    assert sequences == extract_batch(genome_seq, starts, ends)[1]
+    assert in_bounds.tolist() == [True] * 6 + [False]
+    assert stats == {'requested': 6, 'unique': 4}
+    assert format_dedup_stats(stats) == "6 secuencias, 4 intervalos unicos (factor 1.50x, 33.3% de extracciones evitadas)"
+    # Los picos que comparten intervalo reciben la misma cadena, no copias
+    assert sequences[0] is sequences[2] is sequences[5]
@@ -0,0 +1,117 @@
+import os
+
+import numpy as np
+import pytest
+
+from conftest import random_sequence, write_fasta
+from genome import IndexedGenome, build_fai, load_genome, load_indexed_genome, read_first_fasta_record
+
+
+def test_fai_matches_samtools_layout(genome_file, genome_seq):
+    records = build_fai(genome_file)
+
+    assert list(records) == ['chr', 'plasmido']
+    length, offset, line_bases, line_width = records['chr']
+    assert (length, line_bases, line_width) == (len(genome_seq), 60, 61)
+    assert offset == len('>chr registro de prueba\n')
+    assert records['plasmido'][0] == 900
+
+
+def test_indexed_genome_fetch_matches_slicing(genome_file, genome_seq):
+    genome = IndexedGenome(genome_file)
+    try:
+        assert os.path.exists(genome_file + '.fai')
+        rng = np.random.default_rng(0)
+        for start in rng.integers(0, len(genome_seq), 200).tolist():
+            end = start + int(rng.integers(0, 300))
+            assert genome.fetch('chr', start, end) == genome_seq[start:end]
+        # Rebanadas que cruzan saltos de línea y los extremos del contig
+        assert genome.fetch('chr', 59, 61) == genome_seq[59:61]
+        assert genome.fetch('chr', 0, len(genome_seq)) == genome_seq
+        assert genome.fetch('chr', len(genome_seq) - 5, len(genome_seq) + 10) == genome_seq[-5:]
+        assert genome.fetch('plasmido', 0, 900) == random_sequence(900, 8)
+    finally:
+        genome.close()
+
+
+def test_contig_view_behaves_like_seq(genome_file, genome_seq):
+    view = load_indexed_genome(genome_file).seq
+
+    assert len(view) == len(genome_seq)
+    assert view[10:250] == genome_seq[10:250]
+    assert str(view) == genome_seq
+    assert view.slices([0, 400, 4990], [5, 460, 5000]) == [genome_seq[0:5], genome_seq[400:460], genome_seq[4990:]]
+    with pytest.raises(TypeError):
+        view[3]
+
+
+def test_stale_index_is_rebuilt(tmp_path, genome_seq):
+    path = write_fasta(str(tmp_path / 'g.fa'), [('chr', genome_seq)], line_width=60)
+    IndexedGenome(path).close()
+    write_fasta(path, [('chr', genome_seq[:1000])], line_width=70)
+    stat = os.stat(path + '.fai')
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    genome = IndexedGenome(path)
+    try:
+        assert genome.length('chr') == 1000
+        assert genome.fetch('chr', 65, 75) == genome_seq[65:75]
+    finally:
+        genome.close()
+
+
+@pytest.mark.parametrize('text', [
+    '>chr\nACGT\nAC\nACGT\n',
+    # Una línea vacía dentro del registro desplazaría los offsets de las líneas siguientes
+    '>c1\nACGTACGTAC\nACGTACGTAC\n\nTTTTTTTTTT\nGG',
+    '>c1\n\nACGT\n',
+])
+def test_irregular_lines_are_rejected(text, tmp_path):
+    path = tmp_path / 'g.fa'
+    path.write_text(text)
+    with pytest.raises(ValueError):
+        build_fai(str(path))
+
+
+def test_trailing_blank_lines_are_accepted(tmp_path):
+    path = tmp_path / 'g.fa'
+    path.write_text('>c1\nACGTACGTAC\nACG\n\n\n>c2\nTTTT\n\n')
+
+    assert build_fai(str(path)) == {'c1': (13, 4, 10, 11), 'c2': (4, 25, 4, 5)}
+    genome = IndexedGenome(str(path))
+    try:
+        assert genome.fetch('c1', 0, 13) == 'ACGTACGTACACG' and genome.fetch('c2', 0, 4) == 'TTTT'
+    finally:
+        genome.close()
+
+
+def test_builtin_backend_matches_biopython(genome_file, genome_seq):
+    pytest.importorskip('Bio')
+    builtin = load_genome(genome_file, 'builtin')
+    biopython = load_genome(genome_file, 'biopython')
+
+    assert builtin.id == biopython.id == 'chr'
+    assert str(builtin.seq) == str(biopython.seq) == genome_seq
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('>chr uno\r\nAC GT\r\nac\r\n>otro\nTTTT\n', ('chr', 'chr uno', 'ACGTac')),
+    ('\n\n>chr\nACGT', ('chr', 'chr', 'ACGT')),
+    ('>\nACGT\n', ('', '', 'ACGT')),
+])
+def test_read_first_fasta_record(text, expected, tmp_path):
+    path = tmp_path / 'g.fa'
+    path.write_bytes(text.encode())
+
+    record = read_first_fasta_record(str(path))
+    assert (record.id, record.description, record.seq) == expected
+
+
+@pytest.mark.parametrize('text', ['ACGT\n>chr\nACGT\n', 'ACGT\nACGT\n'])
+def test_read_first_fasta_record_rejects_leading_text(text, tmp_path):
+    path = tmp_path / 'g.fa'
+    path.write_text(text)
+    with pytest.raises(ValueError):
+        read_first_fasta_record(str(path))
+    path.write_text('\n')
+    assert read_first_fasta_record(str(path)) is None
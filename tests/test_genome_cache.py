@@ -0,0 +1,68 @@
+import os
+
+import numpy as np
+
+import genome_cache
+from conftest import random_sequence, read_outputs, run_main
+from genome_cache import (build_genome_cache, default_cache_path, is_cache_fresh, load_genome_cache,
+                          read_cache_header)
+
+
+def test_cache_round_trip(genome_file, genome_seq):
+    cache_path = build_genome_cache(genome_file)
+    genome = load_genome_cache(cache_path)
+    try:
+        assert genome.names == ['chr', 'plasmido']
+        assert str(genome.seq) == genome_seq
+        assert str(genome['plasmido']) == random_sequence(900, 8)
+        rng = np.random.default_rng(1)
+        for start in rng.integers(0, len(genome_seq), 300).tolist():
+            end = start + int(rng.integers(0, 200))
+            assert genome.fetch('chr', start, end) == genome_seq[start:end]
+        # Bordes de las corridas de N y de minúsculas
+        for start, end in ((95, 105), (125, 135), (399, 401), (459, 461), (100, 130), (400, 460)):
+            assert genome.fetch('chr', start, end) == genome_seq[start:end]
+    finally:
+        genome.close()
+
+    # Reconstruir sobre una cache existente no deja temporales en el directorio
+    build_genome_cache(genome_file)
+    assert not [name for name in os.listdir(os.path.dirname(cache_path)) if name.endswith('.tmp')]
+
+
+def test_cache_freshness_follows_source_content(genome_file, genome_seq):
+    cache_path = build_genome_cache(genome_file)
+    assert is_cache_fresh(cache_path, genome_file)
+
+    # Mismo tamaño, otro contenido y otro mtime
+    with open(genome_file, 'r+') as f:
+        f.seek(len('>chr registro de prueba\n'))
+        f.write('T' if genome_seq[0] != 'T' else 'A')
+    stat = os.stat(genome_file)
+    os.utime(genome_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert not is_cache_fresh(cache_path, genome_file)
+
+
+def test_touched_source_is_hashed_once(genome_file, monkeypatch):
+    cache_path = build_genome_cache(genome_file)
+    stat = os.stat(genome_file)
+    os.utime(genome_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    hashed = []
+    file_sha256 = genome_cache.file_sha256
+    monkeypatch.setattr(genome_cache, 'file_sha256', lambda path: hashed.append(path) or file_sha256(path))
+    assert is_cache_fresh(cache_path, genome_file)
+    assert is_cache_fresh(cache_path, genome_file)
+
+    assert hashed == [genome_file]
+    header, _ = read_cache_header(cache_path)
+    assert header['source_mtime_ns'] == os.stat(genome_file).st_mtime_ns
+
+
+def test_main_uses_fresh_cache(genome_file, peaks_file, tmp_path, capsys):
+    assert run_main(['-p', peaks_file, '-g', genome_file, '-o', tmp_path / 'texto', '--no-cache']) == 0
+    build_genome_cache(genome_file)
+    assert run_main(['-p', peaks_file, '-g', genome_file, '-o', tmp_path / 'cache']) == 0
+
+    assert f"Usando cache binaria del genoma: {default_cache_path(genome_file)}" in capsys.readouterr().out
+    assert read_outputs(tmp_path / 'cache') == read_outputs(tmp_path / 'texto')
@@ -0,0 +1,58 @@
+import numpy as np
+
+from conftest import run_main
+from intervals import IntervalIndex, merge_intervals, merge_peaks
+from peaks import parse_peaks, parse_peaks_table
+
+
+def brute_force_overlaps(peaks_dict, start, end):
+    return sorted(
+        (tf_name, peak_start, peak_end, peak_id)
+        for tf_name, peaks in peaks_dict.items()
+        for peak_start, peak_end, peak_id in peaks
+        if peak_start <= end and peak_end >= start
+    )
+
+
+def test_interval_index_matches_brute_force(peaks_file):
+    peaks_dict = parse_peaks(peaks_file, quiet=True)
+    index = IntervalIndex(parse_peaks_table(peaks_file, quiet=True))
+    rng = np.random.default_rng(2)
+
+    assert len(index) == sum(len(peaks) for peaks in peaks_dict.values())
+    for start in rng.integers(-50, 5300, 300).tolist():
+        end = start + int(rng.integers(0, 500))
+        expected = brute_force_overlaps(peaks_dict, start, end)
+        assert sorted(index.query_peaks(start, end)) == expected
+        assert index.query_tfs(start, end) == sorted({row[0] for row in expected})
+
+
+def test_merge_intervals_gap():
+    starts = np.array([10, 1, 21, 50, 40])
+    ends = np.array([20, 5, 25, 60, 45])
+
+    _, _, merged_starts, merged_ends = merge_intervals(starts, ends)
+    assert list(zip(merged_starts.tolist(), merged_ends.tolist())) == [(1, 5), (10, 25), (40, 45), (50, 60)]
+    _, _, merged_starts, merged_ends = merge_intervals(starts, ends, gap=4)
+    assert list(zip(merged_starts.tolist(), merged_ends.tolist())) == [(1, 25), (40, 60)]
+
+
+def test_merge_peaks_joins_ids():
+    peaks = [(100, 200, 'b'), (1, 50, 'a'), (150, 300, 'c'), (302, 310, 'd')]
+
+    assert merge_peaks(peaks) == [(1, 50, 'a'), (100, 300, 'b;c'), (302, 310, 'd')]
+    assert merge_peaks(peaks, gap=1) == [(1, 50, 'a'), (100, 310, 'b;c;d')]
+    assert merge_peaks([]) == []
+
+
+def test_query_regions_cli(peaks_file, tmp_path, capsys):
+    regions = tmp_path / 'regiones.tsv'
+    regions.write_text('# inicio\tfin\tetiqueta\n1200\t1300\tcompartida\n6000\t6100\n')
+    output = tmp_path / 'tfs.tsv'
+
+    assert run_main(['-p', peaks_file, '-r', regions, '-o', output], module='query_regions') == 0
+    header, shared, outside = output.read_text().splitlines()
+    assert header == 'Region\tStart\tEnd\tN_peaks\tN_TFs\tTFs'
+    assert shared.startswith('compartida\t1200\t1300\t')
+    assert {'AraC', 'CRP', 'LexA'} <= set(shared.split('\t')[5].split(','))
+    assert outside == '6000-6100\t6000\t6100\t0\t0\t'
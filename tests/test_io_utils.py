@@ -0,0 +1,118 @@
+import gzip
+import hashlib
+import os
+import stat
+import struct
+
+import pytest
+
+from conftest import read_outputs, run_main
+from io_utils import (BGZF_BLOCK_SIZE, BGZF_EOF, FastaHandlePool, atomic_write, bgzf_compress, format_fasta,
+                      write_tf_fastas)
+
+RECORDS = [('DS1_1', 10, 19, 'ACGTACGTAC'), ('DS1_2', 30, 32, 'GGG'), ('DS2_1', 5, 4, '')]
+
+
+def test_format_fasta_line_width():
+    assert format_fasta(RECORDS) == '>DS1_1|10-19\nACGTACGTAC\n>DS1_2|30-32\nGGG\n>DS2_1|5-4\n\n'
+    assert format_fasta(RECORDS[:2], line_width=4) == '>DS1_1|10-19\nACGT\nACGT\nAC\n>DS1_2|30-32\nGGG\n'
+    assert format_fasta(RECORDS[:1], strands=['-']) == '>DS1_1|10-19(-)\nACGTACGTAC\n'
+
+
+def bgzf_blocks(data):
+    """Recorre los bloques BGZF y devuelve el tamaño sin comprimir de cada uno."""
+    sizes = []
+    position = 0
+    while position < len(data):
+        assert data[position:position + 4] == b'\x1f\x8b\x08\x04'
+        assert data[position + 12:position + 14] == b'BC'
+        (block_size,) = struct.unpack('<H', data[position + 16:position + 18])
+        position += block_size + 1
+        (isize,) = struct.unpack('<I', data[position - 4:position])
+        sizes.append(isize)
+    assert position == len(data)
+    return sizes
+
+
+def test_bgzf_blocks_are_bounded_and_terminated():
+    data = os.urandom(BGZF_BLOCK_SIZE * 2 + 123).hex().encode()
+    compressed = bgzf_compress(data)
+
+    assert compressed.endswith(BGZF_EOF)
+    assert gzip.decompress(compressed) == data
+    sizes = bgzf_blocks(compressed)
+    assert sizes[-1] == 0 and all(0 < size <= BGZF_BLOCK_SIZE for size in sizes[:-1])
+
+
+@pytest.mark.parametrize('compression', [None, 'gzip', 'bgzip'])
+def test_write_tf_fastas_round_trip(compression, tmp_path):
+    checksums = {}
+    path = write_tf_fastas('Ara/C', RECORDS, str(tmp_path), line_width=4, compression=compression,
+                           checksums=checksums)
+
+    assert os.path.basename(path) == ('AraC.fa' if compression is None else 'AraC.fa.gz')
+    with open(path, 'rb') as f:
+        data = f.read()
+    assert checksums['Ara/C'] == hashlib.sha256(data).hexdigest()
+    text = data if compression is None else gzip.decompress(data)
+    assert text.decode() == format_fasta(RECORDS, line_width=4)
+    # gzip sin fecha: la misma entrada produce los mismos bytes
+    assert write_tf_fastas('Ara/C', RECORDS, str(tmp_path), line_width=4, compression=compression) == path
+    with open(path, 'rb') as f:
+        assert f.read() == data
+
+
+def test_atomic_write_respects_umask_and_cleans_up(tmp_path):
+    target = tmp_path / 'out.fa'
+    old_umask = os.umask(0o027)
+    try:
+        atomic_write(str(target), b'nuevo')
+    finally:
+        os.umask(old_umask)
+
+    assert target.read_bytes() == b'nuevo'
+    assert stat.S_IMODE(os.stat(target).st_mode) == 0o640
+    assert os.listdir(tmp_path) == ['out.fa']
+
+
+def test_atomic_write_failure_keeps_previous_version(tmp_path, monkeypatch):
+    target = tmp_path / 'out.fa'
+    target.write_bytes(b'anterior')
+
+    def failing_replace(src, dst):
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr(os, 'replace', failing_replace)
+    with pytest.raises(OSError):
+        atomic_write(str(target), b'nuevo')
+    assert target.read_bytes() == b'anterior'
+    assert os.listdir(tmp_path) == ['out.fa']
+
+
+@pytest.mark.parametrize('compression', [None, 'gzip', 'bgzip'])
+def test_handle_pool_appends_match_single_write(compression, tmp_path):
+    pool = FastaHandlePool(str(tmp_path / 'pool'), max_open=1, line_width=4, compression=compression)
+    os.makedirs(pool.output_dir)
+    for record in RECORDS:
+        pool.append('A', [record])
+        pool.append('B', [record])
+    written = pool.finalize()
+
+    for tf_name, path in written.items():
+        with open(path, 'rb') as f:
+            data = f.read()
+        text = data if compression is None else gzip.decompress(data)
+        assert text.decode() == format_fasta(RECORDS, line_width=4)
+        if compression == 'bgzip':
+            assert data.endswith(BGZF_EOF)
+    assert sorted(os.listdir(pool.output_dir)) == sorted(os.path.basename(path) for path in written.values())
+
+
+def test_cli_compressed_output_matches_plain(genome_file, peaks_file, tmp_path, capsys):
+    assert run_main(['-p', peaks_file, '-g', genome_file, '-o', tmp_path / 'plano', '--line-width', '60']) == 0
+    assert run_main(['-p', peaks_file, '-g', genome_file, '-o', tmp_path / 'gz', '--line-width', '60',
+                     '--compress', 'bgzip']) == 0
+
+    plain = read_outputs(tmp_path / 'plano')
+    compressed = read_outputs(tmp_path / 'gz')
+    assert {name[:-len('.gz')]: gzip.decompress(data) for name, data in compressed.items()} == plain
@@ -0,0 +1,88 @@
+import os
+import re
+
+import pytest
+
+from conftest import run_main
+from genome import reverse_complement
+from kmer_index import IUPAC, KmerIndex, default_index_path, is_index_fresh, motif_masks, read_index
+
+
+def naive_find(genome_seq, motif):
+    """Posiciones 0-based del motivo IUPAC en la hebra directa, con una expresión regular."""
+    pattern = ''.join(f"[{IUPAC[symbol]}]" for symbol in motif.upper())
+    return [match.start() for match in re.finditer(f"(?={pattern})", genome_seq.upper())]
+
+
+def motifs_from(genome_seq):
+    """Motivos con ocurrencias seguras: exactos, con códigos IUPAC, más cortos que k y muy degenerados."""
+    exact = genome_seq[2000:2012]
+    return [
+        exact,
+        exact[:3] + 'N' + exact[4:8] + 'R' + exact[9:],
+        genome_seq[410:420].lower(),
+        'ACG',
+        'NNNNNNNNNNA',
+        reverse_complement(genome_seq[3000:3010]),
+    ]
+
+
+@pytest.mark.parametrize('k', [4, 8])
+def test_search_matches_regex_on_both_strands(k, genome_seq):
+    index = KmerIndex.build(genome_seq.encode('ascii'), k)
+
+    for motif in motifs_from(genome_seq):
+        assert index.find(motif).tolist() == naive_find(genome_seq, motif)
+        starts, ends, strands = index.search(motif)
+        expected = sorted([(i + 1, '+') for i in naive_find(genome_seq, motif)]
+                          + [(i + 1, '-') for i in naive_find(genome_seq, reverse_complement(motif.upper()))])
+        assert sorted(zip(starts.tolist(), strands.tolist())) == expected
+        assert (ends - starts + 1).tolist() == [len(motif)] * len(starts)
+        for start, end, strand in zip(starts.tolist()[:5], ends.tolist()[:5], strands.tolist()[:5]):
+            hit = index.sequence(start, end, strand)
+            assert re.fullmatch(''.join(f"[{IUPAC[symbol]}]" for symbol in motif.upper()), hit.upper())
+
+
+def test_invalid_motif():
+    with pytest.raises(ValueError, match='invalido'):
+        motif_masks('ACGX')
+    with pytest.raises(ValueError, match='vacio'):
+        motif_masks('')
+
+
+def test_saved_index_round_trip_and_freshness(genome_file, genome_seq):
+    index_path = default_index_path(genome_file)
+    KmerIndex.build(genome_seq.encode('ascii'), 6).save(index_path, genome_file)
+
+    header, index = read_index(index_path)
+    assert index.k == 6 and index.genome.tobytes() == genome_seq.encode('ascii')
+    assert index.find('TTGACA').tolist() == naive_find(genome_seq, 'TTGACA')
+    assert is_index_fresh(header, genome_file, 6)
+    assert not is_index_fresh(header, genome_file, 8)
+    assert not is_index_fresh(header, genome_file, 6, contig='plasmido')
+
+    with open(genome_file, 'a') as f:
+        f.write('>extra\nACGT\n')
+    assert not is_index_fresh(header, genome_file, 6)
+
+
+def test_cli_stdout_is_only_the_table(genome_file, genome_seq, peaks_file, capsys):
+    motif = genome_seq[1300:1310]
+    argv = ['-g', genome_file, '-m', motif, '-k', '6']
+
+    assert run_main(argv, module='kmer_index') == 0
+    out, err = capsys.readouterr()
+    header, *rows = out.splitlines()
+    assert header == 'Motif\tStrand\tStart\tEnd\tSequence'
+    assert ['+', '1301', '1310', motif] in [row.split('\t')[1:] for row in rows]
+    assert 'guardado en' in err and 'Genoma cargado' in err
+    assert os.path.exists(default_index_path(genome_file))
+
+    # Con el índice ya guardado no se vuelve a cargar el genoma; con -p solo quedan las ocurrencias en picos
+    assert run_main(argv + ['-p', peaks_file, '--tf', 'CRP'], module='kmer_index') == 0
+    out, err = capsys.readouterr()
+    assert 'Genoma cargado' not in err
+    header, *rows = out.splitlines()
+    assert header.endswith('\tTF_name\tPeak_start\tPeak_end\tPeak_id')
+    assert ['+', '1301', '1310', motif, 'CRP', '1200', '1450', 'shared_CRP_99'] in [row.split('\t')[1:] for row in rows]
+    assert all(row.split('\t')[5] == 'CRP' for row in rows)
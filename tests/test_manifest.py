@@ -0,0 +1,68 @@
+import json
+import os
+
+import pytest
+
+from conftest import read_outputs, run_main, sample_peak_rows, write_peaks
+from genome_cache import build_genome_cache, file_sha256
+from manifest import MANIFEST_NAME, genome_fingerprint
+
+
+def incremental(peaks_file, genome_file, output_dir, *extra):
+    return run_main(['-p', peaks_file, '-g', genome_file, '-o', output_dir, '--incremental'] + list(extra))
+
+
+def test_default_run_writes_no_manifest(genome_file, peaks_file, tmp_path, capsys):
+    output_dir = tmp_path / 'out'
+    assert incremental(peaks_file, genome_file, output_dir) == 0
+    assert (output_dir / MANIFEST_NAME).exists()
+
+    # Sin --incremental el manifiesto anterior ya no describiría la salida
+    assert run_main(['-p', peaks_file, '-g', genome_file, '-o', output_dir]) == 0
+    assert not (output_dir / MANIFEST_NAME).exists()
+
+
+@pytest.mark.parametrize('workers', ['1', '3'])
+def test_unchanged_tfs_are_skipped(workers, genome_file, peaks_file, tmp_path, capsys):
+    output_dir = tmp_path / 'out'
+    assert incremental(peaks_file, genome_file, output_dir, '--workers', workers) == 0
+    first = read_outputs(output_dir)
+    manifest = json.loads((output_dir / MANIFEST_NAME).read_text())
+    for name, data in first.items():
+        entry = manifest['tfs'][name[:-len('.fa')]]
+        assert entry['output'] == name
+        assert entry['output_sha256'] == file_sha256(str(output_dir / name))
+    capsys.readouterr()
+
+    assert incremental(peaks_file, genome_file, output_dir, '--workers', workers) == 0
+    assert f"0 TFs por regenerar, {len(manifest['tfs'])} sin cambios" in capsys.readouterr().out
+    assert read_outputs(output_dir) == first
+
+
+def test_changed_peaks_and_tampered_outputs_are_rebuilt(genome_file, peaks_file, tmp_path, capsys):
+    output_dir = tmp_path / 'out'
+    assert incremental(peaks_file, genome_file, output_dir) == 0
+    first = read_outputs(output_dir)
+
+    # Un pico más para LexA y un FASTA de AraC modificado a mano
+    write_peaks(peaks_file, sample_peak_rows() + [('nuevo', 'LexA', 2000, 2100, 2050, 1, 9.0)])
+    (output_dir / 'AraC.fa').write_bytes(b'>editado\nA\n')
+    capsys.readouterr()
+    assert incremental(peaks_file, genome_file, output_dir) == 0
+
+    assert "2 TFs por regenerar" in capsys.readouterr().out
+    outputs = read_outputs(output_dir)
+    assert b'>nuevo_1|2000-2100\n' in outputs.pop('LexA.fa')
+    first.pop('LexA.fa')
+    assert outputs == first
+
+
+def test_genome_fingerprint_uses_cache_header(genome_file):
+    from_file = genome_fingerprint(genome_file)
+    build_genome_cache(genome_file)
+
+    assert genome_fingerprint(genome_file) == from_file
+    assert genome_fingerprint(genome_file, 'plasmido') != from_file
+    with open(genome_file, 'a') as f:
+        f.write('>extra\nACGT\n')
+    assert genome_fingerprint(genome_file) != from_file
@@ -0,0 +1,125 @@
+import gzip
+import os
+import subprocess
+
+import pytest
+
+from conftest import run_main
+from meme_scheduler import (LOG_DIR, STATE_NAME, SUMMARY_NAME, build_jobs, load_state, run_jobs,
+                            write_run_script)
+from seq_stats import BACKGROUND_DIR
+
+# Sustituto de MEME: copia la entrada a {outdir}/entrada.fa; falla o tarda según el nombre del TF
+FAKE_MEME = """#!/bin/sh
+mkdir -p "$3"
+case "$1" in
+    *Falla*) echo "fallo"; exit 3 ;;
+    *Lento*) sleep 5 ;;
+esac
+cat "$1" > "$3/entrada.fa"
+echo "$@" > "$3/args.txt"
+"""
+
+
+@pytest.fixture
+def fake_meme(tmp_path):
+    path = tmp_path / 'meme_falso.sh'
+    path.write_text(FAKE_MEME)
+    path.chmod(0o755)
+    return str(path)
+
+
+@pytest.fixture
+def fasta_dir(tmp_path):
+    fasta_dir = tmp_path / 'fastas'
+    (fasta_dir / BACKGROUND_DIR).mkdir(parents=True)
+    (fasta_dir / 'Corto.fa').write_text('>a|1-4\nACGT\n')
+    (fasta_dir / 'Largo.fa').write_text('>a|1-8\nACGTACGT\n>b|1-4\nACGT\n')
+    with gzip.open(fasta_dir / 'Medio.fa.gz', 'wb') as f:
+        f.write(b'>a|1-6\nAC\nGTAC\n')
+    (fasta_dir / '.Largo.fa.tmp').write_text('>temporal\n')
+    (fasta_dir / BACKGROUND_DIR / 'Corto.bg').write_text('A 0.25\n')
+    return str(fasta_dir)
+
+
+def test_build_jobs_longest_first(fasta_dir, tmp_path):
+    results_dir = str(tmp_path / 'meme')
+    jobs = build_jobs(fasta_dir, results_dir, meme='mi_meme', meme_args='-dna -nmotifs 1')
+
+    assert [(job['tf'], job['length']) for job in jobs] == [('Largo', 12), ('Medio', 6), ('Corto', 4)]
+    largo, medio, corto = jobs
+    assert largo['command'] == ['mi_meme', largo['fasta'], '-oc', os.path.join(results_dir, 'Largo'),
+                                '-dna', '-nmotifs', '1']
+    assert medio['input'] == os.path.join(results_dir, 'inputs', 'Medio.fa')
+    assert corto['command'][-2:] == ['-bfile', os.path.join(fasta_dir, BACKGROUND_DIR, 'Corto.bg')]
+    # Un -bfile explícito en los parámetros tiene prioridad
+    assert build_jobs(fasta_dir, results_dir, meme_args='-bfile otro.bg')[2]['command'].count('-bfile') == 1
+
+
+def test_run_jobs_resumes_completed(fasta_dir, fake_meme, tmp_path, capsys):
+    results_dir = str(tmp_path / 'meme')
+    jobs = build_jobs(fasta_dir, results_dir, meme=fake_meme)
+
+    state = run_jobs(jobs, results_dir, n_jobs=2)
+    assert {tf_name: entry['status'] for tf_name, entry in state.items()} == \
+        {'Largo': 'ok', 'Medio': 'ok', 'Corto': 'ok'}
+    assert load_state(results_dir) == state
+    assert open(os.path.join(results_dir, 'Medio', 'entrada.fa')).read() == '>a|1-6\nAC\nGTAC\n'
+    capsys.readouterr()
+
+    run_jobs(jobs, results_dir, n_jobs=2)
+    assert "Se retoman 0 trabajos; 3 ya completados" in capsys.readouterr().out
+
+    # Solo se repite el TF cuyo FASTA cambió; con force=True se repiten todos
+    with open(os.path.join(fasta_dir, 'Corto.fa'), 'a') as f:
+        f.write('>b|5-8\nTTTT\n')
+    run_jobs(jobs, results_dir)
+    assert "Se retoman 1 trabajos; 2 ya completados" in capsys.readouterr().out
+    run_jobs(jobs, results_dir, force=True)
+    assert "Se retoman" not in capsys.readouterr().out
+
+
+def test_run_jobs_retries_and_timeout(tmp_path, fake_meme, capsys):
+    fasta_dir = tmp_path / 'fastas'
+    fasta_dir.mkdir()
+    (fasta_dir / 'Falla.fa').write_text('>a|1-4\nACGT\n')
+    (fasta_dir / 'Lento.fa').write_text('>a|1-4\nACGT\n')
+    results_dir = str(tmp_path / 'meme')
+    jobs = build_jobs(str(fasta_dir), results_dir, meme=fake_meme)
+
+    state = run_jobs(jobs, results_dir, n_jobs=2, timeout=0.5, retries=1)
+    assert (state['Falla']['status'], state['Falla']['attempts'], state['Falla']['returncode']) == ('error', 2, 3)
+    assert (state['Lento']['status'], state['Lento']['returncode']) == ('timeout', None)
+    assert state['Lento']['seconds'] < 4
+    log = open(os.path.join(results_dir, LOG_DIR, 'Falla.log')).read()
+    assert log.count('fallo\n') == 2 and '# intento 2: error (codigo 3)' in log
+
+
+def test_run_script_matches_scheduler(fasta_dir, fake_meme, tmp_path):
+    results_dir = str(tmp_path / 'meme')
+    jobs = build_jobs(fasta_dir, results_dir, meme=fake_meme)
+    script = write_run_script(jobs, str(tmp_path / 'run_meme.sh'), results_dir)
+
+    assert os.access(script, os.X_OK)
+    subprocess.run([script], check=True)
+    run_log = open(os.path.join(results_dir, 'run_meme.log')).read()
+    assert [line for line in run_log.splitlines() if '\t' in line] == ['Largo\tok', 'Medio\tok', 'Corto\tok']
+    assert open(os.path.join(results_dir, 'Medio', 'entrada.fa')).read() == '>a|1-6\nAC\nGTAC\n'
+
+
+def test_cli_summary_and_exit_code(fasta_dir, fake_meme, tmp_path, capsys):
+    (tmp_path / 'fastas' / 'Falla.fa').write_text('>a|1-4\nACGT\n')
+    results_dir = tmp_path / 'meme'
+    argv = ['-i', fasta_dir, '-o', results_dir, '--meme', fake_meme, '--jobs', '2']
+
+    # Sin --script, run_meme.sh queda en el directorio de resultados
+    assert run_main(argv + ['--script-only'], module='meme_scheduler') == 0
+    assert os.access(results_dir / 'run_meme.sh', os.X_OK)
+    assert not (results_dir / STATE_NAME).exists()
+
+    assert run_main(argv, module='meme_scheduler') == 1
+    assert 'Fallaron 1 trabajos: Falla' in capsys.readouterr().err
+    header, *rows = (results_dir / SUMMARY_NAME).read_text().splitlines()
+    assert header.split('\t')[:2] == ['TF_name', 'Status']
+    assert [row.split('\t')[:3] for row in rows] == [
+        ['Largo', 'ok', '1'], ['Medio', 'ok', '1'], ['Corto', 'ok', '1'], ['Falla', 'error', '1']]
@@ -0,0 +1,67 @@
+import json
+import os
+
+from conftest import run_main
+from extractor import REJECTED_REPORT
+from metrics import METRICS_VERSION, RunMetrics, format_rejected_rows
+
+
+def test_run_metrics_stages_and_counters(tmp_path):
+    metrics = RunMetrics()
+    with metrics.stage('parse'):
+        sum(range(1000))
+    with metrics.stage('parse'):
+        pass
+    metrics.add_time('write', 0.5)
+    metrics.add_time('write', 0.25)
+    metrics.count('files_written')
+    metrics.count('files_written', 2)
+    path = tmp_path / 'metricas.json'
+    metrics.save(str(path))
+
+    report = json.loads(path.read_text())
+    assert report['version'] == METRICS_VERSION
+    assert set(report['stages']['parse']) == {'wall_s', 'cpu_s'}
+    assert report['stages']['write'] == {'wall_s': 0.75}
+    assert report['counters'] == {'files_written': 3}
+    assert report['memory']['peak_rss_mb'] > 0 and report['profile'] is None
+
+
+def test_format_rejected_rows():
+    assert format_rejected_rows({}) == "0"
+    assert format_rejected_rows({'rows_rejected': {'start_after_end': 1, 'field_count': 2}}) == \
+        "3 (field_count: 2, start_after_end: 1)"
+
+
+def test_cli_metrics_report(genome_file, peaks_file, tmp_path, capsys):
+    output_dir = tmp_path / 'out'
+    metrics_path = tmp_path / 'metricas.json'
+    assert run_main(['-p', peaks_file, '-g', genome_file, '-o', output_dir, '--metrics', metrics_path]) == 0
+
+    report = json.loads(metrics_path.read_text())
+    assert {'parse', 'genome_load', 'extract', 'write'} <= set(report['stages'])
+    counters = report['counters']
+    assert counters['rows_read'] == 71
+    assert counters['rows_rejected'] == {'field_count': 1, 'parse_error': 1, 'start_after_end': 1}
+    assert counters['peaks_out_of_bounds'] == 3
+    assert counters['bytes_written'] == {name[:-len('.fa')]: os.path.getsize(output_dir / name)
+                                         for name in os.listdir(output_dir) if name.endswith('.fa')}
+    assert counters['files_written'] == 5
+
+    header, *rows = (output_dir / REJECTED_REPORT).read_text().splitlines()
+    assert header == 'TF_name\tPeak_id\tPeak_start\tPeak_end\tReason'
+    assert sorted(row.split('\t')[1] for row in rows) == ['edge_102', 'edge_103', 'out_1']
+
+
+def test_cli_quiet_suppresses_per_tf_lines(genome_file, peaks_file, tmp_path, capsys):
+    assert run_main(['-p', peaks_file, '-g', genome_file, '-o', tmp_path / 'out']) == 0
+    verbose = capsys.readouterr()
+    assert 'AraC: ' in verbose.out
+    assert verbose.err.count('Advertencia') > 1
+
+    assert run_main(['-p', peaks_file, '-g', genome_file, '-o', tmp_path / 'silencio', '--quiet']) == 0
+    quiet = capsys.readouterr()
+    assert 'secuencias extraidas' not in quiet.out
+    # Las filas omitidas se resumen en un solo aviso
+    assert "Filas omitidas: 3 (field_count: 1, parse_error: 1, start_after_end: 1)" in quiet.err
+    assert 'Linea' not in quiet.err
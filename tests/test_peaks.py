@@ -0,0 +1,121 @@
+import os
+
+import numpy as np
+import pytest
+
+from conftest import GENOME_LENGTH, ROOT, read_outputs, run_main, sample_peak_rows, write_peaks
+from peaks import iter_peak_chunks, parse_peaks, parse_peaks_table, summit_windows
+
+
+def flatten(peaks_dict):
+    """Picos de parse_peaks como (tf, start, end, peak_id), ordenados por ID de pico."""
+    return sorted(((tf_name, *peak) for tf_name, peaks in peaks_dict.items() for peak in peaks),
+                  key=lambda row: row[3])
+
+
+def tricky_peaks_file(tmp_path):
+    """Picos de ejemplo más filas límite: coordenadas en notación científica, vacías, líneas en blanco y CRLF."""
+    rows = sample_peak_rows() + [
+        ('DS9', 'AraC', '1e3', '1.2e3', 1100, 7, 1.0),
+        'x\tDS9\tAraC\t\t40.0\t20.0\t8\t1.0\t1.0\tgeneA\tintergenic',
+        '',
+        'x\tDS9\tCRP\t10.0\t20.0\t15.0\t9\t1.0\t1.0\tgeneA\tintergenic\r',
+        ('DS9', 'Nuevo', 5, 5, 5, 10, 1.0),
+    ]
+    return write_peaks(str(tmp_path / 'picos.tsv'), rows)
+
+
+@pytest.mark.parametrize('source', ['sample', 'bundled'])
+def test_columnar_parser_matches_dict_parser(source, tmp_path, capsys):
+    if source == 'sample':
+        peak_file = tricky_peaks_file(tmp_path)
+    else:
+        peak_file = os.path.join(ROOT, 'data', 'union_peaks_file_short.tsv')
+
+    expected_counters = {}
+    expected = parse_peaks(peak_file, expected_counters)
+    expected_warnings = capsys.readouterr().err
+    counters = {}
+    table = parse_peaks_table(peak_file, counters)
+
+    assert capsys.readouterr().err == expected_warnings
+    assert counters == expected_counters
+    assert table.keys() == list(expected) and len(table) == len(expected)
+    assert dict(table.items()) == dict(expected)
+    assert table.n_rows == sum(len(peaks) for peaks in expected.values())
+    for tf_name in table:
+        assert [table.peak_id(row) for row in table.rows(tf_name).tolist()] == \
+            [peak_id for _, _, peak_id in expected[tf_name]]
+
+
+def test_peak_chunks_cover_every_valid_row(peaks_file):
+    counters = {}
+    chunks = list(iter_peak_chunks(peaks_file, chunk_size=7, counters=counters, quiet=True))
+
+    assert all(len(tf_names) <= 7 for tf_names, *_ in chunks)
+    rows = [(tf_name, start, end, peak_id)
+            for tf_names, starts, ends, peak_ids in chunks
+            for tf_name, start, end, peak_id in zip(tf_names, starts.tolist(), ends.tolist(), peak_ids)]
+    expected_counters = {}
+    assert sorted(rows, key=lambda row: row[3]) == flatten(parse_peaks(peaks_file, expected_counters, quiet=True))
+    assert counters == expected_counters
+
+
+def test_summit_windows_clip_and_drop():
+    centers = np.array([50, 5, 4998, 5100])
+
+    starts, ends, keep = summit_windows(centers, 10, 5000)
+    assert starts.tolist()[:3] == [40, 1, 4988] and ends.tolist()[:3] == [60, 15, 5000]
+    assert keep.tolist() == [True, True, True, False]
+    assert summit_windows(centers, 10, 5000, edge='drop')[2].tolist() == [True, False, False, False]
+
+
+@pytest.mark.parametrize('edge', ['clip', 'drop'])
+def test_table_summit_windows(edge, peaks_file):
+    table = parse_peaks_table(peaks_file, quiet=True, summits=True)
+    windows = table.summit_windows(25, GENOME_LENGTH, edge)
+
+    expected = {}
+    for tf_name in table:
+        for row in table.rows(tf_name).tolist():
+            start, end = int(table.centers[row]) - 25, int(table.centers[row]) + 25
+            if edge == 'clip':
+                start, end = max(start, 1), min(end, GENOME_LENGTH)
+            if start <= end and (edge == 'clip' or (start >= 1 and end <= GENOME_LENGTH)):
+                expected.setdefault(tf_name, []).append((start, end, table.peak_id(row)))
+    assert {tf_name: windows[tf_name] for tf_name in windows if windows[tf_name]} == expected
+    with pytest.raises(ValueError, match='Peak_center'):
+        parse_peaks_table(peaks_file, quiet=True).summit_windows(25, GENOME_LENGTH)
+
+
+def test_top_k_keeps_best_scores_and_file_order(tmp_path):
+    rows = [('DS', 'A', 10 * i + 1, 10 * i + 5, 10 * i + 3, i, score)
+            for i, score in enumerate([5.0, 9.0, 7.0, 9.0, 1.0, 7.0])]
+    rows += [('DS', 'B', 1, 5, 3, 100, 2.0)]
+    table = parse_peaks_table(write_peaks(str(tmp_path / 'picos.tsv'), rows), quiet=True, summits=True)
+
+    best = table.top_k(3)
+    # Empate en 7.0: gana el pico que aparece antes en el archivo
+    assert [peak_id for _, _, peak_id in best['A']] == ['DS_1', 'DS_2', 'DS_3']
+    assert best['B'] == table['B']
+    assert table.top_k(10)['A'] == table['A']
+    with pytest.raises(ValueError, match='Max_Fold_Enrichment'):
+        parse_peaks_table(str(tmp_path / 'picos.tsv'), quiet=True).top_k(3)
+
+
+def test_cli_summit_window_top_k(genome_file, genome_seq, peaks_file, tmp_path, capsys):
+    output_dir = tmp_path / 'out'
+    assert run_main(['-p', peaks_file, '-g', genome_file, '-o', output_dir,
+                     '--summit-window', '20', '--top-k', '3', '--window-edge', 'drop']) == 0
+
+    for name, data in read_outputs(output_dir).items():
+        records = data.decode().split('>')[1:]
+        assert 1 <= len(records) <= 3
+        for record in records:
+            header, seq = record.split('\n')[:2]
+            start, end = map(int, header.split('|')[1].split('-'))
+            assert end - start == 40 and seq == genome_seq[start - 1:end]
+
+    assert run_main(['-p', peaks_file, '-g', genome_file, '-o', output_dir, '--top-k', '0']) == 1
+    assert run_main(['-p', peaks_file, '-g', genome_file, '-o', output_dir, '--summit-window', '5', '--stream']) == 1
+    assert '--top-k debe ser al menos 1' in capsys.readouterr().err
@@ -0,0 +1,72 @@
+import os
+
+import numpy as np
+import pytest
+
+import peaks_cache
+from conftest import read_outputs, run_main, write_peaks
+from peaks import parse_peaks_table
+from peaks_cache import default_cache_path, load_peak_table
+
+
+def assert_same_table(table, expected):
+    assert table.tf_names == expected.tf_names
+    assert dict(table.items()) == dict(expected.items())
+    assert np.array_equal(table.centers, expected.centers) and np.array_equal(table.scores, expected.scores)
+
+
+def test_cache_round_trip_repeats_warnings(peaks_file, monkeypatch, capsys):
+    expected_counters = {}
+    expected = parse_peaks_table(peaks_file, expected_counters, summits=True)
+    warnings = capsys.readouterr().err
+
+    counters = {}
+    assert_same_table(load_peak_table(peaks_file, counters), expected)
+    assert os.path.exists(default_cache_path(peaks_file))
+    assert capsys.readouterr().err == warnings and counters == expected_counters
+
+    # La segunda lectura sale de la cache, sin volver a leer el TSV
+    monkeypatch.setattr(peaks_cache, 'parse_peaks_table', lambda *args, **kwargs: pytest.fail("se leyó el TSV"))
+    counters = {}
+    assert_same_table(load_peak_table(peaks_file, counters, summits=True), expected)
+    assert capsys.readouterr().err == warnings and counters == expected_counters
+    load_peak_table(peaks_file, quiet=True)
+    assert capsys.readouterr().err == ''
+
+
+def test_changed_or_damaged_cache_is_rebuilt(peaks_file, capsys):
+    load_peak_table(peaks_file, quiet=True)
+    cache_path = default_cache_path(peaks_file)
+
+    write_peaks(peaks_file, [('nuevo', 'LexA', 2000, 2100, 2050, 1, 9.0)])
+    assert load_peak_table(peaks_file, quiet=True)['LexA'] == [(2000, 2100, 'nuevo_1')]
+
+    with open(cache_path, 'r+b') as f:
+        f.write(b'basura!!')
+    assert load_peak_table(peaks_file, quiet=True)['LexA'] == [(2000, 2100, 'nuevo_1')]
+    assert 'Cache de picos ilegible' in capsys.readouterr().err
+    assert load_peak_table(peaks_file, quiet=True)['LexA'] == [(2000, 2100, 'nuevo_1')]
+    assert capsys.readouterr().err == ''
+
+
+def test_empty_table_round_trip(tmp_path):
+    peaks_file = write_peaks(str(tmp_path / 'vacio.tsv'), [])
+
+    assert load_peak_table(peaks_file).n_rows == 0
+    assert load_peak_table(peaks_file).n_rows == 0
+
+
+@pytest.mark.parametrize('options, cached', [
+    ([], True),
+    (['--columnar'], False),
+    (['--no-peaks-cache'], False),
+    (['--no-peaks-cache', '--summit-window', '30'], False),
+])
+def test_cli_peak_cache_options(options, cached, genome_file, peaks_file, tmp_path, capsys):
+    assert run_main(['-p', peaks_file, '-g', genome_file, '-o', tmp_path / 'out'] + options) == 0
+    assert os.path.exists(default_cache_path(peaks_file)) == cached
+
+    if cached:
+        # Con la cache ya escrita, la salida no cambia
+        assert run_main(['-p', peaks_file, '-g', genome_file, '-o', tmp_path / 'otra'] + options) == 0
+        assert read_outputs(tmp_path / 'otra') == read_outputs(tmp_path / 'out')
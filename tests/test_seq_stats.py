@@ -0,0 +1,68 @@
+import itertools
+import os
+from collections import Counter
+
+from conftest import random_sequence, read_outputs, run_main
+from seq_stats import BACKGROUND_DIR, STATS_COLUMNS, STATS_REPORT, format_background, sequence_stats
+
+
+def naive_kmers(sequences, k):
+    """Conteos de palabras ACGT de longitud k (sin distinguir mayúsculas), en el orden de kmer_counts."""
+    counts = Counter(
+        seq[i:i + k].upper()
+        for seq in sequences for i in range(len(seq) - k + 1)
+        if set(seq[i:i + k].upper()) <= set('ACGT')
+    )
+    return [counts[''.join(word)] for word in itertools.product('ACGT', repeat=k)]
+
+
+def test_sequence_stats_matches_naive_counts():
+    sequences = [random_sequence(length, seed) for length, seed in ((500, 1), (250, 2), (140, 3))] + ['', 'acgTN']
+    stats = sequence_stats(sequences, markov_order=2, bin_width=100)
+
+    text = ''.join(sequences).upper()
+    acgt = sum(text.count(base) for base in 'ACGT')
+    assert stats['Sequences'] == 5 and stats['Total_bases'] == len(text)
+    assert (stats['Min_length'], stats['Median_length'], stats['Max_length']) == (0, 140.0, 500)
+    assert stats['GC_percent'] == 100.0 * (text.count('G') + text.count('C')) / acgt
+    assert stats['N_count'] == text.count('N')
+    assert stats['Other_count'] == len(text) - acgt - text.count('N')
+    assert stats['Length_histogram'] == '0-99:2,100-199:1,200-299:1,500-599:1'
+    for k, counts in enumerate(stats['kmers'], start=1):
+        assert counts.tolist() == naive_kmers(sequences, k)
+
+
+def test_format_background_pools_strands():
+    kmers = sequence_stats(['AAAC', 'GT'], markov_order=1)['kmers']
+    lines = format_background(kmers).splitlines()
+
+    assert lines[0] == '# order 0' and lines[5] == '# order 1' and len(lines) == 2 + 4 + 16
+    order0 = {word: float(freq) for word, freq in (line.split() for line in lines[1:5])}
+    # A: 3 + T: 1 -> 4 (+1), C: 1 + G: 1 -> 2 (+1), sobre 12 + 4
+    assert order0 == {'A': 5 / 16, 'C': 3 / 16, 'G': 3 / 16, 'T': 5 / 16}
+    order1 = {word: float(freq) for word, freq in (line.split() for line in lines[6:])}
+    assert order1['AC'] == order1['GT'] and order1['AA'] == order1['TT']
+    assert abs(sum(order1.values()) - 1) < 1e-3
+
+
+def test_cli_stats_report(genome_file, peaks_file, tmp_path, capsys):
+    output_dir = tmp_path / 'out'
+    assert run_main(['-p', peaks_file, '-g', genome_file, '-o', output_dir, '--stats',
+                     '--markov-order', '1', '--length-bin', '100']) == 0
+
+    header, *rows = (output_dir / STATS_REPORT).read_text().splitlines()
+    assert header.split('\t') == list(STATS_COLUMNS)
+    outputs = read_outputs(output_dir)
+    assert sorted(row.split('\t')[0] + '.fa' for row in rows) == sorted(outputs)
+    for row in rows:
+        fields = row.split('\t')
+        sequences = outputs[fields[0] + '.fa'].decode().splitlines()[1::2]
+        stats = sequence_stats(sequences, markov_order=1, bin_width=100)
+        assert fields[1:3] == [str(stats['Sequences']), str(stats['Total_bases'])]
+        assert fields[7] == f"{stats['GC_percent']:.2f}" and fields[10] == stats['Length_histogram']
+        background = (output_dir / BACKGROUND_DIR / f"{fields[0]}.bg").read_text()
+        assert background == format_background(stats['kmers'])
+    assert not any(name.startswith('.') for name in os.listdir(output_dir / BACKGROUND_DIR))
+
+    assert run_main(['-p', peaks_file, '-g', genome_file, '-o', output_dir, '--stats', '--stream']) == 1
+    assert '--stats no se puede combinar' in capsys.readouterr().err
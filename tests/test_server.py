@@ -0,0 +1,196 @@
+import asyncio
+import os
+import socket
+import stat
+
+import pytest
+
+import server
+from client import connect, send_request
+from conftest import read_outputs, run_main, sample_peak_rows, write_peaks
+from server import PeakServer, is_loopback, prepare_socket
+
+
+@pytest.fixture
+def peak_server(genome_file, genome_seq, peaks_file):
+    return PeakServer(genome_file, genome_seq, peaks_file)
+
+
+def test_status_and_unknown_operation(peak_server, peaks_file):
+    header, text = peak_server.handle({'op': 'status'})
+
+    assert header['peaks'] == peaks_file and header['genome_length'] == 5000
+    assert header['tfs'] == 6 and header['rows'] == 68
+    assert header['rows_rejected'] == {'field_count': 1, 'parse_error': 1, 'start_after_end': 1}
+    assert b'tfs\t6\n' in text
+    with pytest.raises(ValueError, match='Operacion desconocida'):
+        peak_server.handle({'op': 'borrar'})
+
+
+def test_fasta_matches_cli_output(peak_server, genome_file, peaks_file, tmp_path, capsys):
+    assert run_main(['-p', peaks_file, '-g', genome_file, '-o', tmp_path / 'out', '--line-width', '60']) == 0
+    expected = read_outputs(tmp_path / 'out')
+
+    for name, data in expected.items():
+        header, fasta = peak_server.handle({'op': 'fasta', 'tf': name[:-len('.fa')], 'line_width': 60})
+        assert fasta == data
+        assert header['sequences'] == data.count(b'>')
+    # La segunda petición sale del FASTA ya armado, sin pasar por un hilo aparte
+    assert peak_server.is_cached({'op': 'fasta', 'tf': 'AraC', 'line_width': 60})
+    assert not peak_server.is_cached({'op': 'fasta', 'tf': 'AraC'})
+    assert peak_server.handle({'op': 'fasta', 'tf': 'AraC', 'line_width': 60})[1] is \
+        peak_server.loaded.fasta_cache[('AraC', 60)][1]
+    assert peak_server.handle({'op': 'fasta', 'tf': 'Fur', 'line_width': 60})[0]['rejected'] == 1
+    with pytest.raises(ValueError, match='sin picos'):
+        peak_server.handle({'op': 'fasta', 'tf': 'Desconocido'})
+
+
+def test_regions(peak_server, genome_seq):
+    regions = [['uno', 1, 10], ['fuera', 4990, 5010], ['dos', 1200, 1450]]
+    header, fasta = peak_server.handle({'op': 'regions', 'regions': regions})
+
+    assert header == {'sequences': 2, 'rejected': 1}
+    assert fasta.decode() == f">uno|1-10\n{genome_seq[:10]}\n>dos|1200-1450\n{genome_seq[1199:1450]}\n"
+
+
+def test_reload_publishes_new_peaks_in_one_step(peak_server, peaks_file):
+    before = peak_server.loaded
+    peak_server.handle({'op': 'fasta', 'tf': 'AraC'})
+    write_peaks(peaks_file, [row for row in sample_peak_rows() if isinstance(row, str) or row[1] != 'AraC'])
+
+    header, _ = peak_server.handle({'op': 'reload'})
+    assert header['tfs'] == 5
+    assert 'AraC' not in peak_server.loaded.tfs and not peak_server.loaded.fasta_cache
+    # Quien tomó el estado anterior lo sigue viendo completo
+    assert 'AraC' in before.tfs and ('AraC', None) in before.fasta_cache
+
+
+def test_extract_matches_cli_and_reads_changed_peaks(peak_server, genome_file, peaks_file, tmp_path, capsys):
+    assert run_main(['-p', peaks_file, '-g', genome_file, '-o', tmp_path / 'cli']) == 0
+    capsys.readouterr()
+    request = {'op': 'extract', 'peaks': peaks_file, 'genome': genome_file, 'outdir': str(tmp_path / 'servidor')}
+
+    header, log = peak_server.handle(request)
+    assert read_outputs(tmp_path / 'servidor') == read_outputs(tmp_path / 'cli')
+    assert header['counters']['peaks_out_of_bounds'] == 3
+    assert b'AraC: ' in log and 'fuera de los limites' in header['message']
+    # El resumen y los avisos van en la respuesta, no en los flujos del proceso
+    assert capsys.readouterr() == ('', '')
+
+    # Los picos modificados se leen solo para esa petición; los cargados cambian con 'reload'
+    loaded = peak_server.loaded
+    write_peaks(peaks_file, sample_peak_rows() + [('nuevo', 'LexA', 2000, 2100, 2050, 1, 9.0)])
+    os.utime(peaks_file, ns=(0, os.stat(peaks_file).st_mtime_ns + 10 ** 9))
+    peak_server.handle(dict(request, outdir=str(tmp_path / 'nuevo')))
+    assert b'>nuevo_1|2000-2100\n' in (tmp_path / 'nuevo' / 'LexA.fa').read_bytes()
+    assert peak_server.loaded is loaded and peak_server.handle({'op': 'status'})[0]['rows'] == 68
+    with pytest.raises(ValueError, match='otro genoma'):
+        peak_server.handle(dict(request, genome='otro.fa'))
+
+
+def run_with_server(peak_server, socket_path, client):
+    """Levanta el servidor en el socket, ejecuta client(sock_file) en un hilo y lo detiene."""
+    async def scenario():
+        serving = asyncio.ensure_future(peak_server.serve(str(socket_path)))
+        while not os.path.exists(socket_path):
+            await asyncio.sleep(0.01)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, client)
+        finally:
+            peak_server.shutdown_requested.set()
+            await serving
+
+    return asyncio.run(scenario())
+
+
+def test_socket_protocol(peak_server, tmp_path, capsys):
+    socket_path = tmp_path / 's.sock'
+
+    def client():
+        with connect(str(socket_path)) as sock, sock.makefile('rwb') as sock_file:
+            status = send_request(sock_file, {'op': 'status'})
+            error = send_request(sock_file, {'op': 'fasta', 'tf': 'Desconocido'})
+            fasta = send_request(sock_file, {'op': 'fasta', 'tf': 'CRP'})
+            reload = send_request(sock_file, {'op': 'reload'})
+        return status, error, fasta, reload
+
+    status, error, fasta, reload = run_with_server(peak_server, socket_path, client)
+    assert status[0]['ok'] and status[0]['tfs'] == 6
+    assert not error[0]['ok'] and 'sin picos' in error[0]['error']
+    assert fasta[0]['ok'] and fasta[0]['bytes'] == len(fasta[1])
+    assert fasta[1] == peak_server.handle({'op': 'fasta', 'tf': 'CRP'})[1]
+    assert reload[0]['ok'] and reload[0]['tfs'] == 6
+    assert not socket_path.exists()
+
+
+def test_shutdown_closes_open_connections(peak_server, tmp_path, capsys):
+    socket_path = tmp_path / 's.sock'
+
+    def client():
+        with connect(str(socket_path)) as sock, sock.makefile('rwb') as sock_file:
+            sock.settimeout(10)
+            header, _ = send_request(sock_file, {'op': 'shutdown'})
+            # La conexión sigue abierta: el servidor la cierra al detenerse
+            return header, sock_file.readline()
+
+    header, rest = run_with_server(peak_server, socket_path, client)
+    assert header['ok'] and rest == b''
+    assert 'CancelledError' not in capsys.readouterr().err
+
+
+def test_socket_is_private_and_not_taken_over(peak_server, tmp_path, capsys):
+    socket_path = tmp_path / 's.sock'
+
+    def client():
+        mode = stat.S_IMODE(os.stat(socket_path).st_mode)
+        with pytest.raises(RuntimeError, match='Ya hay un servidor escuchando'):
+            prepare_socket(str(socket_path))
+        return mode
+
+    assert run_with_server(peak_server, socket_path, client) == 0o600
+
+    # Un socket sin servidor (de una ejecución anterior) se elimina; un archivo común no se toca
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(socket_path))
+    stale.close()
+    prepare_socket(str(socket_path))
+    assert not socket_path.exists()
+    socket_path.write_text('datos')
+    with pytest.raises(RuntimeError, match='no es un socket'):
+        prepare_socket(str(socket_path))
+    assert socket_path.read_text() == 'datos'
+
+
+def test_default_socket_directory_is_private(tmp_path, monkeypatch):
+    socket_dir = tmp_path / 'privado'
+    monkeypatch.setattr(server, 'SOCKET_DIR', str(socket_dir))
+
+    prepare_socket(str(socket_dir / 's.sock'))
+    assert stat.S_IMODE(os.stat(socket_dir).st_mode) == 0o700
+    os.chmod(socket_dir, 0o755)
+    with pytest.raises(RuntimeError, match='permisos 0700'):
+        prepare_socket(str(socket_dir / 's.sock'))
+
+
+def test_only_loopback_hosts(genome_file, peaks_file, capsys):
+    assert is_loopback('127.0.0.1') and is_loopback('::1') and is_loopback('localhost')
+    assert not is_loopback('0.0.0.0') and not is_loopback('192.168.1.10') and not is_loopback('servidor.lan')
+
+    argv = ['-p', peaks_file, '-g', genome_file, '--host', '0.0.0.0', '--port', '8765']
+    assert run_main(argv, module='server') == 1
+    assert '--host debe ser una direccion local' in capsys.readouterr().err
+
+
+def test_oversized_request_gets_error(peak_server, genome_file, peaks_file, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(server, 'MAX_REQUEST_BYTES', 1024)
+    socket_path = tmp_path / 's.sock'
+    regions = tmp_path / 'regiones.tsv'
+    regions.write_text('1\t10\n' * 500)
+    argv = ['--socket', socket_path, '--regions', regions, '-p', peaks_file, '-g', genome_file, '-o', tmp_path / 'out']
+
+    # El servidor responde con el error y cierra: la petición siguiente ya no se atiende
+    assert run_with_server(peak_server, socket_path, lambda: run_main(argv, module='client')) == 1
+    err = capsys.readouterr().err
+    assert 'Peticion demasiado grande (maximo 1024 bytes por linea)' in err
+    assert 'ERROR: [extract]' in err
+    assert not (tmp_path / 'out').exists()
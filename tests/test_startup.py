@@ -0,0 +1,29 @@
+import os
+
+import pytest
+
+from benchmarks.check_startup import DEFAULT_BUDGET_MS, measure_case, startup_cases
+
+# Presupuesto de importación por caso (ms, además de argparse/os/sys); se puede ajustar por máquina
+BUDGET_MS = float(os.environ.get('PEAK_ANALYSIS_IMPORT_BUDGET_MS', DEFAULT_BUDGET_MS))
+
+
+@pytest.mark.parametrize('case', ['help', 'validation_error'])
+def test_startup_import_budget(case, tmp_path):
+    argv = startup_cases(str(tmp_path))[case]
+    total_ms, best, heavy, _, _ = measure_case(argv, repeat=3)
+
+    assert not heavy, f"{case}: importa {', '.join(heavy)} antes de validar los argumentos"
+    slowest = ', '.join(f"{name} {self_us / 1000:.1f} ms"
+                        for name, self_us in sorted(best.items(), key=lambda item: -item[1])[:5])
+    assert total_ms <= BUDGET_MS, f"{case}: {total_ms:.1f} ms > {BUDGET_MS:.0f} ms ({slowest})"
+
+
+def test_validation_error_case_reaches_option_checks(tmp_path):
+    # El caso debe pasar las verificaciones de archivos y fallar en las opciones
+    argv = startup_cases(str(tmp_path))['validation_error']
+    _, _, _, returncode, messages = measure_case(argv, repeat=1)
+
+    assert returncode == 1
+    assert '--markov-order' in messages
+    assert 'no encontrado' not in messages
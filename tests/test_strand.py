@@ -0,0 +1,108 @@
+import re
+
+import numpy as np
+import pytest
+
+from conftest import GENOME_LENGTH, read_outputs, run_main
+from extractor import extract_batch
+from genome import reverse_complement, reverse_complement_batch
+from peaks import PeakTable, read_gene_strands, strand_from_genes
+
+
+def parse_fasta(data):
+    """{encabezado: secuencia} de un FASTA de una línea por secuencia."""
+    lines = data.decode().splitlines()
+    return dict(zip((line[1:] for line in lines[::2]), lines[1::2]))
+
+
+def test_reverse_complement_batch_matches_single():
+    sequences = ['ACGTN', '', 'acgtRYKMBDHVSW', 'A', '', 'GGGCCC']
+
+    assert reverse_complement_batch(sequences) == [reverse_complement(seq) for seq in sequences]
+    assert reverse_complement('AACGTRYn') == 'nRYACGTT'
+    assert reverse_complement_batch([]) == []
+
+
+@pytest.mark.parametrize('dedup', [False, True])
+def test_extract_batch_minus_strand(dedup, genome_seq):
+    starts = np.array([1200, 1200, 10, 4990, 0, 350])
+    ends = np.array([1450, 1450, 20, 5000, 5, 350])
+    minus = np.array([False, True, True, True, True, False])
+
+    in_bounds, sequences = extract_batch(genome_seq, starts, ends, dedup=dedup, minus=minus)
+    expected = [
+        reverse_complement(genome_seq[start - 1:end]) if is_minus else genome_seq[start - 1:end]
+        for start, end, is_minus, ok in zip(starts.tolist(), ends.tolist(), minus.tolist(), in_bounds.tolist()) if ok
+    ]
+    assert in_bounds.tolist() == [True, True, True, True, False, True]
+    assert sequences == expected
+
+
+def test_read_gene_strands(tmp_path):
+    annotation = tmp_path / 'genes.gff'
+    annotation.write_text(
+        '##gff-version 3\n'
+        'chr\tx\tgene\t1\t10\t.\t-\t.\tID=g1;Name=araC\n'
+        'chr\tx\tgene\t20\t30\t.\t+\t.\tgene_id "g2"; gene_name "crp";\n'
+        'chr\tx\tCDS\t20\t30\t.\t-\t.\tgene=crp\n'
+        '\n'
+        'lexA\t-\n'
+        'fur\t.\n'
+    )
+    gene_strands = read_gene_strands(str(annotation))
+
+    assert gene_strands == {'araC': -1, 'crp': 1, 'lexA': -1}
+    convert = strand_from_genes(gene_strands)
+    assert convert('desconocido, lexA,crp') == -1
+    assert convert('fur') == 0
+
+
+@pytest.mark.parametrize('edge', ['clip', 'drop'])
+def test_flank_follows_strand(edge):
+    table = PeakTable(
+        starts=np.array([100, 100, 3, 4990]), ends=np.array([200, 200, 50, 4995]),
+        tf_codes=np.array([0, 0, 0, 0]), tf_names=['A'], dataset_codes=np.array([0, 0, 0, 0]), datasets=['DS'],
+        peak_numbers=['1', '2', '3', '4'], strands=np.array([1, -1, 0, -1]),
+    )
+    flanked = table.flank(10, 5, GENOME_LENGTH, edge)
+
+    # En '-' el flanco 5' queda a la derecha; los que salen del genoma se recortan o se descartan
+    expected = [(90, 205, 'DS_1'), (95, 210, 'DS_2')]
+    if edge == 'clip':
+        expected += [(1, 55, 'DS_3'), (4985, 5000, 'DS_4')]
+    assert flanked['A'] == expected
+    assert flanked.strands.tolist() == [1, -1, 0, -1][:len(expected)]
+
+
+def test_cli_genes_and_strand_column(genome_file, genome_seq, peaks_file, tmp_path, capsys):
+    assert run_main(['-p', peaks_file, '-g', genome_file, '-o', tmp_path / 'directa']) == 0
+    forward = read_outputs(tmp_path / 'directa')
+
+    # Todos los picos tienen Proximal_genes 'geneA,geneB': toman la hebra de geneB
+    genes = tmp_path / 'genes.tsv'
+    genes.write_text('geneB\t-\n')
+    assert run_main(['-p', peaks_file, '-g', genome_file, '-o', tmp_path / 'genes', '--genes', genes]) == 0
+    stranded = read_outputs(tmp_path / 'genes')
+    assert sorted(stranded) == sorted(forward)
+    for name, data in forward.items():
+        assert parse_fasta(stranded[name]) == {f"{header}(-)": reverse_complement(seq)
+                                               for header, seq in parse_fasta(data).items()}
+
+    # Columna de hebra propia, con flancos que siguen la hebra
+    lines = open(peaks_file).read().splitlines()
+    with open(peaks_file, 'w') as f:
+        f.write(lines[0] + '\tHebra\n')
+        for i, line in enumerate(lines[1:]):
+            f.write(f"{line}\t{'-' if i % 2 else '+'}\n")
+    assert run_main(['-p', peaks_file, '-g', genome_file, '-o', tmp_path / 'columna', '--strand-column', 'Hebra',
+                     '--upstream', '20', '--window-edge', 'drop']) == 0
+    records = parse_fasta(read_outputs(tmp_path / 'columna')['LexA.fa'])
+    coordinates = [re.fullmatch(r'.*\|(\d+)-(\d+)\(([+-])\)', header).groups() for header in records]
+    assert {strand for _, _, strand in coordinates} == {'+', '-'}
+    for (start, end, strand), seq in zip(coordinates, records.values()):
+        expected = genome_seq[int(start) - 1:int(end)]
+        assert seq == (reverse_complement(expected) if strand == '-' else expected)
+
+    assert run_main(['-p', peaks_file, '-g', genome_file, '-o', tmp_path / 'x', '--genes', genes,
+                     '--strand-column', 'Hebra']) == 1
+    assert 'Use --strand-column o --genes, no ambos' in capsys.readouterr().err